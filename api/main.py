@@ -1,21 +1,84 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import router
+from fastapi.responses import JSONResponse
+from starlette.routing import Match
+from .routes import router, inference_pool, model_router, training_pipeline
 from data_generation.finetune_rag import router as finetune_router
+from deployment.metrics import HTTP_IN_FLIGHT, HTTP_REQUEST_SECONDS
+from deployment.warmup import preload
+
+logger = logging.getLogger(__name__)
+
+async def preload_models(app: FastAPI):
+    """
+    Precarga y calienta los modelos configurados en `deployment.preload` y marca la API como lista.
+
+    Un fallo en un modelo se registra en el estado de precarga pero no impide que la API
+    quede lista para el resto.
+    """
+    await preload(training_pipeline.config, app.state.preload, inference_pool.run, router=model_router)
+    app.state.ready = True
+    logger.info("Precarga de modelos completada; la API está lista.")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    app.state.preload = {}
+    if model_router is not None:
+        model_router.start()
+    # La precarga corre en segundo plano para que el proceso responda a /health/live mientras tanto
+    tarea = asyncio.create_task(preload_models(app))
+    yield
+    tarea.cancel()
+    if model_router is not None:
+        model_router.shutdown()
 
 app = FastAPI(
     title="API - SoftIA",
     description="API para entrenar e implementar modelos LLaMA optimizados",
     version="0.0.1",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  
+    allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    # La plantilla de la ruta (p. ej. /chat/batch/{job_id}) mantiene acotada la cardinalidad de las etiquetas
+    ruta = "unmatched"
+    for route in app.router.routes:
+        if route.matches(request.scope)[0] == Match.FULL:
+            ruta = route.path
+            break
+    HTTP_IN_FLIGHT.inc(path=ruta)
+    inicio = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec(path=ruta)
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - inicio, method=request.method, path=ruta, status=str(status))
+
+@app.get("/health/live", summary="Comprobar que el proceso está en marcha")
+async def health_live():
+    return {"status": "alive"}
+
+@app.get("/health/ready", summary="Comprobar que los modelos precargados están listos")
+async def health_ready():
+    body = {"ready": app.state.ready, "preload": app.state.preload}
+    return JSONResponse(status_code=200 if app.state.ready else 503, content=body)
+
 app.include_router(router)
 app.include_router(finetune_router, prefix="/finetuning-rag", tags=["fine-tuning"])
@@ -1,15 +1,125 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
 from finetuning.pipeline import TrainingPipeline
 from deployment.serve_model import ModelServer
-from deployment.utils import get_latest_model_path
-import yaml
+from deployment.batching import MicroBatcher
+from deployment.workers import PRIORITY_BULK, InferencePool, InferenceQueueFullError
+from deployment.scheduler import AdmissionController, AdmissionRejectedError
+from deployment.sessions import SessionStore
+from deployment.streaming import sse_events
+from deployment.response_cache import ResponseCache
+from deployment.sharding import ShardedModelRouter
+from deployment.batch_jobs import BatchJob, BatchJobStore
+from deployment.catalog import ModelCatalog
+from deployment.adapters import adapter_stats, evict_adapter
+from deployment.metrics import REGISTRY as metrics_registry, Counter, Gauge, counter_from, gauge_from
+from deployment.utils import get_draft_model, get_load_mode
 import os
+import asyncio
 import json
+import threading
 from typing import List, Optional
 from fastapi import File, Form, UploadFile
 
 router = APIRouter()
 training_pipeline = TrainingPipeline()
+_deployment_config = training_pipeline.config.deployment
+inference_pool = InferencePool.from_config(
+    _deployment_config,
+    initializer=ModelServer.configure_threads,
+)
+batcher = MicroBatcher.from_config(_deployment_config, executor=inference_pool)
+# En modo sharding, /chat se atiende en procesos worker con afinidad por modelo
+model_router = (
+    ShardedModelRouter.from_config(_deployment_config)
+    if training_pipeline.config.section('deployment', 'sharding').get('enabled')
+    else None
+)
+batch_jobs = BatchJobStore.from_config(_deployment_config)
+# /chat tiene prioridad sobre los trabajos por lotes y éstos sobre el entrenamiento
+scheduler = AdmissionController.from_config(_deployment_config)
+training_pipeline.scheduler = scheduler
+chat_sessions = SessionStore.from_config(_deployment_config)
+response_cache = ResponseCache.from_config(_deployment_config)
+model_catalog = ModelCatalog(
+    training_pipeline.config.model.finetuned_model_dir,
+    poll_interval=float(training_pipeline.config.section('deployment', 'model_catalog').get('poll_interval_seconds', 5)),
+)
+# Un modelo reentrenado también debe recargarse, no sólo dejar de servir respuestas antiguas
+response_cache.on_invalidate.append(ModelServer.registry.evict)
+response_cache.on_invalidate.append(evict_adapter)
+
+def _apply_config(config):
+    """
+    Aplica los límites de las cachés en memoria; se vuelve a llamar cada vez que cambia la configuración.
+    """
+    model_cache_config = config.section('deployment', 'model_cache')
+    ModelServer.registry.configure(
+        memory_budget_mb=model_cache_config.get('memory_budget_mb'),
+        pinned_models=[
+            os.path.join(config.model.finetuned_model_dir, name)
+            for name in model_cache_config.get('pinned_models', [])
+        ],
+    )
+    cache_config = config.section('deployment', 'response_cache')
+    response_cache.max_entries = int(cache_config.get('max_entries', response_cache.max_entries))
+    response_cache.ttl_seconds = float(cache_config.get('ttl_seconds', response_cache.ttl_seconds))
+    response_cache.version_check_interval = float(
+        cache_config.get('version_check_seconds', response_cache.version_check_interval)
+    )
+    adapters_config = config.section('deployment', 'adapters')
+    ModelServer.configure_adapters(
+        max_adapters=int(adapters_config.get('max_adapters', 8)),
+        base_model=adapters_config.get('base_model'),
+    )
+    sessions_config = config.section('deployment', 'sessions')
+    chat_sessions.ttl_seconds = float(sessions_config.get('ttl_seconds', chat_sessions.ttl_seconds))
+    kv_budget_mb = sessions_config.get('kv_budget_mb')
+    chat_sessions.kv_budget_bytes = int(kv_budget_mb * 1024 * 1024) if kv_budget_mb else None
+    if config.model.finetuned_model_dir != model_catalog.model_dir:
+        model_catalog.set_model_dir(config.model.finetuned_model_dir)
+
+_apply_config(training_pipeline.config)
+training_pipeline.config_service.subscribe(_apply_config)
+
+def _collect_metrics():
+    """
+    Exporta como métricas el estado de la caché de modelos, el pool, la caché de respuestas y las sesiones.
+    """
+    cache = ModelServer.registry.stats()
+    pool = inference_pool.stats()
+    respuestas = response_cache.stats()
+    sesiones = chat_sessions.stats()
+    planificador = scheduler.stats()
+    en_curso = Gauge("softia_scheduler_running", "Solicitudes admitidas por el planificador, por clase.", ["class"])
+    en_cola = Gauge("softia_scheduler_queued", "Solicitudes esperando plaza en el planificador, por clase.", ["class"])
+    rechazadas = Counter("softia_scheduler_rejected_total", "Solicitudes rechazadas por el planificador, por clase.", ["class"])
+    for clase, datos in planificador["classes"].items():
+        en_curso.set(datos["running"], **{"class": clase})
+        en_cola.set(datos["queued"], **{"class": clase})
+        rechazadas.inc(datos["rejected"], **{"class": clase})
+    return [
+        en_curso,
+        en_cola,
+        rechazadas,
+        counter_from("softia_model_cache_hits_total", "Aciertos de la caché de modelos.", cache["hits"]),
+        counter_from("softia_model_cache_misses_total", "Fallos de la caché de modelos (cargas desde disco).", cache["misses"]),
+        counter_from("softia_model_cache_evictions_total", "Modelos expulsados de la caché.", cache["evictions"]),
+        gauge_from("softia_model_cache_hit_ratio", "Proporción de aciertos de la caché de modelos.", cache["hit_rate"]),
+        gauge_from("softia_model_cache_bytes", "Memoria ocupada por los modelos residentes.", cache["bytes_in_use"]),
+        gauge_from("softia_model_cache_models", "Modelos residentes en memoria.", len(cache["models"])),
+        gauge_from("softia_inference_queue_depth", "Tareas esperando un worker de inferencia.", pool["queue_depth"]),
+        gauge_from("softia_inference_in_flight", "Tareas de inferencia en ejecución.", pool["in_flight"]),
+        counter_from("softia_inference_rejected_total", "Tareas rechazadas por cola llena.", pool["rejected"]),
+        counter_from("softia_response_cache_hits_total", "Aciertos de la caché de respuestas.", respuestas["hits"] + respuestas["coalesced"]),
+        counter_from("softia_response_cache_misses_total", "Fallos de la caché de respuestas.", respuestas["misses"]),
+        gauge_from("softia_chat_sessions", "Sesiones de chat activas.", sesiones["sessions"]),
+        gauge_from("softia_chat_sessions_kv_bytes", "Memoria ocupada por las cachés KV de las sesiones.", sesiones["kv_bytes"]),
+    ]
+
+metrics_registry.add_collector(_collect_metrics)
 
 @router.post("/train")
 async def train(
@@ -21,58 +131,296 @@ async def train(
     Endpoint unificado para generación de datos y entrenamiento.
     """
     try:
+        # Se rechaza antes de generar los datos si ya hay demasiados entrenamientos en espera
+        scheduler.check(use_case, "training")
         result = await training_pipeline.run(
             use_case=use_case,
             num_samples=num_samples,
             files=files
         )
         return result
+    except AdmissionRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.post("/chat", summary="Chatear con un modelo ajustado específico")
-async def chat(model_name: str, message: str):
+async def chat(model_name: str, message: str, session_id: Optional[str] = None):
+    """
+    Si se indica `session_id`, el mensaje se trata como un turno más de esa conversación y
+    se reutiliza la caché KV de los turnos anteriores en lugar de reenviar el historial.
+    """
     try:
-        config = yaml.safe_load(open('config/config.yaml'))
-        model_dir = config['model']['finetuned_model_dir']
-        model_path = os.path.join(model_dir, model_name) if model_name else get_latest_model_path(model_dir)
+        config = training_pipeline.config
+        model_dir = config.model.finetuned_model_dir
+        model_path = os.path.join(model_dir, model_name) if model_name else model_catalog.latest_path()
         
-        server = ModelServer(model_path)
-        response = server.predict(message)
+        if session_id:
+            async with scheduler.admit(model_path, "interactive"):
+                server = await inference_pool.run(ModelServer, model_path, get_load_mode(config.deployment, model_path))
+                sessions_config = config.section('deployment', 'sessions')
+                response = await inference_pool.run(
+                    server.chat_turn,
+                    chat_sessions,
+                    session_id,
+                    message,
+                    max_new_tokens=sessions_config.get('max_new_tokens', 256),
+                    context_window=sessions_config.get('context_window'),
+                )
+            return {"response": response, "model": model_name, "session_id": session_id}
+
+        load_mode = get_load_mode(config.deployment, model_path)
+        draft_model = get_draft_model(config.deployment, model_path)
+
+        async def generar():
+            # Los aciertos de la caché de respuestas no ocupan plaza en el planificador
+            async with scheduler.admit(model_path, "interactive"):
+                if model_router is not None:
+                    return await model_router.predict(model_path, message, load_mode=load_mode, draft_model=draft_model)
+                server = await inference_pool.run(ModelServer, model_path, load_mode, draft_model)
+                return await batcher.predict(server, message)
+
+        # predict_batch decodifica de forma voraz, por lo que la respuesta es determinista
+        response = await response_cache.get_or_compute(model_path, message, {"max_length": 1024}, generar, load_mode=load_mode)
         return {"response": response, "model": model_name}
+    except AdmissionRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except InferenceQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class ChatBatchRequest(BaseModel):
+    model_name: Optional[str] = None
+    prompts: List[str]
+    max_length: int = 1024
+
+async def _run_chat_batch(model_name: Optional[str], prompts: List[str], max_length: int):
+    """
+    Ejecuta un lote de prompts: los lotes pequeños se responden directamente y los grandes
+    se convierten en un trabajo en segundo plano (respuesta 202 con su job_id).
+    """
+    config = training_pipeline.config
+    batch_config = config.section('deployment', 'batch')
+    if not prompts:
+        raise HTTPException(status_code=400, detail="No se recibieron prompts.")
+    if len(prompts) > int(batch_config.get('max_prompts', 10000)):
+        raise HTTPException(status_code=413, detail=f"Se admiten como máximo {batch_config.get('max_prompts', 10000)} prompts por lote.")
+
+    try:
+        model_dir = config.model.finetuned_model_dir
+        model_path = os.path.join(model_dir, model_name) if model_name else model_catalog.latest_path()
+        load_mode = get_load_mode(config.deployment, model_path)
+        scheduler.check(model_path, "bulk")
+
+        if model_router is not None:
+            # Sin tokenizador local: la longitud en caracteres aproxima la de tokens
+            lengths = [len(p) for p in prompts]
+
+            async def generar_lote(lote):
+                async with scheduler.admit(model_path, "bulk", shed=False):
+                    return await asyncio.gather(*[
+                        model_router.predict(model_path, p, load_mode=load_mode, max_length=max_length) for p in lote
+                    ])
+        else:
+            server = await inference_pool.run_with_priority(PRIORITY_BULK, ModelServer, model_path, load_mode)
+            lengths = await inference_pool.run_with_priority(PRIORITY_BULK, server.token_lengths, prompts)
+
+            async def generar_lote(lote):
+                # Un trabajo ya aceptado espera su turno en lugar de fallar con 429/503;
+                # cada lote ocupa una plaza "bulk", así que /chat se intercala entre lotes
+                async with scheduler.admit(model_path, "bulk", shed=False):
+                    while True:
+                        try:
+                            return await inference_pool.run_with_priority(
+                                PRIORITY_BULK, server.predict_batch, lote, max_length=max_length
+                            )
+                        except InferenceQueueFullError as e:
+                            await asyncio.sleep(e.retry_after)
+    except AdmissionRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except InferenceQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    job = BatchJob(os.path.basename(os.path.normpath(model_path)), prompts)
+    if len(prompts) <= int(batch_config.get('sync_limit', 32)):
+        await batch_jobs.run(job, lengths, generar_lote)
+        if job.status == "failed":
+            raise HTTPException(status_code=500, detail=job.error)
+        return {
+            "model": job.model,
+            "results": [{"index": i, "prompt": p, "response": r} for i, (p, r) in enumerate(zip(prompts, job.results))],
+        }
+
+    batch_jobs.start(job, lengths, generar_lote)
+    return JSONResponse(status_code=202, content={
+        **job.summary(),
+        "status_url": f"/chat/batch/{job.job_id}",
+        "results_url": f"/chat/batch/{job.job_id}/results",
+    })
+
+@router.post("/chat/batch", summary="Generar respuestas para una lista de prompts")
+async def chat_batch(request: ChatBatchRequest):
+    return await _run_chat_batch(request.model_name, request.prompts, request.max_length)
+
+@router.post("/chat/batch/upload", summary="Generar respuestas para un archivo JSONL de prompts")
+async def chat_batch_upload(
+    file: UploadFile = File(..., description="JSONL con un prompt por línea: una cadena o un objeto con 'prompt' o 'entrada'."),
+    model_name: Optional[str] = Form(None),
+    max_length: int = Form(1024)
+):
+    prompts = []
+    for numero, linea in enumerate((await file.read()).decode("utf-8").splitlines(), start=1):
+        if not linea.strip():
+            continue
+        try:
+            item = json.loads(linea)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail=f"Línea {numero} no es JSON válido.")
+        prompt = item
+        if isinstance(item, dict):
+            prompt = item.get('prompt') or item.get('entrada')
+        if not isinstance(prompt, str):
+            raise HTTPException(status_code=400, detail=f"Línea {numero} no contiene un prompt.")
+        prompts.append(prompt)
+    return await _run_chat_batch(model_name, prompts, max_length)
+
+@router.get("/chat/batch/{job_id}", summary="Estado de un trabajo de inferencia por lotes")
+async def chat_batch_status(job_id: str):
+    job = batch_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"El trabajo {job_id} no existe.")
+    return job.summary()
+
+@router.get("/chat/batch/{job_id}/results", summary="Resultados de un trabajo por lotes en JSONL, en el orden original")
+async def chat_batch_results(job_id: str):
+    job = batch_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"El trabajo {job_id} no existe.")
+
+    async def lineas():
+        async for indice, prompt, respuesta in job.iter_results():
+            yield json.dumps({"index": indice, "prompt": prompt, "response": respuesta}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lineas(), media_type="application/x-ndjson")
+
+@router.get("/chat/cache", summary="Estadísticas de la caché de respuestas de /chat")
+async def chat_cache_stats():
+    return response_cache.stats()
+
+@router.get("/chat/sessions", summary="Estadísticas de las sesiones de chat activas")
+async def chat_sessions_stats():
+    return chat_sessions.stats()
+
+@router.delete("/chat/sessions/{session_id}", summary="Terminar una sesión de chat y liberar su caché")
+async def delete_chat_session(session_id: str):
+    if not chat_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"La sesión {session_id} no existe.")
+    return {"status": "deleted", "session_id": session_id}
+
+@router.post("/chat/stream", summary="Chatear con un modelo ajustado recibiendo los tokens a medida que se generan")
+async def chat_stream(request: Request, model_name: str, message: str):
+    """
+    Variante de /chat que emite server-sent events: un evento `token` por fragmento generado
+    y un evento `done` al terminar. Si el cliente se desconecta, la generación se detiene.
+    """
+    ticket = None
+    try:
+        config = training_pipeline.config
+        model_dir = config.model.finetuned_model_dir
+        model_path = os.path.join(model_dir, model_name) if model_name else model_catalog.latest_path()
+        # La plaza se conserva hasta que termina el stream
+        ticket = await scheduler.acquire(model_path, "interactive")
+        server = await inference_pool.run(ModelServer, model_path, get_load_mode(config.deployment, model_path))
+        cancelado = threading.Event()
+        # La tokenización también sale del bucle de eventos; la generación se encola en el pool
+        fragmentos = await inference_pool.run(
+            server.predict_stream, message, cancelado=cancelado, executor=inference_pool
+        )
+    except AdmissionRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except InferenceQueueFullError as e:
+        if ticket is not None:
+            scheduler.release(ticket)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
+        if ticket is not None:
+            scheduler.release(ticket)
         raise HTTPException(status_code=500, detail=str(e))
 
+    async def liberar():
+        # Idempotente: se llama al terminar el generador y, en todo caso, como tarea de fondo
+        # de la respuesta, que se ejecuta aunque el cliente se desconecte antes de empezar el stream
+        cancelado.set()
+        scheduler.release(ticket)
+
+    return StreamingResponse(
+        sse_events(fragmentos, request.is_disconnected, {"model": model_name}, liberar),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+        background=BackgroundTask(liberar),
+    )
+
 @router.get("/models", summary="Listar todos los modelos ajustados disponibles")
-async def list_models():
+async def list_models(
+    offset: int = 0,
+    limit: Optional[int] = None,
+    sort_by: str = "created",
+    order: str = "desc",
+    name_contains: Optional[str] = None,
+    metric: Optional[str] = None,
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None,
+):
+    """
+    Lista los modelos del catálogo en memoria. `sort_by` admite "name", "created", "modified"
+    o el nombre de una métrica de entrenamiento; `metric` con `min_value`/`max_value` filtra
+    por el valor de esa métrica.
+    """
+    if offset < 0 or (limit is not None and limit < 0):
+        raise HTTPException(status_code=400, detail="offset y limit no pueden ser negativos.")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order debe ser 'asc' o 'desc'.")
     try:
-        config = yaml.safe_load(open('config/config.yaml'))
-        model_dir = config['model']['finetuned_model_dir']
-        if not os.path.exists(model_dir):
-            return {"models": []}
-            
-        models = [d for d in os.listdir(model_dir) if os.path.isdir(os.path.join(model_dir, d))]
-        model_details = []
-        
-        for model in models:
-            model_path = os.path.join(model_dir, model)
-            created_time = os.path.getctime(model_path)
-            metrics_file = os.path.join(model_path, "training_metrics.json")
-            metrics = {}
-            if os.path.exists(metrics_file):
-                with open(metrics_file, "r") as f:
-                    metrics = json.load(f)
-                    
-            model_details.append({
-                "name": model,
-                "created": created_time,
-                "metrics": metrics
-            })
-            
-        return {"models": model_details}
+        page = model_catalog.list(
+            offset=offset,
+            limit=limit,
+            sort_by=sort_by,
+            descending=order == "desc",
+            name_contains=name_contains,
+            metric=metric,
+            min_value=min_value,
+            max_value=max_value,
+        )
+        return {**page, "offset": offset, "limit": limit}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+@router.get("/models/cache", summary="Estadísticas de la caché de modelos en memoria")
+async def model_cache_stats():
+    return {**ModelServer.registry.stats(), "adapters": adapter_stats()}
+
+@router.get("/inference/status", summary="Estado de la cola y los workers de inferencia")
+async def inference_status():
+    status = inference_pool.stats()
+    status["sharding"] = model_router.stats() if model_router is not None else None
+    # En modo sharding la decodificación especulativa ocurre en los workers y no se refleja aquí
+    status["speculative"] = ModelServer.speculative_stats.stats()
+    return status
+
+@router.get("/metrics", summary="Métricas de inferencia en formato de texto de Prometheus", response_class=PlainTextResponse)
+async def metrics():
+    # En modo sharding las etapas de inferencia se miden en los procesos worker y no se exportan aquí
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/scheduler/status", summary="Estado del control de admisión: plazas, colas y rechazos por clase")
+async def scheduler_status():
+    return scheduler.stats()
+
 @router.get("/training/status/{task_id}", summary="Obtener el estado del entrenamiento")
 async def training_status(task_id: str):
     # Implementar un método para verificar el estado del entrenamiento usando task_id
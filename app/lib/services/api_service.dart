@@ -57,6 +57,49 @@ class ApiService {
     }
   }
 
+  // Streams the model's reply token by token from /chat/stream (server-sent events).
+  // Cancelling the stream subscription closes the connection, which stops generation on the server.
+  Stream<String> chatStream({
+    required String modelName,
+    required String message,
+  }) async* {
+    var uri = Uri.parse('$baseUrl/chat/stream').replace(queryParameters: {
+      'model_name': modelName,
+      'message': message,
+    });
+    var client = http.Client();
+    try {
+      var request = http.Request('POST', uri);
+      request.headers['Accept'] = 'text/event-stream';
+      var streamedResponse = await client.send(request);
+
+      if (streamedResponse.statusCode != 200) {
+        var body = await streamedResponse.stream.bytesToString();
+        throw Exception('Failed to chat: $body');
+      }
+
+      String event = 'message';
+      await for (var line in streamedResponse.stream
+          .transform(utf8.decoder)
+          .transform(const LineSplitter())) {
+        if (line.startsWith('event:')) {
+          event = line.substring(6).trim();
+        } else if (line.startsWith('data:')) {
+          var data = json.decode(line.substring(5).trim());
+          if (event == 'token') {
+            yield data['token'] as String;
+          } else if (event == 'error') {
+            throw Exception('Error during chat: ${data['detail']}');
+          } else if (event == 'done') {
+            return;
+          }
+        }
+      }
+    } finally {
+      client.close();
+    }
+  }
+
   // Endpoint to list chatbots (if managed via backend)
   // Implement additional API methods as needed
 }
@@ -0,0 +1,333 @@
+"""
+Load test and latency benchmark for the FastAPI app.
+
+Boots the API with uvicorn in a subprocess, serving a tiny randomly-initialized
+Llama-style causal LM (with its own byte-level BPE tokenizer, so no download
+is needed), and drives the endpoints with configurable concurrency and
+arrival patterns:
+
+    chat          POST /chat                 one prompt per request
+    stream        POST /chat/stream          also measures time to first token
+    models        GET  /models
+    batch_upload  POST /chat/batch/upload    a small JSONL file per request
+
+Arrival patterns:
+
+    closed   --concurrency clients, each sends its next request when the previous one finishes
+    poisson  open loop, exponential inter-arrival times at --rate requests/s
+    burst    --concurrency requests at once every --burst-interval seconds
+
+For every scenario it reports throughput, p50/p95/p99 latency, errors by
+status code and, for `stream`, time to first token. Results are saved as JSON;
+`--compare` checks them against a previous run and exits with status 1 when
+p95 latency or throughput regress by more than `--regression-threshold`.
+
+Usage:
+    python -m benchmarks.api_load --output test_results/api_load.json
+    python -m benchmarks.api_load --scenarios chat stream --arrival poisson --rate 20 --requests 200
+    python -m benchmarks.api_load --compare test_results/api_load.json --output test_results/api_load_new.json
+    python -m benchmarks.api_load --url http://127.0.0.1:8000 --model-name my_model   # existing server
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import yaml
+
+# Add the project root to the Python path
+project_root = str(Path(__file__).resolve().parent.parent)
+sys.path.insert(0, project_root)
+
+SCENARIOS = ("chat", "stream", "models", "batch_upload")
+ARRIVALS = ("closed", "poisson", "burst")
+BENCH_MODEL = "bench_model"
+
+CORPUS = [
+    "Instrucción: ¿Cómo puedo restablecer mi contraseña?\nRespuesta: Haz clic en 'Olvidé mi contraseña'.",
+    "Instrucción: ¿Cuál es la política de reembolso?\nRespuesta: Puedes devolver productos en 30 días.",
+    "Instrucción: ¿Qué debo hacer si la aplicación se cierra?\nRespuesta: Actualiza la aplicación y reinicia.",
+    "Instrucción: ¿Cuánto tarda el soporte técnico?\nRespuesta: Respondemos en menos de 24 horas.",
+]
+
+
+def make_tiny_model(path, vocab_size=512, hidden_size=64, num_layers=2, max_positions=1024, seed=0):
+    """Save a tiny random Llama-style causal LM and its tokenizer (safetensors) under `path`."""
+    import torch
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    tokenizer.train_from_iterator(CORPUS * 8, trainers.BpeTrainer(
+        vocab_size=vocab_size,
+        special_tokens=["<s>", "</s>"],
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet(),
+    ))
+    fast = PreTrainedTokenizerFast(tokenizer_object=tokenizer, bos_token="<s>", eos_token="</s>", pad_token="</s>")
+
+    torch.manual_seed(seed)
+    config = LlamaConfig(
+        vocab_size=len(fast),
+        hidden_size=hidden_size,
+        intermediate_size=hidden_size * 2,
+        num_hidden_layers=num_layers,
+        num_attention_heads=2,
+        num_key_value_heads=2,
+        max_position_embeddings=max_positions,
+        bos_token_id=fast.bos_token_id,
+        eos_token_id=fast.eos_token_id,
+        pad_token_id=fast.pad_token_id,
+    )
+    model = LlamaForCausalLM(config)
+    os.makedirs(path, exist_ok=True)
+    model.save_pretrained(path, safe_serialization=True)
+    fast.save_pretrained(path)
+    return path
+
+
+def write_bench_config(workdir, model_dir, response_cache):
+    """Project config with the model directory pointed at the benchmark model and preload enabled."""
+    with open(os.path.join(project_root, "config", "config.yaml"), encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config["model"]["finetuned_model_dir"] = model_dir
+    deployment = config.setdefault("deployment", {})
+    deployment["preload"] = {**(deployment.get("preload") or {}), "models": [BENCH_MODEL], "latest": 0}
+    deployment["sharding"] = {**(deployment.get("sharding") or {}), "enabled": False}
+    deployment["response_cache"] = {**(deployment.get("response_cache") or {}), "enabled": response_cache}
+    os.makedirs(os.path.join(workdir, "config"), exist_ok=True)
+    with open(os.path.join(workdir, "config", "config.yaml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir, port, timeout):
+    """Start uvicorn in `workdir` (so it reads the benchmark config) and wait until /health/ready."""
+    log = open(os.path.join(workdir, "server.log"), "w")
+    env = {**os.environ, "PYTHONPATH": project_root + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The server exited early; see {log.name}")
+        try:
+            if httpx.get(f"{url}/health/ready", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError(f"The server was not ready after {timeout}s; see {log.name}")
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    # q * n / 100 is exact for integer q; q / 100 * n can overshoot (7 / 100 * 100 > 7)
+    return ordered[max(0, math.ceil(q * len(ordered) / 100) - 1)]
+
+
+def prompt_for(i, unique):
+    base = random.Random(i).choice(CORPUS).split("\nRespuesta:")[0]
+    # Distinct prompts so the response cache does not answer from memory
+    return f"{base} ({i})" if unique else base
+
+
+async def send(client, scenario, i, args):
+    """Send one request; returns (status, latency_s, ttft_s or None)."""
+    start = time.perf_counter()
+    ttft = None
+    if scenario == "chat":
+        response = await client.post("/chat", params={"model_name": args.model_name, "message": prompt_for(i, args.unique_prompts)})
+        status = response.status_code
+    elif scenario == "stream":
+        params = {"model_name": args.model_name, "message": prompt_for(i, args.unique_prompts)}
+        async with client.stream("POST", "/chat/stream", params=params) as response:
+            status = response.status_code
+            async for line in response.aiter_lines():
+                if ttft is None and line.startswith("event: token"):
+                    ttft = time.perf_counter() - start
+                if line.startswith("event: error"):
+                    status = 599
+    elif scenario == "models":
+        response = await client.get("/models")
+        status = response.status_code
+    else:
+        lines = "\n".join(json.dumps({"prompt": prompt_for(i * 100 + j, args.unique_prompts)}, ensure_ascii=False) for j in range(args.batch_size))
+        response = await client.post(
+            "/chat/batch/upload",
+            data={"model_name": args.model_name, "max_length": str(args.batch_max_length)},
+            files={"file": ("prompts.jsonl", lines.encode("utf-8"), "application/jsonl")},
+        )
+        status = response.status_code
+    return status, time.perf_counter() - start, ttft
+
+
+async def run_scenario(url, scenario, args):
+    samples = []
+
+    async def one(client, i):
+        try:
+            samples.append(await send(client, scenario, i, args))
+        except httpx.HTTPError as e:
+            samples.append((type(e).__name__, None, None))
+
+    limits = httpx.Limits(max_connections=max(args.concurrency, 1) * 4)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        if args.arrival == "closed":
+            counter = iter(range(args.requests))
+
+            async def worker():
+                for i in counter:
+                    await one(client, i)
+
+            await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+        else:
+            tasks = []
+            rng = random.Random(args.seed)
+            for i in range(args.requests):
+                tasks.append(asyncio.create_task(one(client, i)))
+                if args.arrival == "poisson":
+                    await asyncio.sleep(rng.expovariate(args.rate))
+                elif (i + 1) % args.concurrency == 0:
+                    await asyncio.sleep(args.burst_interval)
+            await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    ok = [s for s in samples if s[0] == 200]
+    latencies = [s[1] for s in ok]
+    ttfts = [s[2] for s in ok if s[2] is not None]
+    errors = {}
+    for status, _, _ in samples:
+        if status != 200:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+    result = {
+        "requests": len(samples),
+        "succeeded": len(ok),
+        "errors": errors,
+        "duration_s": elapsed,
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            f"p{q}": 1000 * percentile(latencies, q) if latencies else None for q in (50, 95, 99)
+        },
+    }
+    result["latency_ms"]["mean"] = 1000 * sum(latencies) / len(latencies) if latencies else None
+    if scenario == "stream":
+        result["ttft_ms"] = {f"p{q}": 1000 * percentile(ttfts, q) if ttfts else None for q in (50, 95, 99)}
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Print the change against a previous run; return the list of regressions."""
+    regressions = []
+    for scenario, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if not previous:
+            continue
+        old_p95, new_p95 = previous["latency_ms"]["p95"], current["latency_ms"]["p95"]
+        old_rps, new_rps = previous["throughput_rps"], current["throughput_rps"]
+        print(f"{scenario}: p95 {old_p95} -> {new_p95} ms, throughput {old_rps:.2f} -> {new_rps:.2f} req/s")
+        if old_p95 and new_p95 and new_p95 > old_p95 * (1 + threshold):
+            regressions.append(f"{scenario}: p95 latency {old_p95:.1f} -> {new_p95:.1f} ms")
+        if old_rps and new_rps < old_rps * (1 - threshold):
+            regressions.append(f"{scenario}: throughput {old_rps:.2f} -> {new_rps:.2f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API with a tiny local model.")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--arrival", default="closed", choices=ARRIVALS)
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients (closed) or burst size (burst).")
+    parser.add_argument("--rate", type=float, default=10.0, help="Requests per second for poisson arrivals.")
+    parser.add_argument("--burst-interval", type=float, default=1.0)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario.")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per scenario before measuring.")
+    parser.add_argument("--batch-size", type=int, default=8, help="Prompts per batch_upload request.")
+    parser.add_argument("--batch-max-length", type=int, default=64)
+    parser.add_argument("--unique-prompts", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--response-cache", action="store_true", help="Keep the /chat response cache enabled.")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="Benchmark an already running server instead of booting one.")
+    parser.add_argument("--model-name", default=BENCH_MODEL)
+    parser.add_argument("--output", help="Optional JSON file for the results.")
+    parser.add_argument("--compare", help="Previous results JSON to check for regressions.")
+    parser.add_argument("--regression-threshold", type=float, default=0.10)
+    parser.add_argument("--keep-workdir", action="store_true")
+    args = parser.parse_args()
+
+    workdir = process = None
+    try:
+        if args.url:
+            url = args.url
+        else:
+            workdir = tempfile.mkdtemp(prefix="softia_bench_")
+            model_dir = os.path.join(workdir, "models")
+            make_tiny_model(os.path.join(model_dir, BENCH_MODEL))
+            write_bench_config(workdir, model_dir, args.response_cache)
+            process, url = start_server(workdir, free_port(), args.startup_timeout)
+
+        results = {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "url")},
+            "scenarios": {},
+        }
+        for scenario in args.scenarios:
+            if args.warmup:
+                warmup_args = argparse.Namespace(**{**vars(args), "requests": args.warmup, "arrival": "closed"})
+                asyncio.run(run_scenario(url, scenario, warmup_args))
+            results["scenarios"][scenario] = asyncio.run(run_scenario(url, scenario, args))
+            print(f"{scenario}: {json.dumps(results['scenarios'][scenario])}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        if workdir and not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+        elif workdir:
+            print(f"Working directory kept at: {workdir}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.regression_threshold)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark of ModelServer load modes (fp32 / bf16 / int8) on CPU.
+
+For every mode it reports load time, weight footprint, process RSS growth and
+decode throughput, plus how far the outputs drift from the fp32 reference:
+greedy output match rate, top-1 next-token agreement and mean KL divergence,
+both measured teacher-forced on the fp32 generations.
+
+Usage:
+    python -m benchmarks.load_modes --model ./models/finetuned_models/finetuned_demo
+    python -m benchmarks.load_modes --model <path> --modes fp32 int8 --output test_results/load_modes.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import torch
+import torch.nn.functional as F
+
+# Add the project root to the Python path
+project_root = str(Path(__file__).resolve().parent.parent)
+sys.path.insert(0, project_root)
+
+from deployment.registry import model_size_bytes
+from deployment.serve_model import LOAD_MODES, ModelServer
+
+DEFAULT_PROMPTS = [
+    "Instrucción: ¿Cómo puedo restablecer mi contraseña?\nRespuesta:",
+    "Instrucción: ¿Cuál es la política de reembolso?\nRespuesta:",
+    "Instrucción: ¿Qué debo hacer si la aplicación se cierra inesperadamente?\nRespuesta:",
+    "Instrucción: ¿Cuánto tarda el soporte técnico en responder?\nRespuesta:",
+]
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def generate(model, tokenizer, prompts, max_new_tokens):
+    """Greedy generation; returns full sequences, prompt lengths and decode tokens/sec."""
+    sequences, prompt_lengths = [], []
+    new_tokens = 0
+    elapsed = 0.0
+    for prompt in prompts:
+        inputs = tokenizer(prompt, return_tensors="pt")
+        start = time.perf_counter()
+        with torch.no_grad():
+            output = model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id or tokenizer.eos_token_id,
+            )
+        elapsed += time.perf_counter() - start
+        sequences.append(output[0])
+        prompt_lengths.append(inputs["input_ids"].shape[-1])
+        new_tokens += output.shape[-1] - inputs["input_ids"].shape[-1]
+    return sequences, prompt_lengths, new_tokens / elapsed if elapsed else 0.0
+
+
+def next_token_logprobs(model, sequences, prompt_lengths):
+    """Teacher-forced log-probabilities over the generated positions of each sequence."""
+    result = []
+    for sequence, prompt_length in zip(sequences, prompt_lengths):
+        with torch.no_grad():
+            logits = model(sequence.unsqueeze(0)).logits[0, prompt_length - 1:-1]
+        result.append(F.log_softmax(logits.float(), dim=-1))
+    return result
+
+
+def drift(reference, candidate):
+    """Top-1 agreement and mean KL(reference || candidate) across all generated positions."""
+    agree, positions, kl = 0, 0, 0.0
+    for ref, cand in zip(reference, candidate):
+        agree += (ref.argmax(-1) == cand.argmax(-1)).sum().item()
+        positions += ref.shape[0]
+        kl += F.kl_div(cand, ref, log_target=True, reduction="sum").item()
+    return {
+        "top1_agreement": agree / positions if positions else 1.0,
+        "mean_kl": kl / positions if positions else 0.0,
+    }
+
+
+def benchmark(model_path, modes, prompts, max_new_tokens):
+    results = {"model": model_path, "max_new_tokens": max_new_tokens, "modes": {}}
+    reference = None
+
+    for mode in ["fp32"] + [m for m in modes if m != "fp32"]:
+        gc.collect()
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        model, tokenizer = ModelServer._cargar(model_path, load_mode=mode)
+        load_time = time.perf_counter() - start
+
+        sequences, prompt_lengths, tokens_per_second = generate(model, tokenizer, prompts, max_new_tokens)
+        entry = {
+            "load_time_s": load_time,
+            "weights_bytes": model_size_bytes(model),
+            "rss_growth_bytes": rss_bytes() - rss_before,
+            "tokens_per_second": tokens_per_second,
+        }
+
+        if reference is None:
+            reference = {
+                "sequences": sequences,
+                "prompt_lengths": prompt_lengths,
+                "logprobs": next_token_logprobs(model, sequences, prompt_lengths),
+            }
+        else:
+            matches = sum(torch.equal(a, b) for a, b in zip(reference["sequences"], sequences))
+            entry["output_match_rate"] = matches / len(sequences)
+            entry.update(drift(
+                reference["logprobs"],
+                next_token_logprobs(model, reference["sequences"], reference["prompt_lengths"]),
+            ))
+
+        if mode in modes:
+            results["modes"][mode] = entry
+            print(f"{mode}: {json.dumps(entry)}")
+
+        del model, tokenizer
+        gc.collect()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ModelServer load modes on CPU.")
+    parser.add_argument("--model", required=True, help="Path to a fine-tuned model directory.")
+    parser.add_argument("--modes", nargs="+", default=list(LOAD_MODES), choices=LOAD_MODES)
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--prompts-file", help="Optional file with one prompt per line.")
+    parser.add_argument("--output", help="Optional JSON file for the results.")
+    args = parser.parse_args()
+
+    prompts = DEFAULT_PROMPTS
+    if args.prompts_file:
+        with open(args.prompts_file, encoding="utf-8") as f:
+            prompts = [line.strip() for line in f if line.strip()]
+
+    results = benchmark(args.model, args.modes, prompts, args.max_new_tokens)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
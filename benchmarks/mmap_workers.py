@@ -0,0 +1,115 @@
+"""
+Benchmark of model loading across serving worker processes: from_pretrained vs. mmap.
+
+For 1, 2 and 4 worker processes it loads the same model in every worker at
+the same time and reports per-worker load time plus aggregate memory:
+RSS (shared pages counted once per process) and PSS (shared pages split
+between the processes that map them). With mmap loading, PSS per extra
+worker should stay small because the weights live in the page cache.
+
+Usage:
+    python -m benchmarks.mmap_workers --model ./models/finetuned_models/finetuned_demo
+    python -m benchmarks.mmap_workers --model <path> --workers 1 2 4 --output test_results/mmap_workers.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = str(Path(__file__).resolve().parent.parent)
+sys.path.insert(0, project_root)
+
+METHODS = ("from_pretrained", "mmap")
+
+
+def memory_of(pid):
+    """RSS and PSS in bytes for a process, from /proc (Linux only)."""
+    rss = pss = 0
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Rss:"):
+                    rss = int(line.split()[1]) * 1024
+                elif line.startswith("Pss:"):
+                    pss = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return rss, pss
+
+
+def worker(model_path, method, loaded, release, results):
+    import torch
+    from transformers import AutoModelForCausalLM
+    from deployment.mmap_loader import load_model_mmap
+
+    torch.set_num_threads(1)
+    start = time.perf_counter()
+    if method == "mmap":
+        model = load_model_mmap(model_path)
+    else:
+        model = AutoModelForCausalLM.from_pretrained(model_path, torch_dtype=torch.float32)
+    # Touch every weight once, as the first forward pass would
+    checksum = sum(float(p.detach().float().sum()) for p in model.parameters())
+    results.put((os.getpid(), time.perf_counter() - start, checksum))
+    loaded.release()
+    release.wait()
+
+
+def run(model_path, method, num_workers):
+    ctx = multiprocessing.get_context("spawn")
+    loaded = ctx.Semaphore(0)
+    release = ctx.Event()
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(model_path, method, loaded, release, results)) for _ in range(num_workers)]
+    for p in processes:
+        p.start()
+    for _ in processes:
+        loaded.acquire()
+
+    load_times = []
+    for _ in processes:
+        _, load_time, _ = results.get()
+        load_times.append(load_time)
+    memory = [memory_of(p.pid) for p in processes]
+
+    release.set()
+    for p in processes:
+        p.join()
+
+    return {
+        "workers": num_workers,
+        "method": method,
+        "load_time_s": {"max": max(load_times), "avg": sum(load_times) / len(load_times)},
+        "aggregate_rss_bytes": sum(rss for rss, _ in memory),
+        "aggregate_pss_bytes": sum(pss for _, pss in memory),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare from_pretrained and mmap loading across worker processes.")
+    parser.add_argument("--model", required=True, help="Path to a fine-tuned model saved as safetensors.")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=METHODS)
+    parser.add_argument("--output", help="Optional JSON file for the results.")
+    args = parser.parse_args()
+
+    results = []
+    for method in args.methods:
+        for num_workers in args.workers:
+            entry = run(args.model, method, num_workers)
+            print(json.dumps(entry))
+            results.append(entry)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "runs": results}, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
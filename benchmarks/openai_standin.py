@@ -0,0 +1,303 @@
+"""
+Offline OpenAI-compatible stand-in for the data-generation API.
+
+Serves `POST /v1/chat/completions` with the two response shapes the pipeline uses:
+
+    instruct  a JSON array of {"entrada", "salida"} samples, as many as the prompt
+              asks for ("... conjunto de datos con N muestras"), plain or streamed (SSE)
+    reward    any model whose name contains "reward": `logprobs.content` with one
+              token per metric (helpfulness, correctness, ...), the shape
+              `score_qa_pair` parses
+
+Latency, error rate and output size are configurable, and `GET /stats` reports
+request counts and the peak number of concurrent requests per kind. Everything
+is deterministic for a given seed and prompt, so results are reproducible.
+
+Usage:
+    python -m benchmarks.openai_standin --port 8001 --latency-ms 200 --error-rate 0.05
+    # then point api.base_url in config/config.yaml at http://127.0.0.1:8001/v1
+
+From Python:
+    with StandInServer(StandInConfig(latency_ms=50)) as server:
+        print(server.base_url, server.stats())
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+METRICS = ("helpfulness", "correctness", "coherence", "complexity", "verbosity")
+WORDS = (
+    "cuenta contraseña pedido envío factura reembolso producto garantía soporte aplicación "
+    "pago tarjeta suscripción plan usuario correo acceso configuración error actualización "
+    "dispositivo datos seguridad privacidad devolución plazo cliente servicio tienda precio"
+).split()
+_NUM_SAMPLES = re.compile(r"conjunto de datos con (\d+) muestras")
+
+
+@dataclass
+class StandInConfig:
+    latency_ms: float = 100.0
+    latency_jitter: float = 0.2
+    stream_chunk_chars: int = 16
+    stream_chunk_delay_ms: float = 2.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    default_samples: int = 10
+    question_words: int = 10
+    answer_words: int = 40
+    seed: int = 0
+
+
+class StandInState:
+    """Request counters and in-flight tracking, shared by the handler threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {"instruct": 0, "reward": 0}
+        self.errors: Dict[str, int] = {"instruct": 0, "reward": 0}
+        self.in_flight: Dict[str, int] = {"instruct": 0, "reward": 0}
+        self.max_in_flight: Dict[str, int] = {"instruct": 0, "reward": 0, "total": 0}
+
+    def enter(self, kind: str) -> None:
+        with self.lock:
+            self.requests[kind] += 1
+            self.in_flight[kind] += 1
+            self.max_in_flight[kind] = max(self.max_in_flight[kind], self.in_flight[kind])
+            self.max_in_flight["total"] = max(self.max_in_flight["total"], sum(self.in_flight.values()))
+
+    def leave(self, kind: str) -> None:
+        with self.lock:
+            self.in_flight[kind] -= 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "errors": dict(self.errors),
+                "in_flight": dict(self.in_flight),
+                "max_in_flight": dict(self.max_in_flight),
+            }
+
+
+def _rng(config: StandInConfig, request: dict) -> random.Random:
+    digest = hashlib.sha256(json.dumps(request, sort_keys=True, ensure_ascii=False).encode("utf-8")).digest()
+    return random.Random(config.seed * 1_000_003 + int.from_bytes(digest[:8], "big"))
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def instruct_content(config: StandInConfig, request: dict, rng: random.Random) -> str:
+    prompt = request.get("messages", [{}])[-1].get("content", "")
+    match = _NUM_SAMPLES.search(prompt)
+    n = int(match.group(1)) if match else config.default_samples
+    samples = [
+        {
+            "entrada": "¿" + _sentence(rng, config.question_words).capitalize() + "?",
+            "salida": _sentence(rng, config.answer_words).capitalize() + ".",
+        }
+        for _ in range(n)
+    ]
+    return "```json\n" + json.dumps(samples, ensure_ascii=False, indent=2) + "\n```"
+
+
+def reward_logprobs(rng: random.Random) -> List[dict]:
+    content = []
+    for metric in METRICS:
+        value = round(rng.uniform(0.0, 4.5), 4)
+        content.append({"token": metric, "logprob": value, "bytes": list(metric.encode()), "top_logprobs": []})
+    return content
+
+
+def _usage(request: dict, content: str) -> dict:
+    prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in request.get("messages", []))
+    completion_tokens = len(content.split())
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+def make_handler(config: StandInConfig, state: StandInState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, body: dict, headers: Optional[dict] = None) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                self._send_json(200, {**state.snapshot(), "config": asdict(config)})
+            elif self.path.rstrip("/").endswith("/models"):
+                self._send_json(200, {"object": "list", "data": [
+                    {"id": "standin/instruct", "object": "model"},
+                    {"id": "standin/reward", "object": "model"},
+                ]})
+            else:
+                self._send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model = request.get("model") or ""
+            kind = "reward" if "reward" in model else "instruct"
+            state.enter(kind)
+            try:
+                self._complete(request, model, kind)
+            finally:
+                state.leave(kind)
+
+        def _complete(self, request: dict, model: str, kind: str) -> None:
+            rng = _rng(config, request)
+            # Latency and failures use their own generator so responses stay deterministic
+            noise = random.Random()
+            time.sleep(max(0.0, config.latency_ms * (1 + noise.uniform(-config.latency_jitter, config.latency_jitter))) / 1000)
+            if noise.random() < config.error_rate:
+                with state.lock:
+                    state.errors[kind] += 1
+                self._send_json(config.error_status, {"error": {"message": "stand-in injected error", "type": "server_error"}},
+                                headers={"Retry-After": "0"})
+                return
+
+            created = int(time.time())
+            if kind == "reward":
+                choice = {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": ""},
+                    "logprobs": {"content": reward_logprobs(rng)},
+                }
+                self._send_json(200, {
+                    "id": f"standin-{rng.getrandbits(32):08x}", "object": "chat.completion", "created": created,
+                    "model": model, "choices": [choice], "usage": _usage(request, ""),
+                })
+                return
+
+            content = instruct_content(config, request, rng)
+            if not request.get("stream"):
+                self._send_json(200, {
+                    "id": f"standin-{rng.getrandbits(32):08x}", "object": "chat.completion", "created": created,
+                    "model": model, "usage": _usage(request, content),
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                })
+                return
+            self._stream(request, model, created, content)
+
+        def _stream(self, request: dict, model: str, created: int, content: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            def event(choices: list, usage: Optional[dict] = None) -> None:
+                chunk = {"id": "standin-stream", "object": "chat.completion.chunk", "created": created, "model": model, "choices": choices}
+                if usage is not None:
+                    chunk["usage"] = usage
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            step = max(1, config.stream_chunk_chars)
+            for i in range(0, len(content), step):
+                event([{"index": 0, "delta": {"content": content[i:i + step]}, "finish_reason": None}])
+                if config.stream_chunk_delay_ms:
+                    time.sleep(config.stream_chunk_delay_ms / 1000)
+            event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if (request.get("stream_options") or {}).get("include_usage"):
+                event([], usage=_usage(request, content))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+class StandInServer:
+    """The stand-in running in a background thread; usable as a context manager."""
+
+    def __init__(self, config: Optional[StandInConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StandInConfig()
+        self.state = StandInState()
+        self._server = ThreadingHTTPServer((host, port), make_handler(self.config, self.state))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="openai-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict:
+        return self.state.snapshot()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = StandInConfig()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Mean time to first byte.")
+    parser.add_argument("--latency-jitter", type=float, default=defaults.latency_jitter, help="Relative +/- jitter on the latency.")
+    parser.add_argument("--stream-chunk-chars", type=int, default=defaults.stream_chunk_chars)
+    parser.add_argument("--stream-chunk-delay-ms", type=float, default=defaults.stream_chunk_delay_ms)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of requests that fail.")
+    parser.add_argument("--error-status", type=int, default=defaults.error_status)
+    parser.add_argument("--default-samples", type=int, default=defaults.default_samples,
+                        help="Samples per instruct response when the prompt does not say.")
+    parser.add_argument("--question-words", type=int, default=defaults.question_words)
+    parser.add_argument("--answer-words", type=int, default=defaults.answer_words)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from_args(args: argparse.Namespace) -> StandInConfig:
+    return StandInConfig(**{field: getattr(args, field) for field in asdict(StandInConfig())})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = StandInServer(config_from_args(args), args.host, args.port)
+    print(f"OpenAI stand-in listening on {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
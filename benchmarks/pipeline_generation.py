@@ -0,0 +1,144 @@
+"""
+End-to-end benchmark of the data-generation stage against the offline OpenAI stand-in.
+
+Starts `benchmarks.openai_standin` in-process, writes a temporary config whose
+`api.base_url` points at it, and runs `generate_synthetic_data_async` — the
+generation, dedup and scoring stages that `TrainingPipeline.run` executes before
+training — with the project's real client, sharding, streaming and scoring code.
+
+It reports wall time, samples/sec, requests per kind, the peak number of
+concurrent requests the stand-in saw (instruct and reward), retries and failures.
+
+Usage:
+    python -m benchmarks.pipeline_generation --num-samples 200 --output test_results/pipeline_generation.json
+    python -m benchmarks.pipeline_generation --latency-ms 300 --error-rate 0.05 --shard-size 10 --generation-concurrency 8
+    python -m benchmarks.pipeline_generation --no-stream --scoring-concurrency 1   # serial baseline
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+# Add the project root to the Python path
+project_root = str(Path(__file__).resolve().parent.parent)
+sys.path.insert(0, project_root)
+
+from benchmarks.openai_standin import StandInServer, add_config_arguments, config_from_args
+
+
+def write_config(workdir, base_url, args):
+    """Project config with the API pointed at the stand-in and the generation settings from `args`."""
+    with open(os.path.join(project_root, "config", "config.yaml"), encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config["api"] = {
+        **config.get("api", {}),
+        "api_key": "standin",
+        "base_url": base_url,
+        "instruct_model": "standin/instruct",
+        "client": {
+            **(config.get("api", {}).get("client") or {}),
+            "requests_per_minute": args.requests_per_minute,
+            "backoff_base_seconds": 0.05,
+        },
+    }
+    data_generation = config.setdefault("data_generation", {})
+    data_generation["generation"] = {
+        "shard_size": args.shard_size,
+        "max_concurrency": args.generation_concurrency,
+        "max_rounds": args.max_rounds,
+        "stream": args.stream,
+    }
+    data_generation["scoring"] = {"max_concurrency": args.scoring_concurrency}
+    data_generation["dedup"] = {**(data_generation.get("dedup") or {}), "enabled": args.dedup}
+    data_generation["cache"] = {
+        **(data_generation.get("cache") or {}),
+        "enabled": args.cache,
+        "path": os.path.join(workdir, "llm_cache.sqlite"),
+    }
+    os.makedirs(os.path.join(workdir, "config"), exist_ok=True)
+    with open(os.path.join(workdir, "config", "config.yaml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+
+
+def run_once(args):
+    # Imported here so the modules read the benchmark config from the working directory
+    from data_generation.data_generator import generate_synthetic_data_async
+    from data_generation.llm_client import get_llm_client, run_sync
+
+    client = get_llm_client()
+    before = dict(client.stats())
+    start = time.perf_counter()
+    dataset = run_sync(generate_synthetic_data_async(args.use_case, num_samples=args.num_samples), client)
+    elapsed = time.perf_counter() - start
+    after = client.stats()
+    return {
+        "wall_time_s": elapsed,
+        "samples_returned": len(dataset),
+        "samples_per_second": len(dataset) / elapsed if elapsed else 0.0,
+        "requested_samples_per_second": args.num_samples / elapsed if elapsed else 0.0,
+        "client": {key: after[key] - before[key] for key in ("requests", "retries", "failures", "prompt_tokens", "completion_tokens")},
+        "cache": after.get("cache"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data generation and scoring against the OpenAI stand-in.")
+    parser.add_argument("--use-case", default="soporte técnico para productos de software")
+    parser.add_argument("--num-samples", type=int, default=100)
+    parser.add_argument("--shard-size", type=int, default=20)
+    parser.add_argument("--generation-concurrency", type=int, default=4)
+    parser.add_argument("--scoring-concurrency", type=int, default=8)
+    parser.add_argument("--max-rounds", type=int, default=1)
+    parser.add_argument("--stream", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--dedup", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--cache", action=argparse.BooleanOptionalAction, default=False,
+                        help="Enable the response cache (the second --repeats run then measures cache hits).")
+    parser.add_argument("--requests-per-minute", type=float, default=None)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--output", help="Optional JSON file for the results.")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="softia_pipeline_bench_")
+    cwd = os.getcwd()
+    try:
+        with StandInServer(config_from_args(args)) as server:
+            write_config(workdir, server.base_url, args)
+            os.chdir(workdir)
+            runs = []
+            for i in range(args.repeats):
+                result = run_once(args)
+                runs.append(result)
+                print(f"run {i + 1}: {result['samples_returned']} samples in {result['wall_time_s']:.2f}s "
+                      f"({result['samples_per_second']:.1f} samples/s), client {result['client']}")
+            stats = server.stats()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"stand-in: requests {stats['requests']}, errors {stats['errors']}, "
+          f"peak concurrency {stats['max_in_flight']}")
+    results = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "settings": {k: v for k, v in vars(args).items() if k != "output"},
+        "runs": runs,
+        "standin": stats,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
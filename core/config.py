@@ -0,0 +1,254 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional
+
+import yaml
+
+DEFAULT_CONFIG_PATH = 'config/config.yaml'
+
+# Campos numéricos que deben ser enteros positivos si aparecen, por sección de primer nivel
+_POSITIVE_INTS = {
+    "batching": ("max_batch_size",),
+    "inference_pool": ("num_workers", "max_queue_size"),
+    "response_cache": ("max_entries",),
+    "sharding": ("num_workers", "max_pending_per_worker"),
+    "batch": ("batch_size", "sync_limit", "max_prompts"),
+    "scheduler": ("max_concurrent", "max_per_model", "max_bulk", "max_training"),
+    "adapters": ("max_adapters",),
+}
+_POSITIVE_INTS_DATA_GENERATION = {
+    "scoring": ("max_concurrency",),
+    "generation": ("shard_size", "max_concurrency"),
+    "dedup": ("num_perm", "shingle_size"),
+}
+_POSITIVE_INTS_API = {
+    "client": ("burst",),
+}
+_LOAD_MODES = ("fp32", "bf16", "int8")
+
+class ConfigError(ValueError):
+    """
+    Se lanza cuando el archivo de configuración no existe, no es YAML válido o no supera la validación.
+    """
+
+@dataclass(frozen=True)
+class ApiSettings:
+    api_key: str
+    base_url: str
+    instruct_model: Optional[str] = None
+
+@dataclass(frozen=True)
+class ModelSettings:
+    base_model: str
+    finetuned_model_dir: str
+
+class AppConfig(Mapping):
+    """
+    Configuración validada de la aplicación.
+
+    Expone las secciones más usadas con tipos (`api`, `model`, `deployment`) y se comporta
+    además como el diccionario leído del YAML, de modo que `config['model']` y
+    `config.get('deployment', {})` siguen funcionando. No debe modificarse: es compartida.
+    """
+
+    def __init__(self, data: Dict[str, Any], path: str = DEFAULT_CONFIG_PATH, mtime: float = 0.0):
+        validate_config(data)
+        self._data = data
+        self.path = path
+        self.mtime = mtime
+        api = data.get('api') or {}
+        self.api = ApiSettings(
+            api_key=api.get('api_key', ''),
+            base_url=api.get('base_url', ''),
+            instruct_model=api.get('instruct_model'),
+        )
+        self.model = ModelSettings(
+            base_model=data['model'].get('base_model', ''),
+            finetuned_model_dir=data['model']['finetuned_model_dir'],
+        )
+        self.deployment: Dict[str, Any] = data.get('deployment') or {}
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def section(self, *keys: str) -> Dict[str, Any]:
+        """
+        Devuelve una subsección anidada, o un diccionario vacío si falta o está vacía.
+
+        Ejemplo: `config.section('deployment', 'batch')`.
+        """
+        actual: Any = self._data
+        for key in keys:
+            actual = (actual or {}).get(key) if isinstance(actual, Mapping) else None
+        return actual or {}
+
+def validate_config(data: Any) -> None:
+    """
+    Comprueba la estructura de la configuración.
+
+    Raises:
+        ConfigError: Con la lista de problemas encontrados.
+    """
+    if not isinstance(data, dict):
+        raise ConfigError("La configuración debe ser un diccionario YAML.")
+    errores: List[str] = []
+    model = data.get('model')
+    if not isinstance(model, dict) or not isinstance(model.get('finetuned_model_dir'), str):
+        errores.append("'model.finetuned_model_dir' es obligatorio y debe ser una ruta.")
+    for seccion in ('api', 'training', 'logging', 'finetuning', 'deployment', 'data_generation'):
+        if data.get(seccion) is not None and not isinstance(data[seccion], dict):
+            errores.append(f"'{seccion}' debe ser una sección (diccionario).")
+
+    _comprobar_enteros(data, 'api', _POSITIVE_INTS_API, errores)
+    _comprobar_enteros(data, 'data_generation', _POSITIVE_INTS_DATA_GENERATION, errores)
+    deployment = data.get('deployment') or {}
+    if isinstance(deployment, dict):
+        _comprobar_enteros(data, 'deployment', _POSITIVE_INTS, errores)
+        load_mode = deployment.get('load_mode') or {}
+        modos = [load_mode.get('default')] + list((load_mode.get('models') or {}).values()) if isinstance(load_mode, dict) else []
+        for modo in modos:
+            if modo is not None and modo not in _LOAD_MODES:
+                errores.append(f"Modo de carga no válido: {modo!r}. Opciones: {', '.join(_LOAD_MODES)}.")
+
+    if errores:
+        raise ConfigError("Configuración no válida: " + " ".join(errores))
+
+def _comprobar_enteros(data: dict, raiz: str, campos_por_seccion: Dict[str, tuple], errores: List[str]) -> None:
+    secciones = data.get(raiz) or {}
+    if not isinstance(secciones, dict):
+        return
+    for seccion, campos in campos_por_seccion.items():
+        valores = secciones.get(seccion) or {}
+        if not isinstance(valores, dict):
+            errores.append(f"'{raiz}.{seccion}' debe ser una sección (diccionario).")
+            continue
+        for campo in campos:
+            valor = valores.get(campo)
+            if valor is not None and (isinstance(valor, bool) or not isinstance(valor, int) or valor < 1):
+                errores.append(f"'{raiz}.{seccion}.{campo}' debe ser un entero positivo (recibido: {valor!r}).")
+
+def load_config(path: str = DEFAULT_CONFIG_PATH) -> AppConfig:
+    """
+    Lee y valida un archivo de configuración, sin caché. Usar `get_config` en el código de la aplicación.
+
+    Raises:
+        ConfigError: Si el archivo no existe, no es YAML válido o no supera la validación.
+    """
+    try:
+        mtime = os.stat(path).st_mtime
+        with open(path, 'r') as file:
+            data = yaml.safe_load(file)
+    except FileNotFoundError:
+        raise ConfigError(f"No se encontró el archivo de configuración: {path}")
+    except yaml.YAMLError as e:
+        raise ConfigError(f"El archivo de configuración {path} no es YAML válido: {str(e)}") from e
+    return AppConfig(data, path=path, mtime=mtime)
+
+class ConfigService:
+    """
+    Mantiene en memoria la configuración y la recarga sólo cuando cambia el archivo.
+
+    `get()` devuelve el objeto en caché; como mucho una vez cada `check_interval` segundos
+    comprueba el mtime del archivo (una llamada a `stat`, sin leerlo). Si cambió, lo vuelve a
+    leer, lo valida y notifica a los suscriptores. Una recarga no válida se registra y se
+    sigue usando la configuración anterior.
+    """
+
+    def __init__(self, path: str = DEFAULT_CONFIG_PATH, check_interval: float = 1.0):
+        """
+        Args:
+            path (str): Ruta del archivo YAML.
+            check_interval (float): Segundos mínimos entre comprobaciones del mtime.
+
+        Raises:
+            ConfigError: Si la configuración inicial no es válida.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._suscriptores: List[Callable[[AppConfig], None]] = []
+        self._config = load_config(path)
+        # mtime del archivo ya visto, válido o no; la configuración publicada no se modifica
+        self._mtime = self._config.mtime
+        self._ultima_comprobacion = time.monotonic()
+        self.reloads = 0
+
+    def get(self) -> AppConfig:
+        """
+        Devuelve la configuración actual, recargándola si el archivo cambió.
+        """
+        ahora = time.monotonic()
+        if ahora - self._ultima_comprobacion >= self.check_interval:
+            self._ultima_comprobacion = ahora
+            self.reload()
+        return self._config
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Vuelve a leer el archivo si su mtime cambió (o siempre, con `force`).
+
+        Returns:
+            bool: True si se cargó una configuración nueva.
+        """
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError as e:
+                self.logger.error(f"No se pudo comprobar {self.path}: {str(e)}")
+                return False
+            if not force and mtime == self._mtime:
+                return False
+            try:
+                nueva = load_config(self.path)
+            except ConfigError as e:
+                self.logger.error(f"Se mantiene la configuración anterior: {str(e)}")
+                # No se reintenta hasta que el archivo vuelva a cambiar
+                self._mtime = mtime
+                return False
+            self._config = nueva
+            self._mtime = nueva.mtime
+            self.reloads += 1
+            suscriptores = list(self._suscriptores)
+        self.logger.info(f"Configuración recargada desde {self.path}.")
+        for suscriptor in suscriptores:
+            try:
+                suscriptor(nueva)
+            except Exception as e:
+                self.logger.error(f"Un suscriptor de la configuración falló: {str(e)}")
+        return True
+
+    def subscribe(self, callback: Callable[[AppConfig], None]) -> None:
+        """
+        Registra una función que recibe la nueva configuración tras cada recarga.
+        """
+        with self._lock:
+            self._suscriptores.append(callback)
+
+_servicios: Dict[str, ConfigService] = {}
+_servicios_lock = threading.Lock()
+
+def config_service(path: str = DEFAULT_CONFIG_PATH) -> ConfigService:
+    """
+    Devuelve el servicio de configuración compartido para `path`, creándolo la primera vez.
+    """
+    clave = os.path.abspath(path)
+    with _servicios_lock:
+        if clave not in _servicios:
+            _servicios[clave] = ConfigService(path)
+        return _servicios[clave]
+
+def get_config(path: str = DEFAULT_CONFIG_PATH) -> AppConfig:
+    """
+    Devuelve la configuración actual del archivo `path`, cargada una vez y recargada si cambia.
+    """
+    return config_service(path).get()
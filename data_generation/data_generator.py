@@ -1,80 +1,54 @@
+import asyncio
 import json
-import re
-from openai import OpenAI
-from typing import List, Optional
-from .utils import load_config
+from typing import Callable, List, Optional
+from core.config import get_config
+from data_generation.dedup import NearDuplicateFilter
+from data_generation.json_stream import JsonObjectStreamParser, parse_json_objects
+from data_generation.llm_client import LLMClient, get_llm_client, run_sync
+from data_generation.scorer import DEFAULT_MAX_CONCURRENCY, IncrementalScorer
 
-def score_qa_pair(entrada: str, salida: str) -> dict:
-    """
-    Puntúa un par de preguntas y respuestas utilizando el modelo de recompensa Nemotron-4 340B.
+DEFAULT_SHARD_SIZE = 20
+DEFAULT_GENERATION_CONCURRENCY = 4
+DEFAULT_MAX_ROUNDS = 1
 
-    Args:
-    entrada (str): La pregunta/entrada del usuario.
-    salida (str): La respuesta del asistente.
+SYSTEM_PROMPT = "Eres un asistente de IA especializado en generar conjuntos de datos de alta calidad para tareas de aprendizaje automático. Devuelve únicamente JSON válido y bien formateado."
 
-    Devuelve:
-    dict: Un diccionario con las métricas de utilidad del modelo de recompensa.
-    """
-    config = load_config('config/config.yaml')
-    client = OpenAI(
-        api_key=config['api']['api_key'],
-        base_url=config['api']['base_url'],
-    )
-
-    messages = [
-        {"role": "user", "content": entrada},
-        {"role": "assistant", "content": salida}
-    ]
+# Enfoques que se reparten entre los lotes para que no generen todos las mismas preguntas
+ENFOQUES = (
+    "preguntas básicas y frecuentes de usuarios nuevos",
+    "resolución de problemas y errores",
+    "casos límite y situaciones poco habituales",
+    "preguntas detalladas de usuarios avanzados",
+    "políticas, condiciones y requisitos",
+    "comparaciones y recomendaciones",
+    "procedimientos paso a paso",
+    "quejas, reclamaciones y situaciones delicadas",
+)
 
-    try:
-        response = client.chat.completions.create(
-            model="nvidia/nemotron-4-340b-reward",
-            messages=messages
-        )
 
-        print(response)
-
-        metrics = {
-            "helpfulness": 0.0,
-            "correctness": 0.0,
-            "coherence": 0.0,
-            "complexity": 0.0,
-            "verbosity": 0.0
-        }
-
-        logprobs_content = response.choices[0].logprobs.content
-
-        for item in logprobs_content:
-            token = item.token.strip().lower()
-            logprob = item.logprob
-            if token == 'helpfulness':
-                metrics["helpfulness"] = logprob
-            elif token == 'correctness':
-                metrics["correctness"] = logprob
-            elif token == 'coherence':
-                metrics["coherence"] = logprob
-            elif token == 'complexity':
-                metrics["complexity"] = logprob
-            elif token == 'verbosity':
-                metrics["verbosity"] = logprob
-
-        return metrics
-    except Exception as e:
-        print(f"Error en el scoring: {e}")
-        return {
-            "helpfulness": 0.0,
-            "correctness": 0.0,
-            "coherence": 0.0,
-            "complexity": 0.0,
-            "verbosity": 0.0
-        }
-        
 def generate_synthetic_data(use_case: str,
                               num_samples: int = 100,
                               few_shot_examples: Optional[List[dict]] = None) -> List[dict]:
     """
+    Versión síncrona de `generate_synthetic_data_async`. No debe llamarse desde un bucle de eventos.
+    """
+    return run_sync(generate_synthetic_data_async(use_case, num_samples, few_shot_examples))
+
+
+async def generate_synthetic_data_async(use_case: str,
+                                        num_samples: int = 100,
+                                        few_shot_examples: Optional[List[dict]] = None) -> List[dict]:
+    """
     Genera datos sintéticos para un caso de uso específico utilizando la API.
 
+    La generación se reparte en lotes de `data_generation.generation.shard_size` muestras que
+    se piden en paralelo (`generate_in_shards`) y se reciben en streaming. Cada muestra se
+    valida y se compara con las anteriores para descartar duplicados (`data_generation.dedup`)
+    en cuanto el modelo la termina, y se empieza a puntuar con el modelo de recompensa sin
+    esperar al resto, con como mucho `data_generation.scoring.max_concurrency` solicitudes en vuelo.
+    Todas las llamadas pasan por el cliente compartido (`get_llm_client`), con su límite de
+    solicitudes y reintentos.
+
     Argumentos:
         use_case (str): El caso de uso específico para el cual generar el conjunto de datos.
         num_samples (int): El número de muestras de datos a generar. Por defecto es 100.
@@ -83,12 +57,206 @@ def generate_synthetic_data(use_case: str,
     Retorna:
         List[dict]: Una lista de muestras de datos que siguen la estructura definida.
     """
-    config = load_config('config/config.yaml')
-    client = OpenAI(
-        api_key=config['api']['api_key'],
-        base_url=config['api']['base_url'],
-    )
+    config = get_config()
+    generacion = config.section('data_generation', 'generation')
+    deduplicacion = config.section('data_generation', 'dedup')
+    dedup = None
+    if deduplicacion.get('enabled', True):
+        dedup = NearDuplicateFilter(
+            threshold=float(deduplicacion.get('threshold', 0.8)),
+            num_perm=int(deduplicacion.get('num_perm', 64)),
+            shingle_size=int(deduplicacion.get('shingle_size', 5)),
+        )
+    max_concurrency = int(config.section('data_generation', 'scoring').get('max_concurrency', DEFAULT_MAX_CONCURRENCY))
+    client = get_llm_client()
+    scorer = IncrementalScorer(max_concurrency, client)
+
+    try:
+        datos_validos = await generate_in_shards(
+            client,
+            config.api.instruct_model,
+            use_case,
+            num_samples,
+            few_shot_examples,
+            shard_size=int(generacion.get('shard_size', DEFAULT_SHARD_SIZE)),
+            max_concurrency=int(generacion.get('max_concurrency', DEFAULT_GENERATION_CONCURRENCY)),
+            max_rounds=int(generacion.get('max_rounds', DEFAULT_MAX_ROUNDS)),
+            dedup=dedup,
+            stream=bool(generacion.get('stream', True)),
+            on_sample=scorer.submit,
+        )
+        puntuaciones = await scorer.results()
+        if dedup is not None:
+            estadisticas = dedup.stats()
+            print(f"Deduplicación: {estadisticas['dropped']} muestras descartadas "
+                  f"({estadisticas['exact_duplicates']} exactas, {estadisticas['near_duplicates']} casi duplicadas).")
+
+        if not datos_validos:
+            raise ValueError("No se encontraron elementos de datos válidos en la respuesta.")
+
+        # Filtrar los datos generados por calidad
+        filtered_data = []
+        for item, metrics in zip(datos_validos, puntuaciones):
+            if metrics is None:
+                continue
+            item['métricas'] = metrics
+            if metrics["helpfulness"] >= 3.0:
+                filtered_data.append(item)
+
+        # Si no se encuentra ningún dato filtrado, devolver los datos válidos
+        if not filtered_data:
+            print("Precaución: No se encontraron datos filtrados de alta calidad.")
+            return datos_validos
+
+        return filtered_data
+
+    except Exception as e:
+        # Proporcionar un conjunto de datos de respaldo con ejemplos mínimos
+        print(f"Error al generar el conjunto de datos: {str(e)}")
+        return []
+    finally:
+        # Si la generación falló o se canceló, las puntuaciones lanzadas ya no se usarán
+        await scorer.cancel()
+
+
+def split_into_shards(num_samples: int, shard_size: int) -> List[int]:
+    """
+    Reparte `num_samples` en lotes de como mucho `shard_size` muestras, del mismo tamaño salvo uno.
+    """
+    if shard_size < 1:
+        raise ValueError("shard_size debe ser al menos 1.")
+    completos, resto = divmod(max(num_samples, 0), shard_size)
+    return [shard_size] * completos + ([resto] if resto else [])
+
+
+def shard_hint(indice: int) -> str:
+    """
+    Pista de subtema para el lote `indice`, distinta para cada lote.
+    """
+    enfoque = ENFOQUES[indice % len(ENFOQUES)]
+    vuelta = indice // len(ENFOQUES)
+    variante = f" (variante {vuelta + 1}: evita las preguntas más obvias de este enfoque)" if vuelta else ""
+    return f"\n    - Este es el lote {indice + 1}: céntrate en {enfoque}{variante}."
+
+
+async def generate_in_shards(client: LLMClient,
+                             model: str,
+                             use_case: str,
+                             num_samples: int,
+                             few_shot_examples: Optional[List[dict]] = None,
+                             shard_size: int = DEFAULT_SHARD_SIZE,
+                             max_concurrency: int = DEFAULT_GENERATION_CONCURRENCY,
+                             max_rounds: int = DEFAULT_MAX_ROUNDS,
+                             dedup: Optional[NearDuplicateFilter] = None,
+                             stream: bool = True,
+                             on_sample: Optional[Callable[[dict], None]] = None) -> List[dict]:
+    """
+    Genera `num_samples` muestras válidas en lotes paralelos, cada uno con su propia pista de subtema.
 
+    Con `stream`, cada lote se recibe en streaming y cada muestra se acepta en cuanto se cierra
+    su objeto JSON; si la respuesta se corta, se conservan las muestras ya completas. Un lote
+    que falla o devuelve menos muestras de las pedidas no afecta a los demás; lo que falte
+    (también lo que descarte `dedup`) se vuelve a pedir en hasta `max_rounds` rondas
+    adicionales con pistas nuevas. Las muestras de más que devuelva un lote cubren lo que
+    falte de otros: en cuanto hay `num_samples` se deja de leer y se cancelan los lotes en vuelo.
+
+    Argumentos:
+        client (LLMClient): Cliente de la API.
+        model (str): Modelo de instrucciones que genera los datos.
+        use_case (str): El caso de uso.
+        num_samples (int): Muestras válidas que se quieren en total.
+        few_shot_examples (Optional[List[dict]]): Ejemplos para guiar la IA.
+        shard_size (int): Muestras pedidas en cada llamada.
+        max_concurrency (int): Llamadas de generación simultáneas.
+        max_rounds (int): Rondas adicionales para completar las muestras que falten.
+        dedup (Optional[NearDuplicateFilter]): Filtro que descarta duplicados entre todos los lotes.
+        stream (bool): Si es False, se espera a la respuesta completa de cada lote.
+        on_sample (Optional[Callable]): Se llama con cada muestra aceptada, en cuanto se acepta.
+
+    Retorna:
+        List[dict]: Como mucho `num_samples` muestras con "entrada" y "salida", en el orden en que se aceptaron.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency debe ser al menos 1.")
+    semaforo = asyncio.Semaphore(max_concurrency)
+    datos: List[dict] = []
+    tareas: List[asyncio.Task] = []
+
+    def aceptar(item) -> bool:
+        if len(datos) >= num_samples or not _es_muestra(item):
+            return False
+        if dedup is not None and not dedup.add(item):
+            return False
+        datos.append(item)
+        if on_sample is not None:
+            on_sample(item)
+        if len(datos) >= num_samples:
+            # Los lotes que siguen en vuelo sólo gastarían llamadas y tokens
+            actual = asyncio.current_task()
+            for tarea in tareas:
+                if tarea is not actual:
+                    tarea.cancel()
+        return True
+
+    async def lote(indice: int, tamano: int) -> None:
+        async with semaforo:
+            if len(datos) >= num_samples:
+                return
+            kwargs = dict(
+                model=model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": build_prompt(use_case, tamano, few_shot_examples, shard_hint(indice))},
+                ],
+                max_tokens=4096,
+                temperature=0.7,
+            )
+            aceptadas = 0
+            if stream:
+                parser = JsonObjectStreamParser()
+                respuesta = client.chat_stream(**kwargs)
+                try:
+                    async for texto in respuesta:
+                        for item in parser.feed(texto):
+                            if aceptar(item):
+                                aceptadas += 1
+                        if len(datos) >= num_samples:
+                            return
+                finally:
+                    # Cierra la conexión si se deja de leer antes del final
+                    await respuesta.aclose()
+                if parser.pending:
+                    print(f"Precaución: la respuesta del lote {indice + 1} se cortó; se conservan {aceptadas} muestras.")
+            else:
+                response = await client.chat(**kwargs)
+                for item in extract_samples(response.choices[0].message.content):
+                    aceptar(item)
+
+    siguiente = 0
+    for ronda in range(max_rounds + 1):
+        pendientes = num_samples - len(datos)
+        if pendientes <= 0:
+            break
+        tamanos = split_into_shards(pendientes, shard_size)
+        tareas[:] = [asyncio.ensure_future(lote(siguiente + i, tamano)) for i, tamano in enumerate(tamanos)]
+        resultados = await asyncio.gather(*tareas, return_exceptions=True)
+        siguiente += len(tamanos)
+        for resultado in resultados:
+            if isinstance(resultado, BaseException) and not isinstance(resultado, asyncio.CancelledError):
+                print(f"Error al generar un lote: {str(resultado)}")
+
+    if len(datos) < num_samples:
+        print(f"Precaución: se generaron {len(datos)} de las {num_samples} muestras pedidas.")
+    return datos
+
+
+def build_prompt(use_case: str,
+                 num_samples: int,
+                 few_shot_examples: Optional[List[dict]] = None,
+                 pista: str = "") -> str:
+    """
+    Construye la instrucción que pide `num_samples` muestras para el caso de uso.
+    """
     # Definir la instrucción base
     prompt = f"""
     Eres un asistente de IA especializado en generar conjuntos de datos de alta calidad para tareas de aprendizaje automático.
@@ -99,7 +267,7 @@ def generate_synthetic_data(use_case: str,
     - Genera un conjunto de datos con {num_samples} muestras.
     - Cada punto de datos debe ser un objeto JSON.
     - Sigue la estructura definida a continuación.
-    - Asegúrate de que los datos sean diversos y cubran varios aspectos del caso de uso.
+    - Asegúrate de que los datos sean diversos y cubran varios aspectos del caso de uso.{pista}
     - IMPORTANTE: Devuelve ÚNICAMENTE datos JSON válidos en el formato especificado a continuación.
 
     **Estructura del Conjunto de Datos:**
@@ -142,94 +310,21 @@ def generate_synthetic_data(use_case: str,
 
     # Agregar la instrucción para generar el conjunto de datos
     prompt += "\n\n**Conjunto de Datos Generado:**\nDevuelve ÚNICAMENTE JSON válido sin explicaciones ni comentarios."
+    return prompt
 
-    try:
-        response = client.chat.completions.create(
-            model=config['api']['instruct_model'],
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Eres un asistente de IA especializado en generar conjuntos de datos de alta calidad para tareas de aprendizaje automático. Devuelve únicamente JSON válido y bien formateado.",
-                },
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
-            max_tokens=4096,
-            temperature=0.7,
-        )
 
-        mensaje = response.choices[0].message.content.strip()
-
-        # Extraer JSON usando regex para encontrar cualquier contenido entre corchetes
-        coincidencia_json = re.search(r'\[(.*?)\]', mensaje, re.DOTALL)
-        if coincidencia_json:
-            json_str = f"[{coincidencia_json.group(1)}]"
-            datos = json.loads(json_str)
-        else:
-            # Intentar encontrar directamente el array JSON
-            coincidencia_json = re.search(r'\[\s*\{.*\}\s*\]', mensaje, re.DOTALL)
-            if coincidencia_json:
-                datos = json.loads(coincidencia_json.group(0))
-            else:
-                # Si no se encuentra un array JSON, intentar extraer objetos JSON individuales
-                patron_objeto = r'\{\s*"entrada"\s*:\s*".*?"\s*,\s*"salida"\s*:\s*".*?"\s*\}'
-                coincidencias = re.findall(patron_objeto, mensaje, re.DOTALL)
-                if coincidencias:
-                    datos = []
-                    for coincidencia in coincidencias:
-                        try:
-                            obj = json.loads(coincidencia)
-                            datos.append(obj)
-                        except json.JSONDecodeError:
-                            continue
-                else:
-                    # Último recurso: limpiar la respuesta e intentar nuevamente
-                    mensaje_limpio = mensaje.replace('```json', '').replace('```', '')
-                    try:
-                        # Buscar el primer '[' y el último ']'
-                        inicio_idx = mensaje_limpio.find('[')
-                        fin_idx = mensaje_limpio.rfind(']')
-                        if inicio_idx != -1 and fin_idx != -1:
-                            json_str = mensaje_limpio[inicio_idx:fin_idx+1]
-                            datos = json.loads(json_str)
-                        else:
-                            raise ValueError("No se encontraron delimitadores de array JSON en la respuesta.")
-                    except Exception:
-                        raise ValueError(f"No se pudo analizar el JSON de la respuesta de la API: {mensaje_limpio[:100]}...")
-
-        # Asegurar que tenemos una lista de diccionarios con la estructura correcta
-        if not isinstance(datos, list):
-            raise ValueError("Los datos generados no son una lista de diccionarios.")
-
-        datos_validos = []
-        for item in datos:
-            if isinstance(item, dict) and "entrada" in item and "salida" in item:
-                datos_validos.append(item)
-
-        if not datos_validos:
-            raise ValueError("No se encontraron elementos de datos válidos en la respuesta.")
+def _es_muestra(item) -> bool:
+    return isinstance(item, dict) and "entrada" in item and "salida" in item
 
-        # Filtrar los datos generados por calidad
-        filtered_data = []
-        for item in datos_validos:
-            try:
-                metrics = score_qa_pair(item['entrada'], item['salida'])
-                item['métricas'] = metrics
-                if metrics["helpfulness"] >= 3.0:
-                    filtered_data.append(item)
-            except Exception as e:
-                print(f"Error processing item: {str(e)}")
 
-        # Si no se encuentra ningún dato filtrado, devolver los datos válidos
-        if not filtered_data:
-            print("Precaución: No se encontraron datos filtrados de alta calidad.")
-            return datos_validos
-
-        return filtered_data
+def extract_samples(mensaje: str) -> List[dict]:
+    """
+    Extrae de la respuesta completa del modelo los objetos con "entrada" y "salida".
 
-    except Exception as e:
-        # Proporcionar un conjunto de datos de respaldo con ejemplos mínimos
-        print(f"Error al generar el conjunto de datos: {str(e)}")
-        return []
\ No newline at end of file
+    Raises:
+        ValueError: Si la respuesta no contiene ninguna muestra válida.
+    """
+    datos_validos = [item for item in parse_json_objects(mensaje) if _es_muestra(item)]
+    if not datos_validos:
+        raise ValueError(f"No se encontraron elementos de datos válidos en la respuesta: {mensaje[:100]}...")
+    return datos_validos
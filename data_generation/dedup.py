@@ -0,0 +1,178 @@
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE_SIZE = 5
+
+_MAX_HASH = (1 << 64) - 1
+_NO_ALFANUMERICO = re.compile(r"[^\w\s]")
+_DIACRITICOS = re.compile(r"[\u0300-\u036f]")
+
+
+def normalize_text(texto: str) -> str:
+    """
+    Normaliza un texto para compararlo: minúsculas, sin acentos ni puntuación y con los espacios colapsados.
+    """
+    texto = _DIACRITICOS.sub("", unicodedata.normalize("NFKD", texto.lower()))
+    return " ".join(_NO_ALFANUMERICO.sub(" ", texto).split())
+
+
+def shingles(texto: str, size: int = DEFAULT_SHINGLE_SIZE) -> Set[str]:
+    """
+    Devuelve los fragmentos de `size` caracteres consecutivos de un texto ya normalizado.
+    """
+    if len(texto) <= size:
+        return {texto}
+    return {texto[i:i + size] for i in range(len(texto) - size + 1)}
+
+
+def minhash(fragmentos: Iterable[str], num_perm: int = DEFAULT_NUM_PERM) -> Tuple[int, ...]:
+    """
+    Firma MinHash de un conjunto con un único hash por fragmento (one permutation hashing).
+
+    Cada fragmento se asigna a una de `num_perm` cubetas según su hash y cada cubeta guarda el
+    mínimo, así que el coste es lineal en el número de fragmentos en lugar de en
+    fragmentos × permutaciones. Las cubetas vacías toman el valor de la siguiente cubeta no
+    vacía (densificación por rotación) para que las firmas sigan siendo comparables.
+    """
+    minimos = [_MAX_HASH] * num_perm
+    # `hash` de str es SipHash (rápido y bien distribuido); varía entre procesos, así que
+    # las firmas sólo son comparables dentro del mismo proceso, que es como se usan
+    for valor in map(hash, fragmentos):
+        valor &= _MAX_HASH
+        cubeta = valor % num_perm
+        if valor < minimos[cubeta]:
+            minimos[cubeta] = valor
+    llenas = [i for i, valor in enumerate(minimos) if valor != _MAX_HASH]
+    if not llenas or len(llenas) == num_perm:
+        return tuple(minimos)
+    firma = list(minimos)
+    for i in range(num_perm):
+        if firma[i] == _MAX_HASH:
+            distancia = 1
+            while minimos[(i + distancia) % num_perm] == _MAX_HASH:
+                distancia += 1
+            # Se mezcla la distancia para que dos cubetas vacías no copien exactamente el mismo valor
+            firma[i] = (minimos[(i + distancia) % num_perm] + distancia * 0x9E3779B97F4A7C15) & _MAX_HASH
+    return tuple(firma)
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Elige bandas y filas por banda (bandas × filas = `num_perm`) cuyo umbral aproximado
+    `(1 / bandas) ** (1 / filas)` queda más cerca de `threshold`.
+    """
+    opciones = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(opciones, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+class NearDuplicateFilter:
+    """
+    Filtro incremental de duplicados exactos y casi duplicados para pares entrada/salida.
+
+    Los duplicados exactos (tras normalizar) se detectan con un hash del par. Para los casi
+    duplicados se calcula una firma MinHash de los fragmentos de caracteres del par y se
+    indexa en un LSH por bandas: sólo se comparan los elementos que coinciden en alguna
+    banda, así que cada inserción cuesta lo mismo aunque el filtro tenga cientos de miles
+    de elementos. Un candidato es duplicado si la similitud de Jaccard estimada por las
+    firmas alcanza `threshold`.
+    """
+
+    def __init__(self,
+                 threshold: float = DEFAULT_THRESHOLD,
+                 num_perm: int = DEFAULT_NUM_PERM,
+                 shingle_size: int = DEFAULT_SHINGLE_SIZE):
+        """
+        Args:
+            threshold (float): Similitud de Jaccard a partir de la cual dos pares son duplicados.
+            num_perm (int): Longitud de la firma MinHash.
+            shingle_size (int): Caracteres de cada fragmento.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold debe estar entre 0 y 1.")
+        if num_perm < 1 or shingle_size < 1:
+            raise ValueError("num_perm y shingle_size deben ser al menos 1.")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._exactos: Set[bytes] = set()
+        self._firmas: List[Tuple[int, ...]] = []
+        self._bandas: List[Dict[Tuple[int, ...], List[int]]] = [defaultdict(list) for _ in range(self.bands)]
+        self.kept = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def _texto(self, item: dict) -> str:
+        return normalize_text(f"{item.get('entrada', '')} {item.get('salida', '')}")
+
+    def _similitud(self, a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        return sum(x == y for x, y in zip(a, b)) / self.num_perm
+
+    def add(self, item: dict) -> bool:
+        """
+        Añade un par al filtro si no es duplicado de uno anterior.
+
+        Returns:
+            bool: True si se conserva, False si es un duplicado exacto o casi duplicado.
+        """
+        texto = self._texto(item)
+        huella = hashlib.blake2b(texto.encode("utf-8"), digest_size=16).digest()
+        if huella in self._exactos:
+            self.exact_duplicates += 1
+            return False
+
+        firma = minhash(shingles(texto, self.shingle_size), self.num_perm)
+        claves = [firma[b * self.rows:(b + 1) * self.rows] for b in range(self.bands)]
+        vistos = set()
+        for banda, clave in zip(self._bandas, claves):
+            for candidato in banda.get(clave, ()):
+                if candidato not in vistos:
+                    vistos.add(candidato)
+                    if self._similitud(firma, self._firmas[candidato]) >= self.threshold:
+                        self.near_duplicates += 1
+                        return False
+
+        indice = len(self._firmas)
+        self._firmas.append(firma)
+        for banda, clave in zip(self._bandas, claves):
+            banda[clave].append(indice)
+        self._exactos.add(huella)
+        self.kept += 1
+        return True
+
+    def filter(self, items: Iterable[dict]) -> List[dict]:
+        """
+        Devuelve los pares que no son duplicados, en el orden original.
+        """
+        return [item for item in items if self.add(item)]
+
+    def stats(self) -> dict:
+        return {
+            "kept": self.kept,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "dropped": self.exact_duplicates + self.near_duplicates,
+            "threshold": self.threshold,
+            "bands": self.bands,
+            "rows": self.rows,
+        }
+
+
+def deduplicate(items: Iterable[dict], **kwargs) -> Tuple[List[dict], dict]:
+    """
+    Elimina duplicados exactos y casi duplicados de una lista de pares entrada/salida.
+
+    Args:
+        items (Iterable[dict]): Pares con "entrada" y "salida".
+        **kwargs: Parámetros de `NearDuplicateFilter`.
+
+    Returns:
+        Tuple[List[dict], dict]: Los pares conservados y las estadísticas del filtro.
+    """
+    filtro = NearDuplicateFilter(**kwargs)
+    return filtro.filter(items), filtro.stats()
@@ -4,7 +4,7 @@ from typing import List
 from fastapi import APIRouter, File, UploadFile, Form, HTTPException
 from pydantic import BaseModel
 from PyPDF2 import PdfReader
-from data_generation.data_generator import generate_synthetic_data
+from data_generation.data_generator import generate_synthetic_data_async
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -85,7 +85,7 @@ async def upload_pdfs(
 
     try:
         # Generar conjunto de datos sintético utilizando el texto combinado y el caso de uso
-        conjunto_datos = generate_synthetic_data(
+        conjunto_datos = await generate_synthetic_data_async(
             use_case=use_case,
             num_samples=5,  # Ajustar el número de muestras según sea necesario
             few_shot_examples=ejemplos_pocos_disparos  # Opcional: proporcionar ejemplos guía a la IA
@@ -0,0 +1,80 @@
+import json
+from typing import List
+
+
+class JsonObjectStreamParser:
+    """
+    Analizador incremental que extrae los objetos JSON de primer nivel de un texto que llega por trozos.
+
+    Pensado para respuestas de modelos del tipo `[{...}, {...}]`, posiblemente rodeadas de
+    texto o bloques ```json```: cada objeto se devuelve en cuanto se cierra su llave, sin
+    esperar al resto de la respuesta. Las llaves y corchetes dentro de cadenas y los objetos
+    anidados se tienen en cuenta, y si la respuesta se corta sólo se pierde el objeto incompleto.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._profundidad = 0
+        self._en_cadena = False
+        self._escape = False
+        self.objects = 0
+        self.invalid = 0
+
+    def feed(self, texto: str) -> List[dict]:
+        """
+        Procesa un trozo de texto y devuelve los objetos que se completaron en él.
+        """
+        completos = []
+        inicio = 0 if self._profundidad else None
+        for i, c in enumerate(texto):
+            if self._profundidad == 0:
+                if c == "{":
+                    self._profundidad = 1
+                    inicio = i
+                continue
+            if self._en_cadena:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._en_cadena = False
+            elif c == '"':
+                self._en_cadena = True
+            elif c == "{":
+                self._profundidad += 1
+            elif c == "}":
+                self._profundidad -= 1
+                if self._profundidad == 0:
+                    self._buffer.append(texto[inicio:i + 1])
+                    objeto = self._decodificar("".join(self._buffer))
+                    self._buffer.clear()
+                    inicio = None
+                    if objeto is not None:
+                        completos.append(objeto)
+        if self._profundidad and inicio is not None:
+            self._buffer.append(texto[inicio:])
+        return completos
+
+    def _decodificar(self, texto: str):
+        try:
+            objeto = json.loads(texto)
+        except json.JSONDecodeError:
+            self.invalid += 1
+            return None
+        self.objects += 1
+        return objeto
+
+    @property
+    def pending(self) -> bool:
+        """
+        Indica si hay un objeto empezado y sin cerrar (p. ej. porque la respuesta se cortó).
+        """
+        return self._profundidad > 0
+
+
+def parse_json_objects(texto: str) -> List[dict]:
+    """
+    Devuelve los objetos JSON de primer nivel completos que aparecen en `texto`.
+    """
+    return JsonObjectStreamParser().feed(texto)
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+# Parámetros que cambian cómo se entrega la respuesta, no su contenido
+_SOLO_TRANSPORTE = ("stream", "stream_options")
+
+
+def request_key(request: dict) -> str:
+    """
+    Clave de caché de una solicitud: hash del modelo, los mensajes y los parámetros de muestreo.
+
+    `stream` y `stream_options` no forman parte de la clave: una respuesta en streaming y la
+    misma sin streaming comparten la entrada.
+    """
+    canonica = {k: v for k, v in request.items() if k not in _SOLO_TRANSPORTE}
+    texto = json.dumps(canonica, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Caché persistente en SQLite de las respuestas de la API de modelos, direccionada por contenido.
+
+    Cada entrada guarda el JSON de una respuesta bajo el hash de la solicitud (`request_key`).
+    Las entradas caducan a los `ttl_seconds` y, si el archivo supera `max_size_mb`, se borran
+    las usadas hace más tiempo. Con `bypass` no se leen entradas pero se siguen guardando las
+    respuestas nuevas, lo que permite refrescar la caché.
+
+    El tamaño total se lleva en memoria (se calcula una vez al abrir el archivo), así que
+    comprobar el límite no recorre la tabla; las entradas caducadas se borran como mucho cada
+    `prune_interval_seconds`, y las que se leen caducadas, en el momento.
+
+    Las operaciones son síncronas y se serializan con un lock: SQLite responde en menos de un
+    milisegundo, muy por debajo de la latencia de una llamada a la API.
+    """
+
+    def __init__(self,
+                 path: str,
+                 ttl_seconds: Optional[float] = None,
+                 max_size_mb: Optional[float] = None,
+                 bypass: bool = False,
+                 prune_interval_seconds: float = 60.0):
+        """
+        Args:
+            path (str): Archivo SQLite; se crea si no existe.
+            ttl_seconds (Optional[float]): Segundos que una respuesta sigue siendo válida; None no caduca.
+            max_size_mb (Optional[float]): Tamaño máximo de las respuestas guardadas; None sin límite.
+            bypass (bool): Si es True, no se devuelven respuestas guardadas.
+            prune_interval_seconds (float): Segundos mínimos entre dos barridos de entradas caducadas.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        self.bypass = bypass
+        self.prune_interval_seconds = prune_interval_seconds
+        directorio = os.path.dirname(path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS respuestas ("
+            " clave TEXT PRIMARY KEY,"
+            " modelo TEXT,"
+            " valor TEXT NOT NULL,"
+            " tamano INTEGER NOT NULL,"
+            " creado REAL NOT NULL,"
+            " usado REAL NOT NULL)"
+        )
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS respuestas_usado ON respuestas (usado)")
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS respuestas_creado ON respuestas (creado)")
+        self._total = self._conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+        self._ultima_poda = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, cache_config: dict) -> Optional["LLMCache"]:
+        """
+        Crea la caché a partir de la sección `data_generation.cache`, o devuelve None si está desactivada.
+        """
+        if not cache_config.get('enabled', False):
+            return None
+        ttl = cache_config.get('ttl_seconds')
+        max_size = cache_config.get('max_size_mb')
+        return cls(
+            path=cache_config.get('path', 'cache/llm_cache.sqlite'),
+            ttl_seconds=float(ttl) if ttl else None,
+            max_size_mb=float(max_size) if max_size else None,
+            bypass=bool(cache_config.get('bypass', False)),
+            prune_interval_seconds=float(cache_config.get('prune_interval_seconds', 60)),
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Devuelve la respuesta guardada bajo `key`, o None si no hay, caducó o se usa `bypass`.
+        """
+        if self.bypass:
+            self.misses += 1
+            return None
+        ahora = time.time()
+        with self._lock:
+            fila = self._conexion.execute("SELECT valor, creado, tamano FROM respuestas WHERE clave = ?", (key,)).fetchone()
+            if fila is not None and self.ttl_seconds is not None and ahora - fila[1] > self.ttl_seconds:
+                self._conexion.execute("DELETE FROM respuestas WHERE clave = ?", (key,))
+                self._total -= fila[2]
+                fila = None
+            if fila is None:
+                self.misses += 1
+                return None
+            self._conexion.execute("UPDATE respuestas SET usado = ? WHERE clave = ?", (ahora, key))
+            self.hits += 1
+        return json.loads(fila[0])
+
+    def put(self, key: str, value: Any, model: str = "") -> None:
+        """
+        Guarda una respuesta (serializable a JSON) y aplica los límites de tamaño y caducidad.
+        """
+        valor = json.dumps(value, ensure_ascii=False)
+        tamano = len(valor.encode("utf-8"))
+        ahora = time.time()
+        with self._lock:
+            anterior = self._conexion.execute("SELECT tamano FROM respuestas WHERE clave = ?", (key,)).fetchone()
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, modelo, valor, tamano, creado, usado) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, valor, tamano, ahora, ahora),
+            )
+            self._total += tamano - (anterior[0] if anterior else 0)
+            self.writes += 1
+            if self.ttl_seconds is not None and ahora - self._ultima_poda >= self.prune_interval_seconds:
+                self._ultima_poda = ahora
+                self._borrar_caducadas(ahora)
+            if self.max_bytes is not None and self._total > self.max_bytes:
+                self._liberar_espacio()
+
+    def _borrar_caducadas(self, ahora: float) -> None:
+        # Debe llamarse con el lock tomado; usa el índice de `creado`
+        limite = ahora - self.ttl_seconds
+        borradas, tamano = self._conexion.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM respuestas WHERE creado < ?", (limite,)
+        ).fetchone()
+        if borradas:
+            self._conexion.execute("DELETE FROM respuestas WHERE creado < ?", (limite,))
+            self._total -= tamano
+            self.evictions += borradas
+
+    def _liberar_espacio(self) -> None:
+        # Debe llamarse con el lock tomado. Se borra por tandas en orden de uso, sin leer toda la tabla.
+        while self._total > self.max_bytes:
+            tanda = self._conexion.execute("SELECT clave, tamano FROM respuestas ORDER BY usado LIMIT 64").fetchall()
+            if not tanda:
+                self._total = 0
+                return
+            for clave, tamano in tanda:
+                if self._total <= self.max_bytes:
+                    return
+                self._conexion.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+                self._total -= tamano
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Borra todas las respuestas guardadas.
+        """
+        with self._lock:
+            self._conexion.execute("DELETE FROM respuestas")
+            self._total = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            entradas = self._conexion.execute("SELECT COUNT(*) FROM respuestas").fetchone()[0]
+            tamano = self._total
+        total = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entradas,
+            "size_bytes": tamano,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "bypass": self.bypass,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conexion.close()
@@ -0,0 +1,443 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError, AsyncOpenAI
+from openai.types.chat import ChatCompletion
+
+from core.config import AppConfig, config_service
+from data_generation.llm_cache import LLMCache, request_key
+from deployment.metrics import (
+    LLM_CACHE_REQUESTS,
+    LLM_RATE_LIMIT_WAIT_SECONDS,
+    LLM_REQUEST_SECONDS,
+    LLM_RETRIES,
+    LLM_TOKENS,
+)
+
+# Códigos HTTP que indican un error transitorio del proveedor
+_ESTADOS_REINTENTABLES = {408, 409, 429, 500, 502, 503, 504}
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Limitador de solicitudes por cubo de fichas: `rate` fichas por segundo, hasta `capacity` acumuladas.
+
+    El estado se protege con un lock de hilos y la espera se hace con `asyncio.sleep`, así que
+    un mismo cubo sirve para varios bucles de eventos (p. ej. llamadas síncronas con `asyncio.run`).
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate debe ser positivo y capacity al menos 1.")
+        self.rate = rate
+        self.capacity = capacity
+        self._fichas = capacity
+        self._actualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reservar(self) -> float:
+        """
+        Toma una ficha (pudiendo quedar en negativo) y devuelve los segundos que hay que esperar.
+        """
+        with self._lock:
+            ahora = time.monotonic()
+            self._fichas = min(self.capacity, self._fichas + (ahora - self._actualizado) * self.rate)
+            self._actualizado = ahora
+            self._fichas -= 1
+            return max(0.0, -self._fichas / self.rate)
+
+    async def acquire(self) -> float:
+        """
+        Espera hasta que haya una ficha disponible. Devuelve los segundos esperados.
+        """
+        espera = self._reservar()
+        if espera:
+            await asyncio.sleep(espera)
+        return espera
+
+
+class LLMClient:
+    """
+    Cliente compartido para la API compatible con OpenAI usada en `data_generation`.
+
+    Reutiliza un `AsyncOpenAI` (y su pool de conexiones) por bucle de eventos, limita las solicitudes
+    con un cubo de fichas común a todo el proceso, reintenta los errores transitorios con
+    espera exponencial con jitter (respetando `Retry-After`) y registra la latencia y los
+    tokens consumidos en las métricas de Prometheus. Con `cache`, las solicitudes idénticas
+    se responden desde la caché persistente sin llamar a la API.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        requests_per_minute: Optional[float] = None,
+        burst: int = 1,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 120.0,
+        client_factory: Optional[Callable[[], AsyncOpenAI]] = None,
+        cache: Optional[LLMCache] = None,
+    ):
+        """
+        Args:
+            api_key (str): Clave de la API.
+            base_url (str): URL base de la API.
+            requests_per_minute (Optional[float]): Cuota de solicitudes del proveedor; None desactiva el límite.
+            burst (int): Solicitudes que pueden enviarse de golpe sin esperar al límite.
+            max_retries (int): Reintentos como máximo por solicitud.
+            backoff_base (float): Espera inicial entre reintentos, en segundos; se duplica en cada intento.
+            backoff_max (float): Espera máxima entre reintentos, en segundos.
+            timeout (float): Tiempo máximo de cada solicitud, en segundos.
+            client_factory (Optional[Callable]): Crea el cliente subyacente; por defecto un `AsyncOpenAI`.
+            cache (Optional[LLMCache]): Caché persistente de respuestas; None no guarda nada.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.cache = cache
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst) if requests_per_minute else None
+        self._factory = client_factory or self._crear_cliente
+        # Las conexiones de httpx pertenecen al bucle en el que se abrieron
+        self._clientes: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        # Solicitudes en curso y si el cliente se retiró (p. ej. tras recargar la configuración)
+        self._en_curso = 0
+        self._retirado = False
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> "LLMClient":
+        """
+        Crea el cliente a partir de la sección `api` de la configuración (`api.client` para los
+        límites) y de `data_generation.cache` para la caché de respuestas.
+        """
+        cliente = config.section('api', 'client')
+        return cls(
+            api_key=config.api.api_key,
+            base_url=config.api.base_url,
+            requests_per_minute=cliente.get('requests_per_minute'),
+            burst=int(cliente.get('burst', 1)),
+            max_retries=int(cliente.get('max_retries', 4)),
+            backoff_base=float(cliente.get('backoff_base_seconds', 0.5)),
+            backoff_max=float(cliente.get('backoff_max_seconds', 30)),
+            timeout=float(cliente.get('timeout_seconds', 120)),
+            cache=LLMCache.from_config(config.section('data_generation', 'cache')),
+        )
+
+    def _crear_cliente(self) -> AsyncOpenAI:
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=self.timeout,
+            # Los reintentos los gestiona esta clase, con el límite de solicitudes en cuenta
+            max_retries=0,
+        )
+
+    def _cliente(self) -> AsyncOpenAI:
+        bucle = asyncio.get_running_loop()
+        with self._lock:
+            cliente = self._clientes.get(bucle)
+            if cliente is None:
+                cliente = self._clientes[bucle] = self._factory()
+            return cliente
+
+    async def aclose(self) -> None:
+        """
+        Cierra el `AsyncOpenAI` del bucle actual y sus conexiones. Hay que llamarlo antes de que
+        el bucle termine; si se vuelve a usar el cliente en el mismo bucle se abre otro.
+        """
+        bucle = asyncio.get_running_loop()
+        with self._lock:
+            cliente = self._clientes.pop(bucle, None)
+        if cliente is not None:
+            await cliente.close()
+
+    def close(self) -> None:
+        """
+        Retira el cliente: cierra los `AsyncOpenAI` de todos los bucles en cuanto no quedan
+        solicitudes en curso, que terminan con normalidad. Cada uno se cierra en su bucle.
+        """
+        with self._lock:
+            self._retirado = True
+            clientes = self._soltar_clientes() if not self._en_curso else []
+        _cerrar_en_sus_bucles(clientes)
+
+    def _soltar_clientes(self) -> list:
+        # Se llama con self._lock tomado
+        clientes = list(self._clientes.items())
+        self._clientes.clear()
+        return clientes
+
+    @asynccontextmanager
+    async def _en_uso(self):
+        """
+        Marca una solicitud en curso; la última en terminar de un cliente retirado lo cierra.
+        """
+        with self._lock:
+            self._en_curso += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._en_curso -= 1
+                clientes = self._soltar_clientes() if self._retirado and not self._en_curso else []
+            for cliente in _cerrar_en_sus_bucles(clientes, asyncio.get_running_loop()):
+                await cliente.close()
+
+    @staticmethod
+    def _es_transitorio(error: Exception) -> bool:
+        if isinstance(error, (APIConnectionError, APITimeoutError)):
+            return True
+        return isinstance(error, APIStatusError) and error.status_code in _ESTADOS_REINTENTABLES
+
+    def _espera_reintento(self, intento: int, error: Exception) -> float:
+        respuesta = getattr(error, 'response', None)
+        retry_after = respuesta.headers.get('retry-after') if respuesta is not None else None
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        # Jitter completo: evita que los clientes que fallaron a la vez reintenten a la vez
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** intento))
+
+    async def _crear(self, model: str, inicio: float, kwargs: dict):
+        """
+        Llama a `chat.completions.create` respetando el límite de solicitudes y reintentando los
+        errores transitorios.
+        """
+        intento = 0
+        while True:
+            if self.bucket is not None:
+                LLM_RATE_LIMIT_WAIT_SECONDS.observe(await self.bucket.acquire())
+            with self._lock:
+                self.requests += 1
+            try:
+                return await self._cliente().chat.completions.create(**kwargs)
+            except Exception as e:
+                if intento >= self.max_retries or not self._es_transitorio(e):
+                    self._registrar_fallo(model, inicio)
+                    raise
+                espera = self._espera_reintento(intento, e)
+                intento += 1
+                with self._lock:
+                    self.retries += 1
+                LLM_RETRIES.inc(model=model)
+                self.logger.warning(f"Error transitorio de la API ({e}); reintento {intento}/{self.max_retries} en {espera:.2f}s.")
+                await asyncio.sleep(espera)
+
+    def _registrar_fallo(self, model: str, inicio: float) -> None:
+        with self._lock:
+            self.failures += 1
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - inicio, model=model, outcome="error")
+
+    def _buscar(self, kwargs: dict, use_cache: bool) -> tuple:
+        """
+        Devuelve `(clave, respuesta guardada)`; la clave es None si la solicitud no usa la caché.
+        """
+        if self.cache is None or not use_cache:
+            return None, None
+        clave = request_key(kwargs)
+        guardada = self.cache.get(clave)
+        LLM_CACHE_REQUESTS.inc(model=kwargs.get('model') or '', result="hit" if guardada is not None else "miss")
+        return clave, guardada
+
+    async def chat(self, use_cache: bool = True, **kwargs):
+        """
+        Llama a `chat.completions.create` con límite de solicitudes y reintentos.
+
+        Args:
+            use_cache (bool): Si es False, no se consulta la caché para esta solicitud.
+            **kwargs: Argumentos de `chat.completions.create` (`model`, `messages`, ...).
+
+        Returns:
+            La respuesta de la API.
+
+        Raises:
+            Exception: El último error si no es transitorio o se agotan los reintentos.
+        """
+        model = kwargs.get('model') or ''
+        clave, guardada = self._buscar(kwargs, use_cache)
+        if guardada is not None:
+            return ChatCompletion.model_validate(_como_completion(guardada, model))
+        inicio = time.perf_counter()
+        async with self._en_uso():
+            respuesta = await self._crear(model, inicio, kwargs)
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - inicio, model=model, outcome="ok")
+        self._registrar_uso(model, getattr(respuesta, 'usage', None))
+        if clave is not None and hasattr(respuesta, 'model_dump'):
+            self.cache.put(clave, respuesta.model_dump(mode="json"), model)
+        return respuesta
+
+    async def chat_stream(self, use_cache: bool = True, **kwargs) -> AsyncIterator[str]:
+        """
+        Igual que `chat`, pero con `stream=True`: produce el texto de la respuesta a medida que llega.
+
+        Sólo se reintenta la apertura del stream. Si la conexión se corta a mitad de la
+        respuesta se lanza el error, porque el texto ya entregado no puede retirarse. Sólo se
+        guardan en caché las respuestas recibidas completas; una respuesta guardada se entrega
+        de una vez.
+
+        Yields:
+            str: Cada fragmento de texto de la respuesta.
+        """
+        model = kwargs.get('model') or ''
+        clave, guardada = self._buscar(kwargs, use_cache)
+        if guardada is not None:
+            yield _texto_guardado(guardada)
+            return
+        inicio = time.perf_counter()
+        # Sin `include_usage` la API no informa de los tokens consumidos en streaming
+        opciones = {"include_usage": True, **(kwargs.get('stream_options') or {})}
+        async with self._en_uso():
+            stream = await self._crear(model, inicio, {**kwargs, "stream": True, "stream_options": opciones})
+            partes = []
+            try:
+                async for chunk in stream:
+                    usage = getattr(chunk, 'usage', None)
+                    if usage is not None:
+                        self._registrar_uso(model, usage)
+                    if chunk.choices:
+                        texto = chunk.choices[0].delta.content
+                        if texto:
+                            partes.append(texto)
+                            yield texto
+            except Exception:
+                self._registrar_fallo(model, inicio)
+                raise
+            finally:
+                # Si el consumidor deja de leer antes del final, se corta la respuesta en lugar de seguir recibiéndola
+                cerrar = getattr(stream, 'close', None) or getattr(stream, 'aclose', None)
+                if cerrar is not None:
+                    await cerrar()
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - inicio, model=model, outcome="ok")
+        if clave is not None:
+            self.cache.put(clave, {"stream_text": "".join(partes)}, model)
+
+    def _registrar_uso(self, model: str, usage) -> None:
+        if usage is None:
+            return
+        prompt = getattr(usage, 'prompt_tokens', 0) or 0
+        completion = getattr(usage, 'completion_tokens', 0) or 0
+        with self._lock:
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+        LLM_TOKENS.inc(prompt, model=model, kind="prompt")
+        LLM_TOKENS.inc(completion, model=model, kind="completion")
+
+    def stats(self) -> dict:
+        with self._lock:
+            contadores = {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+        return {
+            **contadores,
+            "requests_per_minute": self.bucket.rate * 60 if self.bucket else None,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+
+def _cerrar_en_sus_bucles(clientes: list, actual: Optional[asyncio.AbstractEventLoop] = None) -> list:
+    """
+    Programa el cierre de cada `AsyncOpenAI` en su bucle y devuelve los del bucle `actual`, que
+    debe esperar quien llama. Los de bucles ya cerrados se descartan: sus conexiones se cerraron con él.
+    """
+    propios = []
+    for bucle, cliente in clientes:
+        if bucle is actual:
+            propios.append(cliente)
+        elif bucle.is_running():
+            asyncio.run_coroutine_threadsafe(cliente.close(), bucle)
+    return propios
+
+
+def _texto_guardado(guardada: dict) -> str:
+    if "stream_text" in guardada:
+        return guardada["stream_text"]
+    return guardada["choices"][0]["message"]["content"] or ""
+
+
+def _como_completion(guardada: dict, model: str) -> dict:
+    # Las respuestas guardadas desde `chat_stream` sólo tienen el texto
+    if "stream_text" not in guardada:
+        return guardada
+    return {
+        "id": "cache",
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": guardada["stream_text"]},
+        }],
+    }
+
+
+_compartido: Optional[LLMClient] = None
+_suscrito = False
+_compartido_lock = threading.Lock()
+
+
+def _olvidar_cliente(config: AppConfig) -> None:
+    # Tras recargar la configuración se crea un cliente nuevo con los valores actuales
+    global _compartido
+    with _compartido_lock:
+        anterior, _compartido = _compartido, None
+    if anterior is not None:
+        anterior.close()
+
+
+def get_llm_client() -> LLMClient:
+    """
+    Devuelve el cliente compartido por todo `data_generation`, creándolo con la configuración actual.
+    """
+    global _compartido, _suscrito
+    servicio = config_service()
+    config = servicio.get()
+    with _compartido_lock:
+        if not _suscrito:
+            servicio.subscribe(_olvidar_cliente)
+            _suscrito = True
+        if _compartido is None:
+            _compartido = LLMClient.from_config(config)
+        return _compartido
+
+
+def run_sync(coro: Awaitable[T], client: Optional[LLMClient] = None) -> T:
+    """
+    Ejecuta `coro` con `asyncio.run` y, antes de cerrar el bucle, cierra el `AsyncOpenAI` que
+    `client` (por defecto el compartido) abrió en él. No debe llamarse desde un bucle de eventos.
+    """
+    # Se fija antes de empezar: una recarga de la configuración durante `coro` cambia el compartido
+    cliente = client or get_llm_client()
+
+    async def ejecutar():
+        try:
+            return await coro
+        finally:
+            await cliente.aclose()
+
+    return asyncio.run(ejecutar())
@@ -1,82 +1,137 @@
+import asyncio
 import json
 import re
-from openai import OpenAI
+from typing import List, Optional
 import sys
 sys.path.append('c:/Github/softIA')
 
-from data_generation.utils import load_config
+from data_generation.llm_client import LLMClient, get_llm_client
 
-async def score_qa_pair(entrada: str, salida: str) -> dict:
+REWARD_MODEL = "nvidia/nemotron-4-340b-reward"
+METRICS = ("helpfulness", "correctness", "coherence", "complexity", "verbosity")
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+def _metricas_vacias() -> dict:
+    return {metrica: 0.0 for metrica in METRICS}
+
+
+async def score_qa_pair(entrada: str, salida: str, client: Optional[LLMClient] = None) -> dict:
     """
     Puntúa un par de preguntas y respuestas utilizando el modelo de recompensa Nemotron-4 340B.
 
     Args:
     entrada (str): La pregunta/entrada del usuario.
     salida (str): La respuesta del asistente.
+    client (Optional[LLMClient]): Cliente de la API; por defecto el compartido (`get_llm_client`).
 
     Devuelve:
     dict: Un diccionario con las métricas de utilidad del modelo de recompensa.
     """
-    config = load_config('config/config.yaml')
-    client = OpenAI(
-        api_key=config['api']['api_key'],
-        base_url=config['api']['base_url'],
-    )
-
+    client = client or get_llm_client()
     messages = [
         {"role": "user", "content": entrada},
         {"role": "assistant", "content": salida}
     ]
 
     try:
-        response = client.chat.completions.create(
-            model="nvidia/nemotron-4-340b-reward",
+        response = await client.chat(
+            model=REWARD_MODEL,
             messages=messages
         )
 
-        print(response)
-
-        metrics = {
-            "helpfulness": 0.0,
-            "correctness": 0.0,
-            "coherence": 0.0,
-            "complexity": 0.0,
-            "verbosity": 0.0
-        }
+        metrics = _metricas_vacias()
 
         logprobs_content = response.choices[0].logprobs.content
 
         for item in logprobs_content:
             token = item.token.strip().lower()
-            logprob = item.logprob
-            if token == 'helpfulness':
-                metrics["helpfulness"] = logprob
-            elif token == 'correctness':
-                metrics["correctness"] = logprob
-            elif token == 'coherence':
-                metrics["coherence"] = logprob
-            elif token == 'complexity':
-                metrics["complexity"] = logprob
-            elif token == 'verbosity':
-                metrics["verbosity"] = logprob
+            if token in metrics:
+                metrics[token] = item.logprob
 
         return metrics
     except Exception as e:
         print(f"Error en el scoring: {e}")
-        return {
-            "helpfulness": 0.0,
-            "correctness": 0.0,
-            "coherence": 0.0,
-            "complexity": 0.0,
-            "verbosity": 0.0
-        }
-    
+        return _metricas_vacias()
+
+
+class IncrementalScorer:
+    """
+    Puntúa pares a medida que llegan, con como mucho `max_concurrency` solicitudes en vuelo.
+
+    Permite empezar a puntuar mientras el modelo de instrucciones todavía está generando:
+    cada `submit` lanza la puntuación en segundo plano y `results` espera a todas.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, client: Optional[LLMClient] = None):
+        """
+        Args:
+        max_concurrency (int): Solicitudes simultáneas al modelo de recompensa.
+        client (Optional[LLMClient]): Cliente de la API; por defecto el compartido (`get_llm_client`).
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency debe ser al menos 1.")
+        self.client = client or get_llm_client()
+        self._semaforo = asyncio.Semaphore(max_concurrency)
+        self._tareas: List[asyncio.Task] = []
+
+    async def _puntuar(self, item: dict) -> Optional[dict]:
+        async with self._semaforo:
+            try:
+                return await score_qa_pair(item['entrada'], item['salida'], self.client)
+            except Exception as e:
+                print(f"Error processing item: {str(e)}")
+                return None
+
+    def submit(self, item: dict) -> None:
+        """
+        Empieza a puntuar `item`. Debe llamarse desde el bucle de eventos.
+        """
+        self._tareas.append(asyncio.ensure_future(self._puntuar(item)))
+
+    async def results(self) -> List[Optional[dict]]:
+        """
+        Espera a todas las puntuaciones y las devuelve en el orden de `submit`, con None
+        para los elementos que no se pudieron procesar.
+        """
+        return list(await asyncio.gather(*self._tareas))
+
+    async def cancel(self) -> None:
+        """
+        Cancela las puntuaciones pendientes y espera a que terminen, para no dejar solicitudes
+        en vuelo ni tareas huérfanas en el bucle de eventos.
+        """
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+
+
+async def score_qa_pairs(items: List[dict],
+                         max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                         client: Optional[LLMClient] = None) -> List[Optional[dict]]:
+    """
+    Puntúa varios pares a la vez, con como mucho `max_concurrency` solicitudes en vuelo.
+
+    Args:
+    items (List[dict]): Elementos con las claves "entrada" y "salida".
+    max_concurrency (int): Solicitudes simultáneas al modelo de recompensa.
+    client (Optional[LLMClient]): Cliente de la API; por defecto el compartido (`get_llm_client`).
+
+    Devuelve:
+    List[Optional[dict]]: Las métricas de cada elemento en el mismo orden que `items`,
+    o None para los elementos que no se pudieron procesar.
+    """
+    scorer = IncrementalScorer(max_concurrency, client)
+    for item in items:
+        scorer.submit(item)
+    return await scorer.results()
+
+
 if __name__ == "__main__":
     # Test the scoring function
     entrada = "How can I reset my account password?"
     salida = "To reset your password, go to the login page, click on 'Forgot my password' and follow the instructions sent to your registered email."
     
-    import asyncio
     metrics = asyncio.run(score_qa_pair(entrada, salida))
     print(f"Scoring metrics for QA pair:")
     for metric, value in metrics.items():
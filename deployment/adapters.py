@@ -0,0 +1,284 @@
+import json
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
+ADAPTER_CONFIG = "adapter_config.json"
+
+
+def is_adapter(model_path: str) -> bool:
+    """
+    Indica si `model_path` contiene un adaptador LoRA (peft) en lugar de un modelo completo.
+    """
+    return os.path.exists(os.path.join(model_path, ADAPTER_CONFIG))
+
+
+def adapter_base_model(model_path: str) -> str:
+    """
+    Devuelve la ruta o el identificador del modelo base con el que se entrenó un adaptador.
+
+    Raises:
+        ValueError: Si el adaptador no indica su modelo base.
+    """
+    with open(os.path.join(model_path, ADAPTER_CONFIG), "r") as f:
+        base = json.load(f).get("base_model_name_or_path")
+    if not base:
+        raise ValueError(f"El adaptador {model_path} no indica su modelo base.")
+    return base
+
+
+def _envolver_con_peft(base, adapter_path: str, adapter_name: str):
+    # peft sólo es necesario si se sirven adaptadores
+    from peft import PeftModel
+    modelo = PeftModel.from_pretrained(base, adapter_path, adapter_name=adapter_name)
+    modelo.eval()
+    return modelo
+
+
+class _ReadWriteLock:
+    """
+    Lock de lectores/escritor con preferencia por el escritor.
+
+    Varias generaciones pueden usar el modelo a la vez (lectura), pero cargar o borrar un
+    adaptador modifica sus capas y necesita que no haya ninguna en curso (escritura). Un hilo
+    que ya lee puede escribir si es el único lector, y el escritor puede leer.
+    """
+
+    def __init__(self):
+        self._condicion = threading.Condition()
+        self._lectores: Dict[int, int] = {}
+        self._escritor = None
+        self._escrituras = 0
+        self._escritores_esperando = 0
+
+    def _puede_leer(self, hilo: int) -> bool:
+        if self._escritor == hilo or hilo in self._lectores:
+            return True
+        return self._escritor is None and not self._escritores_esperando
+
+    def _puede_escribir(self, hilo: int) -> bool:
+        return self._escritor in (None, hilo) and all(lector == hilo for lector in self._lectores)
+
+    @contextmanager
+    def lectura(self) -> Iterator[None]:
+        hilo = threading.get_ident()
+        with self._condicion:
+            self._condicion.wait_for(lambda: self._puede_leer(hilo))
+            self._lectores[hilo] = self._lectores.get(hilo, 0) + 1
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._lectores[hilo] -= 1
+                if not self._lectores[hilo]:
+                    del self._lectores[hilo]
+                self._condicion.notify_all()
+
+    @contextmanager
+    def escritura(self) -> Iterator[None]:
+        hilo = threading.get_ident()
+        with self._condicion:
+            self._escritores_esperando += 1
+            try:
+                self._condicion.wait_for(lambda: self._puede_escribir(hilo))
+            finally:
+                self._escritores_esperando -= 1
+            self._escritor = hilo
+            self._escrituras += 1
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._escrituras -= 1
+                if not self._escrituras:
+                    self._escritor = None
+                self._condicion.notify_all()
+
+
+class AdapterManager:
+    """
+    Adaptadores LoRA cargados sobre un único modelo base residente, con expulsión LRU.
+
+    El primer adaptador envuelve el modelo base en un `PeftModel`; los siguientes se añaden
+    con `load_adapter`, que sólo reserva las matrices de bajo rango. Los adaptadores en uso
+    por una generación (`use`) no se expulsan aunque se supere `max_adapters`.
+
+    Las generaciones comparten el modelo con un lock de lectura; cargar o borrar un adaptador
+    toma el de escritura, así que nunca cambia las capas LoRA bajo un `generate` en curso.
+    """
+
+    _instancias: "weakref.WeakSet[AdapterManager]" = weakref.WeakSet()
+
+    def __init__(self, base_model, max_adapters: int = 8, wrap: Callable = _envolver_con_peft):
+        """
+        Args:
+            base_model: El modelo base ya cargado. peft le inyecta las capas LoRA, así que no
+                debe compartirse con solicitudes que esperan el modelo base sin adaptar.
+            max_adapters (int): Adaptadores residentes como máximo.
+            wrap (Callable): Función `(base, ruta, nombre) -> modelo` que carga el primer adaptador.
+        """
+        if max_adapters < 1:
+            raise ValueError("max_adapters debe ser al menos 1.")
+        self.logger = logging.getLogger(__name__)
+        self.base_model = base_model
+        self.max_adapters = max_adapters
+        self._wrap = wrap
+        self.model = None
+        self._lock = threading.Lock()
+        self._modelo_lock = _ReadWriteLock()
+        self._nombres: "OrderedDict[str, str]" = OrderedDict()
+        self._en_uso: Dict[str, int] = {}
+        # Adaptadores descartados que siguen en el modelo hasta que se puedan borrar
+        self._huerfanos: set = set()
+        self._contador = 0
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+        AdapterManager._instancias.add(self)
+
+    @staticmethod
+    def _clave(adapter_path: str) -> str:
+        return os.path.normpath(adapter_path)
+
+    def _cargar(self, clave: str) -> str:
+        # Debe llamarse con ambos locks tomados (escritura). Los nombres no pueden contener puntos (son nombres de módulo).
+        self._contador += 1
+        nombre = f"adapter_{self._contador}"
+        if self.model is None:
+            self.model = self._wrap(self.base_model, clave, nombre)
+        else:
+            self.model.load_adapter(clave, adapter_name=nombre)
+        self._nombres[clave] = nombre
+        self.loads += 1
+        self.logger.info(f"Adaptador {clave} cargado como {nombre}.")
+        return nombre
+
+    def _hay_que_expulsar(self) -> bool:
+        # Debe llamarse con el lock tomado
+        if len(self._nombres) > self.max_adapters:
+            return True
+        return bool(self._nombres) and any(not self._en_uso.get(nombre) for nombre in self._huerfanos)
+
+    def _expulsar(self) -> None:
+        # Debe llamarse con ambos locks tomados (escritura). peft necesita al menos un adaptador cargado en el modelo.
+        for nombre in list(self._huerfanos):
+            if not self._en_uso.get(nombre) and self._nombres:
+                self.model.delete_adapter(nombre)
+                self._huerfanos.discard(nombre)
+        for clave in list(self._nombres):
+            if len(self._nombres) <= self.max_adapters:
+                break
+            nombre = self._nombres[clave]
+            if self._en_uso.get(nombre):
+                continue
+            self.model.delete_adapter(nombre)
+            del self._nombres[clave]
+            self.evictions += 1
+            self.logger.info(f"Adaptador {clave} expulsado.")
+
+    @contextmanager
+    def use(self, adapter_paths: List[str]) -> Iterator[List[str]]:
+        """
+        Asegura que los adaptadores están cargados y los protege de la expulsión durante el bloque.
+
+        Args:
+            adapter_paths (List[str]): Un adaptador por secuencia del lote (pueden repetirse).
+
+        Yields:
+            List[str]: El nombre peft de cada adaptador, para `generate(adapter_names=...)`.
+        """
+        claves = [self._clave(ruta) for ruta in adapter_paths]
+        with self._lock:
+            nombres = self._reservar(claves)
+        if nombres is None:
+            # Falta algún adaptador: se carga sin generaciones en curso
+            with self._modelo_lock.escritura(), self._lock:
+                nombres = self._reservar(claves, cargar=True)
+                self._expulsar()
+        try:
+            with self._modelo_lock.lectura():
+                yield nombres
+        finally:
+            with self._lock:
+                for nombre in set(nombres):
+                    self._en_uso[nombre] -= 1
+                    if not self._en_uso[nombre]:
+                        del self._en_uso[nombre]
+            self._expulsar_si_hace_falta()
+
+    def _reservar(self, claves: List[str], cargar: bool = False):
+        """
+        Marca en uso los adaptadores de `claves` y devuelve sus nombres, o None si falta alguno
+        y no se permite `cargar`. Debe llamarse con el lock tomado.
+        """
+        if not cargar and any(clave not in self._nombres for clave in claves):
+            return None
+        nombres = []
+        for clave in claves:
+            nombre = self._nombres.get(clave)
+            if nombre is None:
+                nombre = self._cargar(clave)
+            else:
+                self._nombres.move_to_end(clave)
+                self.hits += 1
+            nombres.append(nombre)
+        for nombre in set(nombres):
+            self._en_uso[nombre] = self._en_uso.get(nombre, 0) + 1
+        return nombres
+
+    def _expulsar_si_hace_falta(self) -> None:
+        with self._lock:
+            if not self._hay_que_expulsar():
+                return
+        with self._modelo_lock.escritura(), self._lock:
+            self._expulsar()
+
+    def evict(self, adapter_path: str) -> bool:
+        """
+        Descarga un adaptador (p. ej. porque se reentrenó). Devuelve si estaba cargado.
+
+        Si está en uso, sólo se olvida su nombre: la próxima solicitud lo vuelve a cargar y el
+        antiguo se borra cuando deja de usarse.
+        """
+        with self._lock:
+            nombre = self._nombres.pop(self._clave(adapter_path), None)
+            if nombre is None:
+                return False
+            self._huerfanos.add(nombre)
+            self.evictions += 1
+        self._expulsar_si_hace_falta()
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_adapters": self.max_adapters,
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "adapters": list(reversed(self._nombres)),
+                "in_use": sum(1 for n in self._en_uso.values() if n),
+            }
+
+
+def evict_adapter(adapter_path: str) -> bool:
+    """
+    Descarga un adaptador de todos los modelos base en los que esté cargado.
+    """
+    return any([manager.evict(adapter_path) for manager in list(AdapterManager._instancias)])
+
+
+def adapter_stats() -> Dict[str, dict]:
+    """
+    Estadísticas de los adaptadores cargados, por modelo base.
+    """
+    resultado = {}
+    for manager in list(AdapterManager._instancias):
+        base = getattr(getattr(manager.base_model, "config", None), "_name_or_path", None) or str(id(manager))
+        resultado[base] = manager.stats()
+    return resultado
+
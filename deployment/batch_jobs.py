@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+def plan_batches(lengths: List[int], batch_size: int) -> List[List[int]]:
+    """
+    Agrupa índices de prompts en lotes de longitud parecida para minimizar el relleno.
+
+    Args:
+        lengths (List[int]): Longitud (en tokens o caracteres) de cada prompt.
+        batch_size (int): Número máximo de prompts por lote.
+
+    Returns:
+        List[List[int]]: Índices originales de cada lote, de los prompts más cortos a los más largos.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size debe ser al menos 1.")
+    orden = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [orden[inicio:inicio + batch_size] for inicio in range(0, len(orden), batch_size)]
+
+
+class BatchJob:
+    """
+    Un trabajo de inferencia por lotes: prompts, progreso y resultados en el orden original.
+    """
+
+    def __init__(self, model: str, prompts: List[str]):
+        self.job_id = uuid.uuid4().hex
+        self.model = model
+        self.prompts = prompts
+        self.results: List[Optional[str]] = [None] * len(prompts)
+        self.completed = 0
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self._actualizado = asyncio.Event()
+
+    def store(self, indices: List[int], predicciones: List[str]) -> None:
+        for indice, prediccion in zip(indices, predicciones):
+            self.results[indice] = prediccion
+        self.completed += len(indices)
+        self._notificar()
+
+    def _notificar(self) -> None:
+        self._actualizado.set()
+        self._actualizado = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    async def iter_results(self):
+        """
+        Devuelve los resultados en el orden original a medida que el prefijo contiguo está disponible.
+        """
+        siguiente = 0
+        while siguiente < len(self.prompts):
+            if self.results[siguiente] is not None:
+                yield siguiente, self.prompts[siguiente], self.results[siguiente]
+                siguiente += 1
+                continue
+            if self.done:
+                return
+            await self._actualizado.wait()
+
+    def summary(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "model": self.model,
+            "status": self.status,
+            "total": len(self.prompts),
+            "completed": self.completed,
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+class BatchJobStore:
+    """
+    Ejecuta y guarda los trabajos de inferencia por lotes de /chat/batch.
+
+    Cada lote planificado se envía por separado, de modo que las solicitudes interactivas
+    de /chat pueden intercalarse entre lotes en el pool de inferencia.
+    """
+
+    def __init__(self, batch_size: int = 16, job_ttl_seconds: float = 3600.0):
+        """
+        Args:
+            batch_size (int): Prompts por llamada a `generate`.
+            job_ttl_seconds (float): Segundos que se conservan los trabajos terminados.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.batch_size = batch_size
+        self.job_ttl_seconds = job_ttl_seconds
+        self._trabajos: Dict[str, BatchJob] = {}
+        self._tareas: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_config(cls, deployment_config: dict) -> "BatchJobStore":
+        """
+        Crea el almacén a partir de la sección `deployment.batch` de la configuración.
+        """
+        batch = deployment_config.get('batch', {}) or {}
+        return cls(
+            batch_size=int(batch.get('batch_size', 16)),
+            job_ttl_seconds=float(batch.get('job_ttl_seconds', 3600)),
+        )
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        self._purgar()
+        return self._trabajos.get(job_id)
+
+    def _purgar(self) -> None:
+        limite = time.time() - self.job_ttl_seconds
+        for job_id in [j for j, t in self._trabajos.items() if t.finished and t.finished < limite]:
+            del self._trabajos[job_id]
+
+    async def run(
+        self,
+        job: BatchJob,
+        lengths: List[int],
+        predict_chunk: Callable[[List[str]], Awaitable[List[str]]],
+    ) -> BatchJob:
+        """
+        Ejecuta un trabajo hasta terminarlo.
+
+        Args:
+            job (BatchJob): El trabajo a ejecutar.
+            lengths (List[int]): Longitud de cada prompt, usada para agrupar lotes.
+            predict_chunk (Callable): Corrutina que genera las respuestas de una lista de prompts.
+
+        Returns:
+            BatchJob: El trabajo, con estado "completed" o "failed".
+        """
+        job.status = "running"
+        try:
+            for indices in plan_batches(lengths, self.batch_size):
+                predicciones = await predict_chunk([job.prompts[i] for i in indices])
+                job.store(indices, predicciones)
+            job.status = "completed"
+        except Exception as e:
+            self.logger.error(f"El trabajo por lotes {job.job_id} falló: {str(e)}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished = time.time()
+            job._notificar()
+            self._tareas.pop(job.job_id, None)
+        self.logger.info(f"Trabajo por lotes {job.job_id}: {job.completed}/{len(job.prompts)} prompts ({job.status}).")
+        return job
+
+    def start(
+        self,
+        job: BatchJob,
+        lengths: List[int],
+        predict_chunk: Callable[[List[str]], Awaitable[List[str]]],
+    ) -> BatchJob:
+        """
+        Registra el trabajo y lo ejecuta en segundo plano en el bucle de eventos actual.
+        """
+        self._purgar()
+        self._trabajos[job.job_id] = job
+        self._tareas[job.job_id] = asyncio.create_task(self.run(job, lengths, predict_chunk))
+        return job
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Tuple
+
+
+class _Solicitud:
+    """
+    Una solicitud de generación pendiente dentro de una cola de lotes.
+    """
+    __slots__ = ("server", "prompt", "future")
+
+    def __init__(self, server, prompt: str):
+        self.server = server
+        self.prompt = prompt
+        self.future: Future = Future()
+
+
+class MicroBatcher:
+    """
+    Agrupa solicitudes concurrentes de /chat para el mismo modelo en una única llamada a `generate`.
+
+    Cada combinación (modelo, parámetros de generación) tiene su propia cola y un hilo
+    que espera como máximo `batch_window_ms` a que lleguen más solicitudes (hasta
+    `max_batch_size`) antes de ejecutar `ModelServer.predict_batch` y repartir los resultados.
+    """
+
+    def __init__(self, max_batch_size: int = 8, batch_window_ms: float = 10.0, idle_timeout: float = 60.0, executor=None):
+        """
+        Args:
+            max_batch_size (int): Número máximo de prompts por llamada a `generate`.
+            batch_window_ms (float): Tiempo máximo de espera para completar un lote, en milisegundos.
+            idle_timeout (float): Segundos sin tráfico tras los cuales se libera el hilo de una cola.
+            executor: Objeto con `submit(fn, *args, **kwargs)` donde se ejecutan los lotes
+                (p. ej. `InferencePool`). Por defecto se ejecutan en el hilo de la cola.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size debe ser al menos 1.")
+        self.logger = logging.getLogger(__name__)
+        self.max_batch_size = max_batch_size
+        self.batch_window = max(batch_window_ms, 0.0) / 1000.0
+        self.idle_timeout = idle_timeout
+        self.executor = executor
+        self._colas: Dict[Tuple, queue.Queue] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, deployment_config: dict, executor=None) -> "MicroBatcher":
+        """
+        Crea el agrupador a partir de la sección `deployment.batching` de la configuración.
+        """
+        batching = deployment_config.get('batching', {}) or {}
+        if not batching.get('enabled', True):
+            return cls(max_batch_size=1, batch_window_ms=0.0, executor=executor)
+        return cls(
+            max_batch_size=int(batching.get('max_batch_size', 8)),
+            batch_window_ms=float(batching.get('batch_window_ms', 10.0)),
+            executor=executor,
+        )
+
+    def submit(self, server, prompt: str, max_length: int = 1024) -> Future:
+        """
+        Encola un prompt para el modelo de `server` y devuelve un Future con la predicción.
+
+        Args:
+            server (ModelServer): Servidor con el modelo y el tokenizador ya cargados.
+            prompt (str): El texto de entrada.
+            max_length (int): La longitud máxima de la secuencia generada.
+
+        Returns:
+            Future: Se resuelve con el texto generado o con la excepción de la generación.
+        """
+        # Los servidores de adaptadores LoRA sobre un mismo modelo base comparten cola y lote
+        clave = (getattr(server, "batch_key", server.model_path), max_length)
+        solicitud = _Solicitud(server, prompt)
+        with self._lock:
+            cola = self._colas.get(clave)
+            if cola is None:
+                cola = queue.Queue()
+                self._colas[clave] = cola
+                threading.Thread(
+                    target=self._bucle_cola,
+                    args=(clave, cola, max_length),
+                    name=f"microbatcher-{len(self._colas)}",
+                    daemon=True,
+                ).start()
+            cola.put(solicitud)
+        return solicitud.future
+
+    async def predict(self, server, prompt: str, max_length: int = 1024) -> str:
+        """
+        Versión asíncrona de `submit` para usar desde los endpoints de FastAPI.
+        """
+        return await asyncio.wrap_future(self.submit(server, prompt, max_length=max_length))
+
+    def _bucle_cola(self, clave: Tuple, cola: queue.Queue, max_length: int) -> None:
+        while True:
+            try:
+                primera = cola.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    # Sólo se libera la cola si nadie encoló mientras esperábamos el lock
+                    if cola.empty():
+                        del self._colas[clave]
+                        return
+                continue
+
+            lote = [primera]
+            limite = time.monotonic() + self.batch_window
+            while len(lote) < self.max_batch_size:
+                restante = limite - time.monotonic()
+                try:
+                    if restante <= 0:
+                        lote.append(cola.get_nowait())
+                    else:
+                        lote.append(cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            self._ejecutar_lote(lote, max_length)
+
+    def _ejecutar_lote(self, lote: List[_Solicitud], max_length: int) -> None:
+        # Se usa el servidor de la solicitud más antigua para no retener modelos expulsados del registro
+        server = lote[0].server
+        self.logger.info(f"Ejecutando lote de {len(lote)} solicitudes para {server.model_path}.")
+        try:
+            prompts = [s.prompt for s in lote]
+            kwargs = {"max_length": max_length}
+            if getattr(server, "adapters", None) is not None:
+                kwargs["adapter_paths"] = [s.server.adapter_path for s in lote]
+            if self.executor is not None:
+                predicciones = self.executor.submit(server.predict_batch, prompts, **kwargs).result()
+            else:
+                predicciones = server.predict_batch(prompts, **kwargs)
+        except Exception as e:
+            for solicitud in lote:
+                solicitud.future.set_exception(e)
+            return
+        for solicitud, prediccion in zip(lote, predicciones):
+            solicitud.future.set_result(prediccion)
@@ -0,0 +1,188 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class ModelEntry:
+    """
+    Un modelo ajustado del catálogo, con las métricas de su `training_metrics.json`.
+    """
+    __slots__ = ("name", "path", "created", "modified", "metrics", "_metrics_mtime")
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.created = 0.0
+        self.modified = 0.0
+        self.metrics: dict = {}
+        self._metrics_mtime: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "created": self.created, "modified": self.modified, "metrics": self.metrics}
+
+
+class ModelCatalog:
+    """
+    Catálogo en memoria de los modelos ajustados de `model_dir`.
+
+    Se construye una vez y se actualiza de forma incremental: como mucho cada `poll_interval`
+    segundos se recorre el directorio (un `scandir` y un `stat` por modelo) y sólo se vuelve
+    a leer el `training_metrics.json` de los modelos cuyo archivo cambió. El modelo más
+    reciente se recalcula únicamente cuando algo cambia, así que `latest_path` es O(1).
+    """
+
+    METRICS_FILE = "training_metrics.json"
+
+    def __init__(self, model_dir: str, poll_interval: float = 5.0):
+        """
+        Args:
+            model_dir (str): Directorio que contiene los modelos ajustados.
+            poll_interval (float): Segundos mínimos entre dos recorridos del directorio.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self.set_model_dir(model_dir)
+
+    def set_model_dir(self, model_dir: str) -> None:
+        """
+        Cambia el directorio de modelos y vacía el catálogo; se reconstruye en el siguiente acceso.
+        """
+        with self._lock:
+            self.model_dir = model_dir
+            self._entradas: Dict[str, ModelEntry] = {}
+            self._mas_reciente: Optional[ModelEntry] = None
+            self._ultima_actualizacion: Optional[float] = None
+            self.scans = 0
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Sincroniza el catálogo con el disco si ha pasado `poll_interval` desde la última vez.
+        """
+        with self._lock:
+            ahora = time.monotonic()
+            if (not force and self._ultima_actualizacion is not None
+                    and ahora - self._ultima_actualizacion < self.poll_interval):
+                return
+            self._ultima_actualizacion = ahora
+            self._sincronizar()
+
+    def _sincronizar(self) -> None:
+        self.scans += 1
+        vistos = set()
+        cambios = False
+        try:
+            directorios = [d for d in os.scandir(self.model_dir) if d.is_dir()]
+        except FileNotFoundError:
+            directorios = []
+        for directorio in directorios:
+            vistos.add(directorio.name)
+            entrada = self._entradas.get(directorio.name)
+            if entrada is None:
+                entrada = ModelEntry(directorio.name, directorio.path)
+                self._entradas[directorio.name] = entrada
+                cambios = True
+            try:
+                info = directorio.stat()
+            except FileNotFoundError:
+                vistos.discard(directorio.name)
+                continue
+            if info.st_mtime != entrada.modified:
+                entrada.created = info.st_ctime
+                entrada.modified = info.st_mtime
+                cambios = True
+            self._actualizar_metricas(entrada)
+
+        for nombre in set(self._entradas) - vistos:
+            del self._entradas[nombre]
+            cambios = True
+        if cambios:
+            self._mas_reciente = max(self._entradas.values(), key=lambda e: e.modified, default=None)
+
+    def _actualizar_metricas(self, entrada: ModelEntry) -> None:
+        ruta = os.path.join(entrada.path, self.METRICS_FILE)
+        try:
+            mtime = os.stat(ruta).st_mtime
+        except FileNotFoundError:
+            entrada.metrics, entrada._metrics_mtime = {}, None
+            return
+        if mtime == entrada._metrics_mtime:
+            return
+        try:
+            with open(ruta, "r") as f:
+                entrada.metrics = json.load(f)
+            entrada._metrics_mtime = mtime
+        except (OSError, ValueError) as e:
+            # Puede estar a medio escribir: se reintenta en el siguiente recorrido
+            self.logger.warning(f"No se pudieron leer las métricas de {entrada.name}: {str(e)}")
+
+    def latest_path(self) -> str:
+        """
+        Devuelve la ruta del modelo modificado más recientemente.
+
+        Raises:
+            FileNotFoundError: Si no hay modelos en el directorio.
+        """
+        self.refresh()
+        mas_reciente = self._mas_reciente
+        if mas_reciente is None:
+            raise FileNotFoundError(f"No se encontraron modelos ajustados en {self.model_dir}.")
+        return mas_reciente.path
+
+    def list(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort_by: str = "created",
+        descending: bool = True,
+        name_contains: Optional[str] = None,
+        metric: Optional[str] = None,
+        min_value: Optional[float] = None,
+        max_value: Optional[float] = None,
+    ) -> dict:
+        """
+        Lista los modelos con filtrado, orden y paginación.
+
+        Args:
+            offset (int): Número de modelos a saltar.
+            limit (Optional[int]): Número máximo de modelos a devolver; None = todos.
+            sort_by (str): "name", "created", "modified" o el nombre de una métrica.
+            descending (bool): Orden descendente.
+            name_contains (Optional[str]): Subcadena que debe contener el nombre.
+            metric (Optional[str]): Métrica a la que se aplican `min_value` y `max_value`;
+                los modelos sin esa métrica se excluyen.
+
+        Returns:
+            dict: `models` (la página) y `total` (modelos que cumplen el filtro).
+        """
+        self.refresh()
+        with self._lock:
+            entradas = list(self._entradas.values())
+
+        if name_contains:
+            entradas = [e for e in entradas if name_contains.lower() in e.name.lower()]
+        if metric is not None:
+            entradas = [e for e in entradas if isinstance(e.metrics.get(metric), (int, float))]
+            if min_value is not None:
+                entradas = [e for e in entradas if e.metrics[metric] >= min_value]
+            if max_value is not None:
+                entradas = [e for e in entradas if e.metrics[metric] <= max_value]
+
+        if sort_by in ("name", "created", "modified"):
+            entradas.sort(key=lambda e: getattr(e, sort_by), reverse=descending)
+        else:
+            # Los modelos sin la métrica van siempre al final
+            con = [e for e in entradas if isinstance(e.metrics.get(sort_by), (int, float))]
+            sin = [e for e in entradas if not isinstance(e.metrics.get(sort_by), (int, float))]
+            con.sort(key=lambda e: e.metrics[sort_by], reverse=descending)
+            entradas = con + sorted(sin, key=lambda e: e.name)
+
+        pagina = entradas[offset:offset + limit] if limit is not None else entradas[offset:]
+        return {"models": [e.to_dict() for e in pagina], "total": len(entradas)}
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._entradas)
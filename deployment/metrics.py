@@ -0,0 +1,255 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatear_etiquetas(nombres: Sequence[str], valores: Sequence[str]) -> str:
+    if not nombres:
+        return ""
+    return "{" + ",".join(f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)) + "}"
+
+
+def _formatear_valor(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(float(valor))
+
+
+class _Metrica:
+    tipo = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _clave(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}, recibió {tuple(labels)}.")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lineas = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.tipo}"]
+        return lineas + self._muestras()
+
+    def _muestras(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metrica):
+    """
+    Contador monótono, opcionalmente con etiquetas.
+    """
+    tipo = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Un contador sólo puede aumentar.")
+        clave = self._clave(labels)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._valores.get(self._clave(labels), 0.0)
+
+    def _muestras(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}{_formatear_etiquetas(self.labelnames, clave)} {_formatear_valor(valor)}"
+                for clave, valor in sorted(self._valores.items())
+            ]
+
+
+class Gauge(Counter):
+    """
+    Valor que puede subir y bajar (p. ej. solicitudes en curso).
+    """
+    tipo = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        clave = self._clave(labels)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        clave = self._clave(labels)
+        with self._lock:
+            self._valores[clave] = value
+
+
+class Histogram(_Metrica):
+    """
+    Histograma acumulativo con cubetas fijas, en el formato de Prometheus.
+    """
+    tipo = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        clave = self._clave(labels)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                # Conteos por cubeta (la última es +Inf), suma y número de observaciones
+                serie = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[clave] = serie
+            serie[0][bisect.bisect_left(self.buckets, value)] += 1
+            serie[1] += value
+            serie[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Mide la duración del bloque en segundos y la registra.
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - inicio, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            serie = self._series.get(self._clave(labels))
+            return serie[2] if serie else 0
+
+    def _muestras(self) -> List[str]:
+        lineas = []
+        nombres = self.labelnames + ("le",)
+        with self._lock:
+            for clave, (conteos, suma, total) in sorted(self._series.items()):
+                acumulado = 0
+                for limite, conteo in zip(self.buckets + (math.inf,), conteos):
+                    acumulado += conteo
+                    etiquetas = _formatear_etiquetas(nombres, clave + (_formatear_valor(limite),))
+                    lineas.append(f"{self.name}_bucket{etiquetas} {acumulado}")
+                etiquetas = _formatear_etiquetas(self.labelnames, clave)
+                lineas.append(f"{self.name}_sum{etiquetas} {_formatear_valor(suma)}")
+                lineas.append(f"{self.name}_count{etiquetas} {total}")
+        return lineas
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas que se exponen juntas en /metrics.
+
+    Además de métricas propias, admite colectores: funciones que, en el momento de exportar,
+    leen el estado de otros componentes (cachés, colas) y devuelven métricas ya calculadas.
+    """
+
+    def __init__(self):
+        self._metricas: List[_Metrica] = []
+        self._colectores: List[Callable[[], List[_Metrica]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metrica: _Metrica) -> _Metrica:
+        with self._lock:
+            self._metricas.append(metrica)
+        return metrica
+
+    def add_collector(self, colector: Callable[[], List[_Metrica]]) -> None:
+        with self._lock:
+            self._colectores.append(colector)
+
+    def render(self) -> str:
+        """
+        Devuelve todas las métricas en el formato de texto de Prometheus (versión 0.0.4).
+        """
+        with self._lock:
+            metricas = list(self._metricas)
+            colectores = list(self._colectores)
+        for colector in colectores:
+            metricas.extend(colector())
+        return "\n".join(linea for metrica in metricas for linea in metrica.render()) + "\n"
+
+
+def gauge_from(name: str, documentation: str, value: float) -> Gauge:
+    """
+    Crea un gauge sin etiquetas con un valor fijo, para usar en colectores.
+    """
+    gauge = Gauge(name, documentation)
+    gauge.set(value)
+    return gauge
+
+
+def counter_from(name: str, documentation: str, value: float) -> Counter:
+    """
+    Crea un contador sin etiquetas con un valor fijo, para usar en colectores.
+    """
+    counter = Counter(name, documentation)
+    counter.inc(value)
+    return counter
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "softia_inference_stage_seconds",
+    "Duración de cada etapa de la inferencia (load, tokenize, generate, decode).",
+    ["model", "stage"],
+))
+PROMPT_TOKENS = REGISTRY.register(Counter(
+    "softia_prompt_tokens_total", "Tokens de entrada procesados.", ["model"],
+))
+GENERATED_TOKENS = REGISTRY.register(Counter(
+    "softia_generated_tokens_total", "Tokens generados.", ["model"],
+))
+TOKENS_PER_SECOND = REGISTRY.register(Histogram(
+    "softia_generation_tokens_per_second",
+    "Velocidad de decodificación de cada llamada a generate.",
+    ["model"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+))
+QUEUE_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "softia_inference_queue_wait_seconds",
+    "Tiempo que una tarea espera en la cola del pool de inferencia.",
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "softia_http_requests_in_flight", "Solicitudes HTTP en curso.", ["path"],
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "softia_http_request_duration_seconds",
+    "Duración de las solicitudes HTTP.",
+    ["method", "path", "status"],
+))
+LLM_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "softia_llm_request_duration_seconds",
+    "Duración de las llamadas a la API de modelos externos (generación y recompensa), reintentos incluidos.",
+    ["model", "outcome"],
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "softia_llm_tokens_total", "Tokens consumidos en la API de modelos externos.", ["model", "kind"],
+))
+LLM_RETRIES = REGISTRY.register(Counter(
+    "softia_llm_retries_total", "Reintentos por errores transitorios de la API de modelos externos.", ["model"],
+))
+LLM_RATE_LIMIT_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "softia_llm_rate_limit_wait_seconds",
+    "Tiempo de espera impuesto por el límite de solicitudes antes de llamar a la API externa.",
+))
+LLM_CACHE_REQUESTS = REGISTRY.register(Counter(
+    "softia_llm_cache_requests_total",
+    "Consultas a la caché persistente de respuestas de la API de modelos externos.",
+    ["model", "result"],
+))
@@ -0,0 +1,134 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import warnings
+from typing import Dict, List, Optional
+
+import torch
+from transformers import AutoConfig, AutoModelForCausalLM
+from transformers.modeling_utils import no_init_weights
+
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def safetensors_files(model_path: str) -> List[str]:
+    """
+    Devuelve los archivos safetensors de un modelo, respetando el índice si el checkpoint está fragmentado.
+
+    Args:
+        model_path (str): Ruta del directorio del modelo.
+
+    Returns:
+        List[str]: Rutas de los archivos; vacía si el modelo no está guardado en safetensors.
+    """
+    indice = os.path.join(model_path, "model.safetensors.index.json")
+    if os.path.exists(indice):
+        with open(indice, "r") as f:
+            archivos = sorted(set(json.load(f)["weight_map"].values()))
+        return [os.path.join(model_path, archivo) for archivo in archivos]
+    unico = os.path.join(model_path, "model.safetensors")
+    return [unico] if os.path.exists(unico) else []
+
+
+def load_safetensors_mmap(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Mapea un archivo safetensors en memoria y devuelve sus tensores sin copiarlos.
+
+    Los tensores apuntan directamente a las páginas del archivo en la caché de páginas del
+    sistema operativo, de modo que varios procesos que cargan el mismo archivo las comparten.
+    Son de sólo lectura: escribir en ellos es un error.
+
+    Args:
+        path (str): Ruta del archivo `.safetensors`.
+
+    Returns:
+        Dict[str, torch.Tensor]: Tensores por nombre.
+    """
+    with open(path, "rb") as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    (longitud_cabecera,) = struct.unpack("<Q", mapa[:8])
+    cabecera = json.loads(mapa[8:8 + longitud_cabecera])
+    inicio_datos = 8 + longitud_cabecera
+
+    tensores = {}
+    with warnings.catch_warnings():
+        # torch avisa de que el buffer no es escribible; los pesos nunca se modifican al servir
+        warnings.simplefilter("ignore", UserWarning)
+        for nombre, info in cabecera.items():
+            if nombre == "__metadata__":
+                continue
+            dtype = _DTYPES[info["dtype"]]
+            inicio, fin = info["data_offsets"]
+            numel = 1
+            for dim in info["shape"]:
+                numel *= dim
+            if numel == 0:
+                tensores[nombre] = torch.empty(info["shape"], dtype=dtype)
+                continue
+            tensor = torch.frombuffer(mapa, dtype=dtype, count=numel, offset=inicio_datos + inicio)
+            tensores[nombre] = tensor.view(info["shape"])
+    return tensores
+
+
+def load_model_mmap(model_path: str, dtype: Optional[torch.dtype] = None):
+    """
+    Construye un modelo causal cuyos pesos son vistas de los archivos safetensors mapeados en memoria.
+
+    El modelo se crea sin inicializar pesos (las reservas sin tocar no ocupan memoria residente)
+    y después se le asignan los tensores mapeados, sin copiarlos. Si `dtype` difiere del tipo
+    guardado, los pesos se convierten y dejan de compartirse.
+
+    Args:
+        model_path (str): Ruta del directorio del modelo.
+        dtype (Optional[torch.dtype]): Tipo de los pesos; por defecto el del archivo.
+
+    Returns:
+        El modelo en modo evaluación.
+
+    Raises:
+        FileNotFoundError: Si el modelo no tiene archivos safetensors.
+        ValueError: Si al checkpoint le faltan pesos del modelo.
+    """
+    logger = logging.getLogger(__name__)
+    archivos = safetensors_files(model_path)
+    if not archivos:
+        raise FileNotFoundError(f"No se encontraron archivos safetensors en {model_path}.")
+
+    estado = {}
+    for archivo in archivos:
+        estado.update(load_safetensors_mmap(archivo))
+    if dtype is not None:
+        estado = {k: v.to(dtype) if v.is_floating_point() else v for k, v in estado.items()}
+
+    config = AutoConfig.from_pretrained(model_path)
+    dtype_modelo = dtype or next((v.dtype for v in estado.values() if v.is_floating_point()), torch.float32)
+    with no_init_weights():
+        modelo = AutoModelForCausalLM.from_config(config, torch_dtype=dtype_modelo)
+
+    resultado = modelo.load_state_dict(estado, strict=False, assign=True)
+    modelo.tie_weights()
+    atados = {nombre for nombre, _ in modelo.named_parameters(remove_duplicate=False)} - set(
+        nombre for nombre, _ in modelo.named_parameters()
+    )
+    faltantes = [k for k in resultado.missing_keys if k not in atados]
+    if faltantes:
+        raise ValueError(f"Faltan pesos en el checkpoint de {model_path}: {faltantes[:5]}")
+    if resultado.unexpected_keys:
+        logger.warning(f"Pesos no usados en {model_path}: {resultado.unexpected_keys[:5]}")
+
+    modelo.eval()
+    logger.info(f"Modelo {model_path} cargado con pesos mapeados en memoria ({len(archivos)} archivos).")
+    return modelo
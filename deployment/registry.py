@@ -0,0 +1,231 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+def model_size_bytes(modelo) -> int:
+    """
+    Calcula la memoria ocupada por los pesos y buffers de un modelo de PyTorch.
+
+    Se recorre el `state_dict` para contar también los pesos empaquetados de las capas
+    cuantizadas, y los tensores compartidos (p. ej. embeddings atados) se cuentan una vez.
+
+    Args:
+        modelo: Un `torch.nn.Module` (o cualquier objeto con `parameters()`/`buffers()`).
+
+    Returns:
+        int: Tamaño aproximado en bytes.
+    """
+    if hasattr(modelo, "state_dict"):
+        tensores = []
+        for valor in modelo.state_dict(keep_vars=True).values():
+            tensores.extend(valor if isinstance(valor, (tuple, list)) else [valor])
+    else:
+        tensores = list(modelo.parameters()) + list(getattr(modelo, "buffers", lambda: [])())
+
+    total = 0
+    vistos = set()
+    for tensor in tensores:
+        if not hasattr(tensor, "element_size"):
+            continue
+        clave = tensor.data_ptr() if hasattr(tensor, "data_ptr") else id(tensor)
+        if clave in vistos:
+            continue
+        vistos.add(clave)
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class _Entrada:
+    __slots__ = ("modelo", "tokenizador", "size_bytes")
+
+    def __init__(self, modelo, tokenizador, size_bytes: int):
+        self.modelo = modelo
+        self.tokenizador = tokenizador
+        self.size_bytes = size_bytes
+
+
+class ModelRegistry:
+    """
+    Caché LRU de modelos y tokenizadores con un presupuesto de memoria.
+
+    Cada entrada se contabiliza por los bytes de sus parámetros. Cuando la suma supera
+    el presupuesto se expulsan los modelos usados hace más tiempo, salvo los fijados.
+    Las cargas concurrentes de un mismo modelo se agrupan: sólo la primera solicitud
+    llama a `from_pretrained` y las demás esperan su resultado.
+
+    Un mismo modelo puede tener varias variantes residentes (p. ej. una por modo de carga),
+    cada una con su entrada `ruta#variante`. Fijar o expulsar una ruta afecta a todas ellas.
+    """
+
+    def __init__(self, memory_budget_mb: Optional[float] = None, pinned_models: Iterable[str] = ()):
+        """
+        Args:
+            memory_budget_mb (Optional[float]): Memoria máxima para los modelos residentes, en MB.
+                `None` desactiva la expulsión.
+            pinned_models (Iterable[str]): Rutas de modelos que nunca se expulsan.
+        """
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[str, _Entrada]" = OrderedDict()
+        self._cargando: Dict[str, Future] = {}
+        self._bytes_en_uso = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.memory_budget_bytes: Optional[int] = None
+        self.pinned: set = set()
+        # Los fijados con `pin` (p. ej. los modelos precargados) sobreviven a `configure`
+        self._fijados_config: set = set()
+        self._fijados_pin: set = set()
+        self.configure(memory_budget_mb=memory_budget_mb, pinned_models=pinned_models)
+
+    @staticmethod
+    def _clave(model_path: str, variant: Optional[str] = None) -> str:
+        clave = os.path.normpath(model_path)
+        return f"{clave}#{variant}" if variant else clave
+
+    @staticmethod
+    def _ruta(clave: str) -> str:
+        return clave.partition("#")[0]
+
+    def _fijado(self, clave: str) -> bool:
+        return clave in self.pinned or self._ruta(clave) in self.pinned
+
+    def _claves_de(self, model_path: str) -> list:
+        # Debe llamarse con el lock tomado. Una ruta sin variante abarca todas sus variantes.
+        clave = self._clave(model_path)
+        if "#" in clave:
+            return [clave] if clave in self._entradas else []
+        return [c for c in self._entradas if self._ruta(c) == clave]
+
+    def configure(self, memory_budget_mb: Optional[float] = None, pinned_models: Iterable[str] = ()) -> None:
+        """
+        Ajusta el presupuesto y los modelos fijados por configuración, expulsando lo que ya no quepa.
+        """
+        with self._lock:
+            self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None
+            self._fijados_config = {self._clave(p) for p in pinned_models}
+            self.pinned = self._fijados_config | self._fijados_pin
+            self._expulsar(conservar=None)
+
+    def pin(self, model_path: str) -> None:
+        with self._lock:
+            self._fijados_pin.add(self._clave(model_path))
+            self.pinned = self._fijados_config | self._fijados_pin
+
+    def unpin(self, model_path: str) -> None:
+        with self._lock:
+            self._fijados_pin.discard(self._clave(model_path))
+            self.pinned = self._fijados_config | self._fijados_pin
+            self._expulsar(conservar=None)
+
+    def get(self, model_path: str, loader: Callable[[str], Tuple[Any, Any]],
+            variant: Optional[str] = None) -> Tuple[Any, Any]:
+        """
+        Devuelve el modelo y el tokenizador de `model_path`, cargándolos si es necesario.
+
+        Args:
+            model_path (str): Ruta del directorio del modelo.
+            loader (Callable): Función que recibe la ruta y devuelve `(modelo, tokenizador)`.
+            variant (Optional[str]): Variante del modelo (p. ej. el modo de carga); cada
+                variante es una entrada distinta.
+
+        Returns:
+            Tuple: `(modelo, tokenizador)`.
+
+        Raises:
+            Exception: La excepción de `loader` si la carga falla.
+        """
+        clave = self._clave(model_path, variant)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+                self.hits += 1
+                return entrada.modelo, entrada.tokenizador
+            self.misses += 1
+            carga = self._cargando.get(clave)
+            propietario = carga is None
+            if propietario:
+                carga = Future()
+                self._cargando[clave] = carga
+
+        if not propietario:
+            self.logger.info(f"Esperando la carga en curso de {clave}.")
+            return carga.result()
+
+        try:
+            modelo, tokenizador = loader(model_path)
+            size_bytes = model_size_bytes(modelo)
+        except Exception as e:
+            with self._lock:
+                del self._cargando[clave]
+            carga.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entradas[clave] = _Entrada(modelo, tokenizador, size_bytes)
+            self._bytes_en_uso += size_bytes
+            del self._cargando[clave]
+            self._expulsar(conservar=clave)
+        self.logger.info(f"Modelo {clave} registrado ({size_bytes / 1024 ** 2:.1f} MB).")
+        carga.set_result((modelo, tokenizador))
+        return modelo, tokenizador
+
+    def evict(self, model_path: str) -> bool:
+        """
+        Expulsa explícitamente un modelo (todas sus variantes), aunque esté fijado. Devuelve si estaba cargado.
+        """
+        with self._lock:
+            claves = self._claves_de(model_path)
+            for clave in claves:
+                entrada = self._entradas.pop(clave)
+                self._bytes_en_uso -= entrada.size_bytes
+                self.evictions += 1
+            return bool(claves)
+
+    def _expulsar(self, conservar: Optional[str]) -> None:
+        # Debe llamarse con el lock tomado
+        if self.memory_budget_bytes is None:
+            return
+        for clave in list(self._entradas):
+            if self._bytes_en_uso <= self.memory_budget_bytes:
+                break
+            if clave == conservar or self._fijado(clave):
+                continue
+            entrada = self._entradas.pop(clave)
+            self._bytes_en_uso -= entrada.size_bytes
+            self.evictions += 1
+            self.logger.info(f"Modelo {clave} expulsado de la caché ({entrada.size_bytes / 1024 ** 2:.1f} MB).")
+        if self._bytes_en_uso > self.memory_budget_bytes:
+            self.logger.warning(
+                f"La caché de modelos ocupa {self._bytes_en_uso / 1024 ** 2:.1f} MB y supera el presupuesto "
+                f"de {self.memory_budget_bytes / 1024 ** 2:.1f} MB con modelos fijados o en uso."
+            )
+
+    def __contains__(self, model_path: str) -> bool:
+        with self._lock:
+            return bool(self._claves_de(model_path))
+
+    def stats(self) -> dict:
+        """
+        Devuelve los contadores de la caché y las entradas residentes, de la más a la menos reciente.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+                "bytes_in_use": self._bytes_en_uso,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "models": [
+                    {"path": clave, "size_bytes": entrada.size_bytes, "pinned": self._fijado(clave)}
+                    for clave, entrada in reversed(self._entradas.items())
+                ],
+            }
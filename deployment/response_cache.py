@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Archivos cuyo cambio indica que el modelo se ha vuelto a entrenar
+_ARCHIVOS_MODELO = ("config.json", "generation_config.json", "adapter_config.json")
+_EXTENSIONES_PESOS = (".safetensors", ".bin")
+
+
+def model_version(model_path: str) -> float:
+    """
+    Devuelve la versión de un modelo como la fecha de modificación más reciente de sus pesos y configuración.
+
+    Args:
+        model_path (str): Ruta del directorio del modelo.
+
+    Returns:
+        float: Marca de tiempo; 0.0 si no se encuentran archivos del modelo.
+    """
+    version = 0.0
+    try:
+        with os.scandir(model_path) as entradas:
+            for entrada in entradas:
+                if entrada.is_file() and (entrada.name in _ARCHIVOS_MODELO or entrada.name.endswith(_EXTENSIONES_PESOS)):
+                    version = max(version, entrada.stat().st_mtime)
+    except FileNotFoundError:
+        pass
+    return version
+
+
+class _GeneracionAbandonada(Exception):
+    """
+    Se entrega a las solicitudes coalescidas cuando la que generaba la respuesta se cancela.
+    """
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normaliza un prompt para la clave de caché: espacios colapsados y sin espacios en los extremos.
+    """
+    return " ".join(prompt.split())
+
+
+class ResponseCache:
+    """
+    Caché de respuestas de /chat con expiración (TTL), límite de entradas y coalescencia single-flight.
+
+    Sólo se usa con decodificación determinista: con muestreo, cada llamada debe generar de nuevo.
+    La clave incluye la versión del modelo, así que al reentrenar un modelo sus entradas dejan de
+    usarse y se eliminan, y se notifica a los suscriptores de `on_invalidate`. La versión se lee
+    del disco como mucho cada `version_check_interval` segundos por modelo.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0, enabled: bool = True,
+                 version_check_interval: float = 5.0):
+        """
+        Args:
+            max_entries (int): Número máximo de respuestas guardadas.
+            ttl_seconds (float): Segundos que una respuesta sigue siendo válida.
+            enabled (bool): Si es False, todas las llamadas generan de nuevo.
+            version_check_interval (float): Segundos mínimos entre dos lecturas de la versión de un modelo.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.version_check_interval = version_check_interval
+        self._entradas: "OrderedDict[Tuple, Tuple[float, str]]" = OrderedDict()
+        self._en_vuelo: Dict[Tuple, asyncio.Future] = {}
+        # Por modelo: (versión, instante de la última comprobación)
+        self._versiones: Dict[str, Tuple[float, float]] = {}
+        self.on_invalidate: List[Callable[[str], None]] = []
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_config(cls, deployment_config: dict) -> "ResponseCache":
+        """
+        Crea la caché a partir de la sección `deployment.response_cache` de la configuración.
+        """
+        cache = deployment_config.get('response_cache', {}) or {}
+        return cls(
+            max_entries=int(cache.get('max_entries', 1024)),
+            ttl_seconds=float(cache.get('ttl_seconds', 3600)),
+            enabled=bool(cache.get('enabled', True)),
+            version_check_interval=float(cache.get('version_check_seconds', 5)),
+        )
+
+    def _comprobar_version(self, model_path: str) -> float:
+        ahora = time.monotonic()
+        anterior: Optional[Tuple[float, float]] = self._versiones.get(model_path)
+        if anterior is not None and ahora - anterior[1] < self.version_check_interval:
+            return anterior[0]
+        version = model_version(model_path)
+        if anterior is not None and anterior[0] != version:
+            self.invalidate(model_path)
+        self._versiones[model_path] = (version, ahora)
+        return version
+
+    def invalidate(self, model_path: str) -> None:
+        """
+        Elimina todas las respuestas de `model_path` y avisa a los suscriptores.
+        """
+        claves = [clave for clave in self._entradas if clave[0] == model_path]
+        for clave in claves:
+            del self._entradas[clave]
+        self.invalidations += 1
+        self.logger.info(f"Modelo {model_path} modificado: {len(claves)} respuestas en caché invalidadas.")
+        for callback in self.on_invalidate:
+            try:
+                callback(model_path)
+            except Exception as e:
+                self.logger.error(f"Error al notificar la invalidación de {model_path}: {str(e)}")
+
+    async def get_or_compute(
+        self,
+        model_path: str,
+        prompt: str,
+        params: dict,
+        compute: Callable[[], Awaitable[str]],
+        load_mode: str = "fp32",
+    ) -> str:
+        """
+        Devuelve la respuesta en caché o la genera con `compute`, compartiendo una única generación
+        entre solicitudes idénticas simultáneas.
+
+        Si la solicitud que está generando se cancela (p. ej. su cliente se desconecta), una de
+        las solicitudes que esperaban su resultado toma el relevo y genera la respuesta.
+
+        Args:
+            model_path (str): Ruta del directorio del modelo.
+            prompt (str): El texto de entrada.
+            params (dict): Parámetros de generación; si `do_sample` es verdadero no se usa la caché.
+            compute (Callable): Corrutina sin argumentos que genera la respuesta.
+            load_mode (str): Modo de carga del modelo; las respuestas de cada modo se guardan por separado.
+
+        Returns:
+            str: La respuesta generada.
+        """
+        model_path = os.path.normpath(model_path)
+        if not self.enabled or params.get("do_sample"):
+            return await compute()
+
+        version = self._comprobar_version(model_path)
+        clave = (model_path, version, load_mode, normalize_prompt(prompt), tuple(sorted(params.items())))
+
+        while True:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                guardado, respuesta = entrada
+                if time.monotonic() - guardado <= self.ttl_seconds:
+                    self._entradas.move_to_end(clave)
+                    self.hits += 1
+                    return respuesta
+                del self._entradas[clave]
+
+            en_vuelo = self._en_vuelo.get(clave)
+            if en_vuelo is None:
+                return await self._generar(clave, compute)
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(en_vuelo)
+            except _GeneracionAbandonada:
+                # La primera solicitud en despertar vuelve a generar y las demás se unen a ella
+                continue
+
+    async def _generar(self, clave: Tuple, compute: Callable[[], Awaitable[str]]) -> str:
+        self.misses += 1
+        futuro = asyncio.get_running_loop().create_future()
+        self._en_vuelo[clave] = futuro
+        try:
+            respuesta = await compute()
+        except asyncio.CancelledError:
+            futuro.set_exception(_GeneracionAbandonada())
+            futuro.exception()
+            raise
+        except BaseException as e:
+            futuro.set_exception(e)
+            # Evita el aviso de excepción no recuperada si nadie más esperaba
+            futuro.exception()
+            raise
+        else:
+            futuro.set_result(respuesta)
+            self._guardar(clave, respuesta)
+            return respuesta
+        finally:
+            del self._en_vuelo[clave]
+
+    def _guardar(self, clave: Tuple, respuesta: str) -> None:
+        self._entradas[clave] = (time.monotonic(), respuesta)
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.max_entries:
+            self._entradas.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entradas),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / total if total else 0.0,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,288 @@
+import asyncio
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional
+
+# Clases de trabajo, de mayor a menor prioridad
+CLASSES = ("interactive", "bulk", "training")
+_PRIORIDAD = {"interactive": 0, "bulk": 1, "training": 2}
+
+
+class AdmissionRejectedError(RuntimeError):
+    """
+    Se lanza cuando el planificador rechaza una solicitud.
+
+    `status_code` es 429 si la cola de esa clase está llena y 503 si la
+    espera estimada superaría el objetivo de latencia de la clase.
+    """
+    def __init__(self, message: str, status_code: int = 503, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    __slots__ = ("model", "clase", "seq", "future", "encolado", "admitido")
+
+    def __init__(self, model: str, clase: str, seq: int, future: asyncio.Future):
+        self.model = model
+        self.clase = clase
+        self.seq = seq
+        self.future = future
+        self.encolado = time.monotonic()
+        self.admitido: Optional[float] = None
+
+
+def _ejecutar_con_prioridad_baja(niceness: int, resultado: Future, fn: Callable, args: tuple) -> None:
+    if not resultado.set_running_or_notify_cancel():
+        return
+    try:
+        # En Linux la prioridad es por hilo: sólo baja este hilo y los que cree (p. ej. los de OpenMP)
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), niceness)
+    except (AttributeError, OSError):
+        pass
+    try:
+        resultado.set_result(fn(*args))
+    except BaseException as e:
+        resultado.set_exception(e)
+
+
+class AdmissionController:
+    """
+    Control de admisión y planificación por prioridad entre /chat, trabajos por lotes y entrenamiento.
+
+    Limita las solicitudes de inferencia en curso en total y por modelo, y reserva parte
+    de la capacidad para /chat: las solicitudes "bulk" nunca ocupan más de `max_bulk`
+    plazas. Cuando se libera una plaza se admite la solicitud en espera de mayor prioridad
+    cuyo modelo tenga hueco. Los entrenamientos tienen su propio límite y se ejecutan en
+    un hilo con menor prioridad del sistema operativo para no robar CPU a la inferencia.
+
+    Se usa desde el bucle de eventos; no es seguro llamarlo desde otros hilos.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 16,
+        max_per_model: int = 8,
+        max_bulk: int = 8,
+        max_training: int = 1,
+        max_queued: Optional[Dict[str, int]] = None,
+        slo_ms: Optional[Dict[str, Optional[float]]] = None,
+        training_niceness: int = 10,
+    ):
+        """
+        Args:
+            max_concurrent (int): Solicitudes de inferencia (interactive + bulk) admitidas a la vez.
+            max_per_model (int): Solicitudes de inferencia admitidas a la vez por modelo.
+            max_bulk (int): Plazas que pueden ocupar las solicitudes "bulk".
+            max_training (int): Entrenamientos simultáneos.
+            max_queued (Optional[Dict[str, int]]): Solicitudes en espera por clase antes de responder 429.
+            slo_ms (Optional[Dict[str, float]]): Espera máxima estimada por clase antes de responder 503;
+                None desactiva el rechazo por latencia para esa clase.
+            training_niceness (int): Valor `nice` del hilo de entrenamiento.
+        """
+        if max_concurrent < 1 or max_per_model < 1 or max_training < 1:
+            raise ValueError("Los límites de concurrencia deben ser al menos 1.")
+        self.logger = logging.getLogger(__name__)
+        self.limits = {
+            "interactive": max_concurrent,
+            "bulk": min(max_bulk, max_concurrent),
+            "training": max_training,
+        }
+        self.max_concurrent = max_concurrent
+        self.max_per_model = max_per_model
+        self.max_queued = {"interactive": 64, "bulk": 256, "training": 2, **(max_queued or {})}
+        self.slo_ms = {"interactive": 2000.0, "bulk": None, "training": None, **(slo_ms or {})}
+        self.training_niceness = training_niceness
+        self._secuencia = itertools.count()
+        self._esperando: List[_Ticket] = []
+        self._en_curso: Dict[str, int] = defaultdict(int)
+        self._por_modelo: Dict[str, int] = defaultdict(int)
+        # Media móvil exponencial del tiempo que cada clase ocupa una plaza, en segundos
+        self._servicio: Dict[str, float] = {}
+        self.admitted: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)
+
+    @classmethod
+    def from_config(cls, deployment_config: dict) -> "AdmissionController":
+        """
+        Crea el planificador a partir de la sección `deployment.scheduler` de la configuración.
+        """
+        scheduler = deployment_config.get('scheduler', {}) or {}
+        return cls(
+            max_concurrent=int(scheduler.get('max_concurrent', 16)),
+            max_per_model=int(scheduler.get('max_per_model', 8)),
+            max_bulk=int(scheduler.get('max_bulk', 8)),
+            max_training=int(scheduler.get('max_training', 1)),
+            max_queued=scheduler.get('max_queued') or None,
+            slo_ms=scheduler.get('slo_ms') or None,
+            training_niceness=int(scheduler.get('training_niceness', 10)),
+        )
+
+    def _inferencia_en_curso(self) -> int:
+        return self._en_curso["interactive"] + self._en_curso["bulk"]
+
+    def _hay_hueco(self, model: str, clase: str) -> bool:
+        if self._en_curso[clase] >= self.limits[clase]:
+            return False
+        if clase == "training":
+            return True
+        return self._inferencia_en_curso() < self.max_concurrent and self._por_modelo[model] < self.max_per_model
+
+    def _espera_estimada(self, clase: str) -> float:
+        """
+        Segundos que esperaría una solicitud nueva de `clase` antes de ser admitida.
+        """
+        delante = sum(1 for t in self._esperando if _PRIORIDAD[t.clase] <= _PRIORIDAD[clase])
+        limite = self.limits["training"] if clase == "training" else self.max_concurrent
+        return (delante + 1) / limite * self._servicio.get(clase, 0.0)
+
+    def check(self, model: str, clase: str) -> None:
+        """
+        Comprueba si se admitiría una solicitud sin encolarla.
+
+        Raises:
+            AdmissionRejectedError: 429 si la cola de la clase está llena, 503 si la espera
+                estimada supera el objetivo de latencia de la clase.
+        """
+        if clase not in CLASSES:
+            raise ValueError(f"Clase de trabajo no válida: {clase}. Opciones: {', '.join(CLASSES)}.")
+        if self._hay_hueco(model, clase) and not any(t.clase == clase for t in self._esperando):
+            return
+        en_cola = sum(1 for t in self._esperando if t.clase == clase)
+        if en_cola >= self.max_queued[clase]:
+            self.rejected[clase] += 1
+            raise AdmissionRejectedError(
+                f"Demasiadas solicitudes '{clase}' en espera ({en_cola}); inténtelo más tarde.",
+                status_code=429,
+                retry_after=max(1, math.ceil(self._espera_estimada(clase))),
+            )
+        slo = self.slo_ms.get(clase)
+        espera = self._espera_estimada(clase)
+        if slo is not None and espera * 1000 > slo:
+            self.rejected[clase] += 1
+            raise AdmissionRejectedError(
+                f"El servidor no puede atender la solicitud en el tiempo objetivo ({slo:.0f} ms); inténtelo más tarde.",
+                status_code=503,
+                retry_after=max(1, math.ceil(espera)),
+            )
+
+    async def acquire(self, model: str, clase: str = "interactive", shed: bool = True) -> _Ticket:
+        """
+        Espera a que la solicitud sea admitida y devuelve su ticket, que debe pasarse a `release`.
+
+        Args:
+            model (str): Modelo al que va dirigida la solicitud.
+            clase (str): "interactive", "bulk" o "training".
+            shed (bool): Si es False, la solicitud espera en lugar de ser rechazada (trabajos ya aceptados).
+
+        Raises:
+            AdmissionRejectedError: Si `shed` y la solicitud se rechaza.
+        """
+        if shed:
+            self.check(model, clase)
+        ticket = _Ticket(model, clase, next(self._secuencia), asyncio.get_running_loop().create_future())
+        self._esperando.append(ticket)
+        self._esperando.sort(key=lambda t: (_PRIORIDAD[t.clase], t.seq))
+        self._despachar()
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket in self._esperando:
+                self._esperando.remove(ticket)
+            elif ticket.admitido is not None:
+                # Se admitió justo cuando se canceló: la plaza se devuelve
+                self.release(ticket)
+            raise
+        return ticket
+
+    def _admitir(self, ticket: _Ticket) -> None:
+        ticket.admitido = time.monotonic()
+        self._en_curso[ticket.clase] += 1
+        if ticket.clase != "training":
+            self._por_modelo[ticket.model] += 1
+        self.admitted[ticket.clase] += 1
+
+    def release(self, ticket: _Ticket) -> None:
+        """
+        Libera la plaza de una solicitud admitida y admite las siguientes en espera.
+        """
+        if ticket.admitido is None:
+            return
+        duracion = time.monotonic() - ticket.admitido
+        anterior = self._servicio.get(ticket.clase)
+        self._servicio[ticket.clase] = duracion if anterior is None else 0.8 * anterior + 0.2 * duracion
+        ticket.admitido = None
+        self._en_curso[ticket.clase] -= 1
+        if ticket.clase != "training":
+            self._por_modelo[ticket.model] -= 1
+            if not self._por_modelo[ticket.model]:
+                del self._por_modelo[ticket.model]
+        self._despachar()
+
+    def _despachar(self) -> None:
+        # Se recorre toda la cola: un modelo sin hueco no bloquea a los demás
+        for ticket in list(self._esperando):
+            if self._hay_hueco(ticket.model, ticket.clase):
+                self._esperando.remove(ticket)
+                self._admitir(ticket)
+                ticket.future.set_result(None)
+
+    @asynccontextmanager
+    async def admit(self, model: str, clase: str = "interactive", shed: bool = True):
+        """
+        Bloque `async with` que ocupa una plaza del planificador mientras dura.
+        """
+        ticket = await self.acquire(model, clase, shed=shed)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    async def run_training(self, model: str, fn: Callable, *args):
+        """
+        Ejecuta un entrenamiento cuando hay plaza, en un hilo propio con menor prioridad del sistema.
+
+        Se usa un hilo nuevo en lugar del ejecutor por defecto porque la prioridad de un hilo
+        no puede volver a subirse sin privilegios.
+        """
+        async with self.admit(model, "training", shed=False):
+            resultado: Future = Future()
+            threading.Thread(
+                target=_ejecutar_con_prioridad_baja,
+                args=(self.training_niceness, resultado, fn, args),
+                name="training",
+                daemon=True,
+            ).start()
+            return await asyncio.wrap_future(resultado)
+
+    def stats(self) -> dict:
+        """
+        Devuelve las plazas ocupadas, las colas y los contadores de cada clase.
+        """
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_per_model": self.max_per_model,
+            "classes": {
+                clase: {
+                    "limit": self.limits[clase],
+                    "running": self._en_curso[clase],
+                    "queued": sum(1 for t in self._esperando if t.clase == clase),
+                    "max_queued": self.max_queued[clase],
+                    "slo_ms": self.slo_ms.get(clase),
+                    "estimated_wait_ms": 1000 * self._espera_estimada(clase),
+                    "avg_service_ms": 1000 * self._servicio.get(clase, 0.0),
+                    "admitted": self.admitted[clase],
+                    "rejected": self.rejected[clase],
+                }
+                for clase in CLASSES
+            },
+            "running_per_model": dict(self._por_modelo),
+        }
@@ -1,21 +1,72 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoTokenizer, StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
 import torch
+import functools
 import logging
 import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+from .adapters import AdapterManager, adapter_base_model, is_adapter
+from .metrics import GENERATED_TOKENS, PROMPT_TOKENS, STAGE_SECONDS, TOKENS_PER_SECOND
+from .mmap_loader import load_model_mmap, safetensors_files
+from .registry import ModelRegistry
+from .sessions import SessionStore
+from .speculative import SpeculativeStats, count_forward_passes
+from .streaming import consume_stream
+from .utils import LOAD_MODES
+
+def _kv_cache_bytes(past_key_values) -> int:
+    """
+    Calcula los bytes ocupados por una caché KV (`DynamicCache` o tuplas por capa).
+    """
+    if past_key_values is None:
+        return 0
+    if hasattr(past_key_values, "key_cache"):
+        tensores = list(past_key_values.key_cache) + list(past_key_values.value_cache)
+    else:
+        tensores = [t for capa in past_key_values for t in capa]
+    return sum(t.numel() * t.element_size() for t in tensores)
+
+class _CancelacionCriteria(StoppingCriteria):
+    """
+    Detiene `generate` en cuanto se activa el evento de cancelación (p. ej. el cliente se desconectó).
+    """
+    def __init__(self, cancelado: threading.Event):
+        self.cancelado = cancelado
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.cancelado.is_set()
+
+
+def metric_label(model_path: str) -> str:
+    """
+    Etiqueta `model` de las métricas: el nombre del directorio del modelo.
+    """
+    return os.path.basename(os.path.normpath(model_path))
 
 class ModelServer:
     """
     Un servidor para manejar la carga y predicción del modelo.
     """
-    _cache_modelo = {}
-    _cache_tokenizador = {}
+    registry = ModelRegistry()
+    speculative_stats = SpeculativeStats()
+    # Adaptadores LoRA residentes por modelo base y modelo base alternativo (p. ej. una copia local)
+    adapter_settings = {"max_adapters": 8, "base_model": None}
+    _adapters_lock = threading.Lock()
     
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, load_mode: str = "fp32", draft_model: Optional[str] = None):
         """
-        Inicializa el ServidorModelo cargando el modelo y el tokenizador.
+        Inicializa el ServidorModelo obteniendo el modelo y el tokenizador del registro de modelos.
         
         Args:
             model_path (str): Ruta del directorio del modelo ajustado.
+            load_mode (str): Precisión de carga si el modelo no está en caché: "fp32", "bf16" o "int8".
+            draft_model (Optional[str]): Ruta o identificador de un modelo borrador más pequeño, con el
+                mismo tokenizador, para decodificación especulativa en `predict_batch`.
+        
+        Si `model_path` es un adaptador LoRA, se carga (una sola vez) su modelo base y el
+        adaptador se activa por solicitud sobre él.
         
         Raises:
             FileNotFoundError: Si el directorio del modelo no existe.
@@ -23,36 +74,144 @@ class ModelServer:
         """
         self.logger = logging.getLogger(__name__)
         self.model_path = model_path
+        self.load_mode = load_mode
+        self.draft_model = draft_model
+        self.draft = None
+        self.adapters: Optional[AdapterManager] = None
+        self.adapter_path: Optional[str] = None
+        # Clave con la que el micro-batcher agrupa solicitudes; los adaptadores de un mismo base comparten lote
+        self.batch_key = f"{model_path}#{load_mode}"
+        # Ruta bajo la que el modelo está en el registro (el modelo base, con adaptadores)
+        self.registry_path = model_path
+        self.etiqueta = metric_label(model_path)
         
         if not os.path.exists(model_path):
             self.logger.error(f"La ruta del modelo {model_path} no existe.")
             raise FileNotFoundError(f"La ruta del modelo {model_path} no existe.")
         
         try:
-            # Cargar el tokenizador desde la caché o cargarlo y almacenarlo en caché
-            if model_path in self._cache_tokenizador:
-                self.tokenizador = self._cache_tokenizador[model_path]
-                self.logger.info(f"Tokenizador cargado desde la caché para {model_path}.")
+            if is_adapter(model_path):
+                self._cargar_adaptador(model_path, load_mode)
             else:
-                self.tokenizador = AutoTokenizer.from_pretrained(model_path)
-                self._cache_tokenizador[model_path] = self.tokenizador
-                self.logger.info(f"Tokenizador cargado y almacenado en caché para {model_path}.")
-            
-            # Cargar el modelo desde la caché o cargarlo y almacenarlo en caché
-            if model_path in self._cache_modelo:
-                self.modelo = self._cache_modelo[model_path]
-                self.logger.info(f"Modelo cargado desde la caché para {model_path}.")
-            else:
-                self.modelo = AutoModelForCausalLM.from_pretrained(model_path)
-                self.modelo.eval()
-                if torch.cuda.is_available():
-                    self.modelo.to('cuda')
-                self._cache_modelo[model_path] = self.modelo
-                self.logger.info(f"Modelo cargado y almacenado en caché para {model_path}.")
+                # El modo de carga forma parte de la clave: si cambia, el modelo se vuelve a cargar
+                self.modelo, self.tokenizador = self.registry.get(
+                    model_path, functools.partial(self._cargar, load_mode=load_mode), variant=load_mode
+                )
+            if draft_model and self.adapters is not None:
+                self.logger.warning(f"La decodificación especulativa no se usa con adaptadores LoRA ({model_path}).")
+            elif draft_model:
+                self.draft, _ = self.registry.get(
+                    draft_model, functools.partial(self._cargar, load_mode=load_mode), variant=load_mode
+                )
         except Exception as e:
             self.logger.error(f"No se pudo cargar el modelo o el tokenizador: {str(e)}")
             raise e
     
+    @staticmethod
+    def _cargar(model_path: str, load_mode: str = "fp32") -> Tuple[AutoModelForCausalLM, AutoTokenizer]:
+        """
+        Carga el modelo y el tokenizador desde disco. Lo invoca el registro sólo en un fallo de caché.
+        
+        Args:
+            model_path (str): Ruta del directorio del modelo.
+            load_mode (str): "fp32", "bf16" (pesos en bfloat16) o "int8" (cuantización dinámica
+                de las capas Linear, sólo en CPU).
+        
+        Raises:
+            ValueError: Si el modo de carga no es válido.
+        """
+        logger = logging.getLogger(__name__)
+        if load_mode not in LOAD_MODES:
+            raise ValueError(f"Modo de carga no válido: {load_mode}. Opciones: {', '.join(LOAD_MODES)}.")
+        inicio = time.perf_counter()
+        tokenizador = AutoTokenizer.from_pretrained(model_path)
+        # El tokenizador se comparte entre los hilos del pool: se configura una sola vez aquí y
+        # sus llamadas se serializan con su propio lock (el tokenizador rápido no admite usos concurrentes)
+        if tokenizador.pad_token is None:
+            tokenizador.pad_token = tokenizador.eos_token
+        tokenizador.padding_side = "left"
+        tokenizador._softia_lock = threading.Lock()
+        dtype = torch.bfloat16 if load_mode == "bf16" else torch.float32
+        modelo = None
+        if not torch.cuda.is_available() and safetensors_files(model_path):
+            # Pesos mapeados en memoria: carga casi instantánea y páginas compartidas entre procesos
+            try:
+                modelo = load_model_mmap(model_path, dtype=dtype)
+            except Exception as e:
+                logger.warning(f"No se pudo mapear en memoria {model_path}, se usa from_pretrained: {str(e)}")
+        if modelo is None:
+            modelo = AutoModelForCausalLM.from_pretrained(model_path, torch_dtype=dtype)
+        modelo.eval()
+        if load_mode == "int8":
+            # Los kernels de cuantización dinámica sólo existen para CPU
+            modelo = torch.ao.quantization.quantize_dynamic(modelo, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        elif torch.cuda.is_available():
+            modelo.to('cuda')
+        STAGE_SECONDS.observe(time.perf_counter() - inicio, model=metric_label(model_path), stage="load")
+        logger.info(f"Modelo y tokenizador cargados desde {model_path} en modo {load_mode}.")
+        return modelo, tokenizador
+
+    def _tokenizar(self, *args, **kwargs):
+        """
+        Codifica con el tokenizador compartido, sin que otro hilo lo use a la vez.
+        """
+        with self.tokenizador._softia_lock:
+            return self.tokenizador(*args, **kwargs)
+
+    def _cargar_adaptador(self, model_path: str, load_mode: str) -> None:
+        """
+        Obtiene el modelo base compartido del registro y el gestor de adaptadores asociado a él.
+        """
+        base = self.adapter_settings["base_model"] or adapter_base_model(model_path)
+        if load_mode == "int8":
+            # peft no inyecta capas LoRA en las capas Linear cuantizadas dinámicamente
+            self.logger.warning(f"Los adaptadores LoRA no admiten el modo int8; {base} se carga en fp32.")
+            load_mode = "fp32"
+        # Clave propia: peft modifica el modelo base, que no debe servirse a la vez sin adaptar
+        self.batch_key = f"{base}#lora-{load_mode}"
+        self.registry_path = base
+        self.modelo, self.tokenizador = self.registry.get(
+            base, functools.partial(self._cargar, load_mode=load_mode), variant=f"lora-{load_mode}"
+        )
+        with self._adapters_lock:
+            gestor = getattr(self.modelo, "_softia_adapters", None)
+            if gestor is None:
+                gestor = AdapterManager(self.modelo, max_adapters=self.adapter_settings["max_adapters"])
+                self.modelo._softia_adapters = gestor
+        self.adapters = gestor
+        self.adapter_path = model_path
+
+    @classmethod
+    def configure_adapters(cls, max_adapters: int = 8, base_model: Optional[str] = None) -> None:
+        """
+        Ajusta los adaptadores residentes por modelo base y el modelo base alternativo.
+        """
+        cls.adapter_settings = {"max_adapters": max_adapters, "base_model": base_model}
+
+    @contextmanager
+    def _generador(self, num_sequences: int = 1, adapter_paths: Optional[List[str]] = None):
+        """
+        Devuelve el modelo con el que generar y los argumentos extra de `generate`.
+
+        Con adaptadores, el modelo es el `PeftModel` compartido y `adapter_names` indica el
+        adaptador de cada secuencia, de modo que un lote puede mezclar adaptadores.
+        """
+        if self.adapters is None:
+            yield self.modelo, {}
+            return
+        with self.adapters.use(adapter_paths or [self.adapter_path] * num_sequences) as nombres:
+            yield self.adapters.model, {"adapter_names": nombres}
+
+    def _registrar_generacion(self, prompt_tokens: int, generated_tokens: int, seconds: float) -> None:
+        """
+        Registra el tiempo de `generate` y los tokens procesados en las métricas del modelo.
+        """
+        STAGE_SECONDS.observe(seconds, model=self.etiqueta, stage="generate")
+        PROMPT_TOKENS.inc(prompt_tokens, model=self.etiqueta)
+        GENERATED_TOKENS.inc(generated_tokens, model=self.etiqueta)
+        if seconds > 0 and generated_tokens:
+            TOKENS_PER_SECOND.observe(generated_tokens / seconds, model=self.etiqueta)
+    
     def predict(self, prompt: str, max_length: int = 1024, num_return_sequences: int = 1) -> str:
         """
         Genera una predicción basada en el texto de entrada (prompt).
@@ -70,22 +229,277 @@ class ModelServer:
         """
         self.logger.info(f"Prompt recibido: {prompt}")
         try:
-            entradas = self.tokenizador(prompt, return_tensors="pt")
+            with STAGE_SECONDS.time(model=self.etiqueta, stage="tokenize"):
+                entradas = self._tokenizar(prompt, return_tensors="pt")
             if torch.cuda.is_available():
                 entradas = {k: v.to('cuda') for k, v in entradas.items()}
             
-            with torch.no_grad():
-                salidas = self.modelo.generate(
+            inicio = time.perf_counter()
+            with torch.no_grad(), self._generador() as (modelo, extra):
+                salidas = modelo.generate(
                     **entradas,
+                    **extra,
                     max_length=max_length,
                     num_return_sequences=num_return_sequences,
                     no_repeat_ngram_size=2,
                     early_stopping=True
                 )
+            longitud_prompt = entradas["input_ids"].shape[-1]
+            self._registrar_generacion(
+                longitud_prompt, salidas.shape[0] * (salidas.shape[-1] - longitud_prompt), time.perf_counter() - inicio
+            )
             
-            prediccion = self.tokenizador.decode(salidas[0], skip_special_tokens=True)
+            with STAGE_SECONDS.time(model=self.etiqueta, stage="decode"):
+                with self.tokenizador._softia_lock:
+                    prediccion = self.tokenizador.decode(salidas[0], skip_special_tokens=True)
             self.logger.info(f"Predicción generada: {prediccion}")
             return prediccion
         except Exception as e:
             self.logger.error(f"La predicción falló: {str(e)}")
             raise e
+
+    def predict_batch(self, prompts: List[str], max_length: int = 1024, adapter_paths: Optional[List[str]] = None) -> List[str]:
+        """
+        Genera predicciones para varios prompts en una única llamada a `generate`.
+        
+        Los prompts se rellenan por la izquierda para que todas las secuencias del lote
+        continúen generando desde su último token real.
+        
+        Args:
+            prompts (List[str]): Los textos de entrada.
+            max_length (int): La longitud máxima de la secuencia generada (incluye el relleno).
+            adapter_paths (Optional[List[str]]): Con adaptadores LoRA, el adaptador de cada prompt
+                (todos deben compartir el modelo base); por defecto, el de este servidor.
+        
+        Returns:
+            List[str]: Una predicción por prompt, en el mismo orden.
+        
+        Raises:
+            Exception: Si la predicción falla.
+        """
+        self.logger.info(f"Lote de {len(prompts)} prompts recibido.")
+        if self.draft is not None and self.adapters is None:
+            # La generación asistida sólo admite un prompt por llamada
+            return [self._predict_asistido(prompt, max_length) for prompt in prompts]
+        try:
+            with STAGE_SECONDS.time(model=self.etiqueta, stage="tokenize"), self.tokenizador._softia_lock:
+                # El relleno se aplica aparte (`pad`, en Python) para no cambiar el estado de relleno
+                # del tokenizador de Rust, que TextIteratorStreamer lee sin lock desde otros hilos
+                entradas = self.tokenizador.pad(self.tokenizador(prompts), return_tensors="pt")
+            if torch.cuda.is_available():
+                entradas = {k: v.to('cuda') for k, v in entradas.items()}
+            
+            inicio = time.perf_counter()
+            with torch.no_grad(), self._generador(len(prompts), adapter_paths) as (modelo, extra):
+                salidas = modelo.generate(
+                    **entradas,
+                    **extra,
+                    max_length=max_length,
+                    pad_token_id=self.tokenizador.pad_token_id,
+                    no_repeat_ngram_size=2,
+                    early_stopping=True
+                )
+            # El relleno no cuenta: los tokens nuevos iguales a pad son finales de secuencia ya terminada
+            generados = salidas[:, entradas["input_ids"].shape[-1]:]
+            self._registrar_generacion(
+                int(entradas["attention_mask"].sum()),
+                int((generados != self.tokenizador.pad_token_id).sum()),
+                time.perf_counter() - inicio,
+            )
+            
+            with STAGE_SECONDS.time(model=self.etiqueta, stage="decode"):
+                with self.tokenizador._softia_lock:
+                    predicciones = self.tokenizador.batch_decode(salidas, skip_special_tokens=True)
+            self.logger.info(f"{len(predicciones)} predicciones generadas en lote.")
+            return predicciones
+        except Exception as e:
+            self.logger.error(f"La predicción en lote falló: {str(e)}")
+            raise e
+
+    def token_lengths(self, prompts: List[str]) -> List[int]:
+        """
+        Devuelve el número de tokens de cada prompt.
+        """
+        return [len(ids) for ids in self._tokenizar(prompts)["input_ids"]]
+
+    def _predict_asistido(self, prompt: str, max_length: int) -> str:
+        """
+        Genera con decodificación especulativa: el modelo borrador propone tokens y el modelo
+        objetivo los verifica en una sola pasada. Registra la tasa de aceptación del borrador.
+        """
+        try:
+            with STAGE_SECONDS.time(model=self.etiqueta, stage="tokenize"):
+                entradas = self._tokenizar(prompt, return_tensors="pt")
+            if torch.cuda.is_available():
+                entradas = {k: v.to('cuda') for k, v in entradas.items()}
+            
+            inicio = time.perf_counter()
+            with torch.no_grad(), count_forward_passes(self.modelo, self.draft) as pasadas:
+                salidas = self.modelo.generate(
+                    **entradas,
+                    assistant_model=self.draft,
+                    max_length=max_length,
+                    pad_token_id=self.tokenizador.pad_token_id or self.tokenizador.eos_token_id,
+                    no_repeat_ngram_size=2
+                )
+            duracion = time.perf_counter() - inicio
+            
+            nuevos = salidas.shape[-1] - entradas["input_ids"].shape[-1]
+            self.speculative_stats.record(self.model_path, nuevos, pasadas[0], pasadas[1], duracion)
+            self._registrar_generacion(entradas["input_ids"].shape[-1], nuevos, duracion)
+            with STAGE_SECONDS.time(model=self.etiqueta, stage="decode"):
+                with self.tokenizador._softia_lock:
+                    prediccion = self.tokenizador.decode(salidas[0], skip_special_tokens=True)
+            self.logger.info(f"Predicción asistida generada ({nuevos} tokens, {pasadas[0]} pasadas del modelo objetivo).")
+            return prediccion
+        except Exception as e:
+            self.logger.error(f"La predicción asistida falló: {str(e)}")
+            raise e
+
+    def predict_stream(self, prompt: str, max_length: int = 1024, cancelado: Optional[threading.Event] = None, executor=None) -> Iterator[str]:
+        """
+        Inicia una generación y devuelve un iterador con los fragmentos de texto a medida que se producen.
+        
+        La generación arranca antes de devolver el iterador, en `executor` si se indica
+        (p. ej. `InferencePool`) o en un hilo propio; si `cancelado` se activa, se detiene en
+        el siguiente token para liberar la CPU.
+        
+        Args:
+            prompt (str): El texto de entrada.
+            max_length (int): La longitud máxima de la secuencia generada.
+            cancelado (Optional[threading.Event]): Evento para interrumpir la generación.
+            executor: Objeto con `submit(fn)` donde ejecutar `generate`.
+        
+        Returns:
+            Iterator[str]: Fragmentos del texto generado, sin repetir el prompt.
+        
+        Raises:
+            InferenceQueueFullError: Si `executor` rechaza la tarea.
+            Exception: Si la predicción falla (al consumir el iterador).
+        """
+        self.logger.info(f"Prompt recibido (streaming): {prompt}")
+        cancelado = cancelado or threading.Event()
+        with STAGE_SECONDS.time(model=self.etiqueta, stage="tokenize"):
+            entradas = self._tokenizar(prompt, return_tensors="pt")
+        if torch.cuda.is_available():
+            entradas = {k: v.to('cuda') for k, v in entradas.items()}
+        streamer = TextIteratorStreamer(self.tokenizador, skip_prompt=True, skip_special_tokens=True)
+        error = []
+        terminado = threading.Event()
+
+        def _generar():
+            try:
+                inicio = time.perf_counter()
+                with torch.no_grad(), self._generador() as (modelo, extra):
+                    salidas = modelo.generate(
+                        **entradas,
+                        **extra,
+                        max_length=max_length,
+                        no_repeat_ngram_size=2,
+                        streamer=streamer,
+                        stopping_criteria=StoppingCriteriaList([_CancelacionCriteria(cancelado)])
+                    )
+                longitud_prompt = entradas["input_ids"].shape[-1]
+                self._registrar_generacion(longitud_prompt, salidas.shape[-1] - longitud_prompt, time.perf_counter() - inicio)
+            except Exception as e:
+                self.logger.error(f"La predicción en streaming falló: {str(e)}")
+                error.append(e)
+                # Desbloquea al consumidor que espera el siguiente fragmento
+                streamer.end()
+            finally:
+                terminado.set()
+
+        if executor is not None:
+            executor.submit(_generar)
+        else:
+            threading.Thread(target=_generar, daemon=True).start()
+        return self._consumir_stream(streamer, cancelado, terminado, error)
+
+    def _consumir_stream(self, streamer: TextIteratorStreamer, cancelado: threading.Event,
+                         terminado: threading.Event, error: list) -> Iterator[str]:
+        yield from consume_stream(streamer, cancelado, terminado, error)
+        self.logger.info("Predicción en streaming completada.")
+
+    def chat_turn(self, sesiones: SessionStore, session_id: str, message: str,
+                  max_new_tokens: int = 256, context_window: Optional[int] = None) -> str:
+        """
+        Responde a un turno de una conversación reutilizando la caché KV de los turnos anteriores.
+        
+        Sólo se hace prefill de los tokens nuevos. Si el historial más la respuesta no caben en
+        la ventana de contexto, se conserva la parte final del historial y se recalcula la caché.
+        
+        Args:
+            sesiones (SessionStore): Almacén de sesiones.
+            session_id (str): Identificador de la conversación.
+            message (str): El mensaje del usuario en este turno.
+            max_new_tokens (int): Número máximo de tokens a generar.
+            context_window (Optional[int]): Tokens máximos de la conversación; por defecto
+                `max_position_embeddings` del modelo.
+        
+        Returns:
+            str: La respuesta generada para este turno.
+        
+        Raises:
+            Exception: Si la predicción falla.
+        """
+        sesion = sesiones.get(session_id, self.model_path)
+        with sesion.lock:
+            self.logger.info(f"Turno {sesion.turns + 1} de la sesión {session_id}: {message}")
+            # Mismo formato de instrucción que se usa al ajustar el modelo
+            texto = f"Instrucción: {message}\nRespuesta:"
+            if sesion.input_ids is not None:
+                texto = "\n" + texto
+            with STAGE_SECONDS.time(model=self.etiqueta, stage="tokenize"):
+                nuevos = self._tokenizar(
+                    texto, return_tensors="pt", add_special_tokens=sesion.input_ids is None
+                )["input_ids"].to(self.modelo.device)
+
+            input_ids = nuevos if sesion.input_ids is None else torch.cat([sesion.input_ids, nuevos], dim=-1)
+            past_key_values = sesion.past_key_values
+
+            limite = context_window or getattr(self.modelo.config, "max_position_embeddings", 2048)
+            if input_ids.shape[-1] + max_new_tokens > limite:
+                # Ventana deslizante: se descartan los tokens más antiguos y la caché deja de ser válida
+                conservar = max(limite - max_new_tokens, 1)
+                input_ids = input_ids[:, -conservar:]
+                past_key_values = None
+                self.logger.info(f"Historial de la sesión {session_id} truncado a {conservar} tokens.")
+
+            try:
+                inicio = time.perf_counter()
+                with torch.no_grad(), self._generador() as (modelo, extra):
+                    salidas = modelo.generate(
+                        **extra,
+                        input_ids=input_ids,
+                        attention_mask=torch.ones_like(input_ids),
+                        past_key_values=past_key_values,
+                        max_new_tokens=max_new_tokens,
+                        no_repeat_ngram_size=2,
+                        pad_token_id=self.tokenizador.pad_token_id or self.tokenizador.eos_token_id,
+                        use_cache=True,
+                        return_dict_in_generate=True,
+                    )
+            except Exception as e:
+                # La caché puede haber quedado a medio actualizar; el historial sigue siendo válido
+                sesion.drop_cache()
+                self.logger.error(f"La predicción de la sesión {session_id} falló: {str(e)}")
+                raise e
+
+            secuencia = salidas.sequences
+            # Con caché sólo se hace prefill de los tokens que no estaban en ella
+            prefill = input_ids.shape[-1] - (sesion.input_ids.shape[-1] if past_key_values is not None else 0)
+            self._registrar_generacion(prefill, secuencia.shape[-1] - input_ids.shape[-1], time.perf_counter() - inicio)
+            sesiones.update(sesion, secuencia, salidas.past_key_values, _kv_cache_bytes(salidas.past_key_values))
+            with STAGE_SECONDS.time(model=self.etiqueta, stage="decode"):
+                with self.tokenizador._softia_lock:
+                    respuesta = self.tokenizador.decode(secuencia[0, input_ids.shape[-1]:], skip_special_tokens=True).strip()
+            self.logger.info(f"Respuesta de la sesión {session_id}: {respuesta}")
+            return respuesta
+
+    @staticmethod
+    def configure_threads(num_threads: int) -> None:
+        """
+        Fija el número de hilos intra-op de torch; se usa como inicializador de los workers de inferencia.
+        """
+        torch.set_num_threads(num_threads)
+        logging.getLogger(__name__).info(f"Hilos de torch por worker de inferencia: {num_threads}.")
@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class ChatSession:
+    """
+    Estado de una conversación: los tokens vistos hasta ahora y su caché KV.
+    """
+
+    def __init__(self, session_id: str, model_path: str):
+        self.session_id = session_id
+        self.model_path = model_path
+        self.input_ids: Any = None
+        self.past_key_values: Any = None
+        self.kv_bytes = 0
+        self.turns = 0
+        self.last_used = time.monotonic()
+        # Serializa los turnos de una misma conversación
+        self.lock = threading.Lock()
+
+    def drop_cache(self) -> None:
+        """
+        Libera la caché KV conservando el historial: el próximo turno rehace el prefill completo.
+        """
+        self.past_key_values = None
+        self.kv_bytes = 0
+
+
+class SessionStore:
+    """
+    Almacén de sesiones de chat con expiración por inactividad y presupuesto de memoria KV.
+
+    Las sesiones inactivas más de `ttl_seconds` se descartan, y si la suma de las cachés KV
+    supera `kv_budget_mb` se libera la caché de las sesiones usadas hace más tiempo.
+    """
+
+    def __init__(self, ttl_seconds: float = 1800.0, kv_budget_mb: Optional[float] = None):
+        """
+        Args:
+            ttl_seconds (float): Segundos de inactividad tras los que se elimina una sesión.
+            kv_budget_mb (Optional[float]): Memoria máxima para las cachés KV, en MB. `None` = sin límite.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.ttl_seconds = ttl_seconds
+        self.kv_budget_bytes = int(kv_budget_mb * 1024 * 1024) if kv_budget_mb else None
+        self._sesiones: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+
+    @classmethod
+    def from_config(cls, deployment_config: dict) -> "SessionStore":
+        """
+        Crea el almacén a partir de la sección `deployment.sessions` de la configuración.
+        """
+        sessions = deployment_config.get('sessions', {}) or {}
+        return cls(
+            ttl_seconds=float(sessions.get('ttl_seconds', 1800)),
+            kv_budget_mb=sessions.get('kv_budget_mb'),
+        )
+
+    def get(self, session_id: str, model_path: str) -> ChatSession:
+        """
+        Devuelve la sesión `session_id`, creándola si no existe o si pertenecía a otro modelo.
+        """
+        with self._lock:
+            self._expirar()
+            sesion = self._sesiones.get(session_id)
+            if sesion is None or sesion.model_path != model_path:
+                sesion = ChatSession(session_id, model_path)
+                self._sesiones[session_id] = sesion
+                self.logger.info(f"Nueva sesión de chat {session_id} para {model_path}.")
+            self._sesiones.move_to_end(session_id)
+            sesion.last_used = time.monotonic()
+            return sesion
+
+    def update(self, sesion: ChatSession, input_ids: Any, past_key_values: Any, kv_bytes: int) -> None:
+        """
+        Guarda el nuevo estado de la sesión tras un turno y aplica el presupuesto de memoria KV.
+        """
+        with self._lock:
+            sesion.input_ids = input_ids
+            sesion.past_key_values = past_key_values
+            sesion.kv_bytes = kv_bytes
+            sesion.turns += 1
+            sesion.last_used = time.monotonic()
+            self._aplicar_presupuesto(conservar=sesion.session_id)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sesiones.pop(session_id, None) is not None
+
+    def _expirar(self) -> None:
+        # Debe llamarse con el lock tomado; las sesiones están ordenadas por último uso
+        limite = time.monotonic() - self.ttl_seconds
+        while self._sesiones:
+            session_id, sesion = next(iter(self._sesiones.items()))
+            if sesion.last_used >= limite:
+                break
+            del self._sesiones[session_id]
+            self.expired += 1
+            self.logger.info(f"Sesión de chat {session_id} expirada por inactividad.")
+
+    def _aplicar_presupuesto(self, conservar: str) -> None:
+        # Debe llamarse con el lock tomado
+        if self.kv_budget_bytes is None:
+            return
+        total = sum(s.kv_bytes for s in self._sesiones.values())
+        for session_id, sesion in self._sesiones.items():
+            if total <= self.kv_budget_bytes:
+                break
+            if session_id == conservar or not sesion.kv_bytes:
+                continue
+            total -= sesion.kv_bytes
+            # Se conserva la sesión y su historial pero se libera su caché: el próximo turno vuelve a hacer prefill
+            sesion.drop_cache()
+            self.evicted += 1
+            self.logger.info(f"Caché KV de la sesión {session_id} liberada por presupuesto de memoria.")
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expirar()
+            return {
+                "sessions": len(self._sesiones),
+                "kv_bytes": sum(s.kv_bytes for s in self._sesiones.values()),
+                "kv_budget_bytes": self.kv_budget_bytes,
+                "expired": self.expired,
+                "kv_evictions": self.evicted,
+            }
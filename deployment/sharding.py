@@ -0,0 +1,347 @@
+import asyncio
+import bisect
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .workers import InferenceQueueFullError
+
+POLICIES = ("consistent_hash", "least_loaded")
+
+
+def _hash(valor: str) -> int:
+    return int(hashlib.md5(valor.encode("utf-8")).hexdigest()[:16], 16)
+
+
+def split_cores(cores: List[int], num_workers: int) -> List[List[int]]:
+    """
+    Reparte los núcleos disponibles en bloques contiguos, uno por worker.
+
+    Si hay menos núcleos que workers, varios workers comparten núcleo.
+    """
+    if len(cores) < num_workers:
+        return [[cores[i % len(cores)]] for i in range(num_workers)]
+    tamano, resto = divmod(len(cores), num_workers)
+    bloques, inicio = [], 0
+    for i in range(num_workers):
+        fin = inicio + tamano + (1 if i < resto else 0)
+        bloques.append(cores[inicio:fin])
+        inicio = fin
+    return bloques
+
+
+def _worker_main(indice: int, cores: List[int], torch_threads: int, peticiones, respuestas, deployment_config: dict) -> None:
+    """
+    Bucle de un proceso worker: atiende las solicitudes de los modelos que tiene asignados.
+
+    Cada worker tiene su propio registro de modelos y su propio agrupador de lotes, de modo
+    que las solicitudes concurrentes de un mismo modelo siguen compartiendo `generate`.
+    """
+    # Importados aquí: sólo los procesos worker cargan torch y transformers
+    from .batching import MicroBatcher
+    from .serve_model import ModelServer
+
+    logger = logging.getLogger(__name__)
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    ModelServer.configure_threads(torch_threads)
+    model_cache = deployment_config.get('model_cache', {}) or {}
+    ModelServer.registry.configure(memory_budget_mb=model_cache.get('memory_budget_mb'))
+    batcher = MicroBatcher.from_config(deployment_config)
+    logger.info(f"Worker {indice} (pid {os.getpid()}) listo en los núcleos {cores} con {torch_threads} hilos.")
+
+    def atender(request_id, model_path, load_mode, draft_model, prompt, max_length):
+        try:
+            server = ModelServer(model_path, load_mode, draft_model)
+            respuesta = batcher.submit(server, prompt, max_length=max_length).result()
+            respuestas.put((request_id, respuesta, None))
+        except Exception as e:
+            respuestas.put((request_id, None, f"{type(e).__name__}: {str(e)}"))
+
+    # Los hilos sólo esperan a la carga o al lote; el cómputo lo limita torch_threads
+    with ThreadPoolExecutor(max_workers=32, thread_name_prefix=f"shard-{indice}") as ejecutor:
+        while True:
+            mensaje = peticiones.get()
+            if mensaje is None:
+                break
+            ejecutor.submit(atender, *mensaje)
+
+
+class ShardedModelRouter:
+    """
+    Reparte las solicitudes de /chat entre procesos worker, cada uno dueño de un subconjunto de modelos.
+
+    Un modelo siempre se atiende en el mismo worker (afinidad), así que sus pesos se cargan
+    una sola vez en todo el servidor. Cada worker se fija a su propio bloque de núcleos y usa
+    tantos hilos de torch como núcleos tiene, escapando del GIL y del pool de hilos compartido.
+
+    Un hilo vigila los procesos: si un worker muere, sus solicitudes pendientes fallan de
+    inmediato y se arranca otro proceso en su lugar, que hereda sus modelos asignados.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 2,
+        policy: str = "consistent_hash",
+        pin_cores: bool = True,
+        max_pending_per_worker: int = 64,
+        deployment_config: Optional[dict] = None,
+        virtual_nodes: int = 64,
+        request_timeout_seconds: Optional[float] = 300.0,
+        monitor_interval_seconds: float = 0.5,
+    ):
+        """
+        Args:
+            num_workers (int): Número de procesos worker.
+            policy (str): "consistent_hash" (anillo de hash) o "least_loaded" (el worker con
+                menos trabajo pendiente al ver el modelo por primera vez).
+            pin_cores (bool): Si se fija cada worker a un bloque de núcleos.
+            max_pending_per_worker (int): Solicitudes pendientes por worker antes de rechazar con 503.
+            deployment_config (Optional[dict]): Sección `deployment`, que se pasa a los workers.
+            virtual_nodes (int): Nodos virtuales por worker en el anillo de hash.
+            request_timeout_seconds (Optional[float]): Tiempo máximo de espera de `predict`; None sin límite.
+            monitor_interval_seconds (float): Cada cuánto se comprueba que los workers siguen vivos.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Política de enrutado no válida: {policy}. Opciones: {', '.join(POLICIES)}.")
+        if num_workers < 1:
+            raise ValueError("num_workers debe ser al menos 1.")
+        self.logger = logging.getLogger(__name__)
+        self.num_workers = num_workers
+        self.policy = policy
+        self.pin_cores = pin_cores
+        self.max_pending_per_worker = max_pending_per_worker
+        self.deployment_config = deployment_config or {}
+        self.request_timeout_seconds = request_timeout_seconds
+        self.monitor_interval_seconds = monitor_interval_seconds
+        self._anillo = sorted(
+            (_hash(f"worker-{w}-{v}"), w) for w in range(num_workers) for v in range(virtual_nodes)
+        )
+        self._claves_anillo = [clave for clave, _ in self._anillo]
+        self._asignaciones: Dict[str, int] = {}
+        self._pendientes = [0] * num_workers
+        self._futuros: Dict[int, tuple] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._procesos: List[multiprocessing.Process] = []
+        self._colas = []
+        self._bloques: List[List[int]] = []
+        self._contexto = None
+        self._respuestas = None
+        self._iniciado = False
+        self._detener = threading.Event()
+        self.restarts = 0
+
+    @classmethod
+    def from_config(cls, deployment_config: dict) -> "ShardedModelRouter":
+        """
+        Crea el enrutador a partir de la sección `deployment.sharding` de la configuración.
+        """
+        sharding = deployment_config.get('sharding', {}) or {}
+        return cls(
+            num_workers=int(sharding.get('num_workers', 2)),
+            policy=sharding.get('policy', 'consistent_hash'),
+            pin_cores=bool(sharding.get('pin_cores', True)),
+            max_pending_per_worker=int(sharding.get('max_pending_per_worker', 64)),
+            deployment_config=deployment_config,
+            request_timeout_seconds=sharding.get('request_timeout_seconds', 300),
+        )
+
+    def start(self) -> None:
+        """
+        Arranca los procesos worker, el hilo que recoge sus respuestas y el que los vigila.
+        """
+        with self._lock:
+            if self._iniciado:
+                return
+            # spawn evita heredar el estado de hilos de torch del proceso principal
+            self._contexto = multiprocessing.get_context("spawn")
+            if hasattr(os, "sched_getaffinity"):
+                cores = sorted(os.sched_getaffinity(0))
+            else:
+                cores = list(range(os.cpu_count() or 1))
+            self._bloques = split_cores(cores, self.num_workers)
+            self._colas, self._procesos = [], []
+            self._respuestas = self._contexto.Queue()
+            for indice in range(self.num_workers):
+                cola, proceso = self._lanzar_worker(indice)
+                self._colas.append(cola)
+                self._procesos.append(proceso)
+            self._detener.clear()
+            threading.Thread(target=self._recoger_respuestas, name="shard-router", daemon=True).start()
+            threading.Thread(target=self._vigilar_workers, name="shard-monitor", daemon=True).start()
+            self._iniciado = True
+        self.logger.info(f"{self.num_workers} workers de modelos iniciados con la política {self.policy}.")
+
+    def _lanzar_worker(self, indice: int):
+        """
+        Arranca el proceso worker `indice` con una cola de peticiones propia y devuelve ambos.
+        """
+        bloque = self._bloques[indice]
+        cola = self._contexto.Queue()
+        proceso = self._contexto.Process(
+            target=_worker_main,
+            args=(indice, bloque if self.pin_cores else [], len(bloque), cola, self._respuestas, self.deployment_config),
+            name=f"model-shard-{indice}",
+            daemon=True,
+        )
+        proceso.start()
+        return cola, proceso
+
+    def shutdown(self) -> None:
+        """
+        Detiene los procesos worker.
+        """
+        with self._lock:
+            if not self._iniciado:
+                return
+            self._iniciado = False
+            self._detener.set()
+            procesos = self._procesos
+            for cola in self._colas:
+                cola.put(None)
+        # Sin el lock: el hilo recolector debe poder seguir atendiendo las últimas respuestas
+        for proceso in procesos:
+            proceso.join(timeout=10)
+        self._respuestas.put(None)
+
+    def _vigilar_workers(self) -> None:
+        while not self._detener.wait(self.monitor_interval_seconds):
+            for indice in range(self.num_workers):
+                if not self._procesos[indice].is_alive():
+                    self._reiniciar_worker(indice)
+
+    def _reiniciar_worker(self, indice: int) -> None:
+        with self._lock:
+            if not self._iniciado or self._procesos[indice].is_alive():
+                return
+            codigo = self._procesos[indice].exitcode
+            perdidos = [rid for rid, (_, worker) in self._futuros.items() if worker == indice]
+            futuros = [self._futuros.pop(rid)[0] for rid in perdidos]
+            self._pendientes[indice] = 0
+            # Cola nueva: la del proceso muerto puede haber quedado inconsistente
+            self._colas[indice], self._procesos[indice] = self._lanzar_worker(indice)
+            self.restarts += 1
+        self.logger.error(
+            f"El worker {indice} terminó inesperadamente (código {codigo}); "
+            f"{len(futuros)} solicitudes pendientes fallidas y worker reiniciado."
+        )
+        for futuro in futuros:
+            self._resolver(futuro, error=f"El worker {indice} terminó inesperadamente (código {codigo}).")
+
+    def worker_for(self, model_path: str) -> int:
+        """
+        Devuelve el worker que atiende `model_path`, asignándolo según la política si es nuevo.
+        """
+        clave = os.path.normpath(model_path)
+        with self._lock:
+            return self._asignar(clave)
+
+    def _asignar(self, clave: str) -> int:
+        # Debe llamarse con el lock tomado
+        worker = self._asignaciones.get(clave)
+        if worker is not None:
+            return worker
+        if self.policy == "consistent_hash":
+            posicion = bisect.bisect(self._claves_anillo, _hash(clave)) % len(self._anillo)
+            worker = self._anillo[posicion][1]
+        else:
+            modelos_por_worker = [0] * self.num_workers
+            for asignado in self._asignaciones.values():
+                modelos_por_worker[asignado] += 1
+            worker = min(range(self.num_workers), key=lambda w: (self._pendientes[w], modelos_por_worker[w]))
+        self._asignaciones[clave] = worker
+        self.logger.info(f"Modelo {clave} asignado al worker {worker}.")
+        return worker
+
+    def submit(self, model_path: str, prompt: str, load_mode: str = "fp32", max_length: int = 1024,
+               draft_model: Optional[str] = None) -> Future:
+        """
+        Envía un prompt al worker dueño de `model_path`.
+
+        Returns:
+            Future: Se resuelve con el texto generado.
+
+        Raises:
+            InferenceQueueFullError: Si el worker tiene demasiadas solicitudes pendientes.
+        """
+        if not self._iniciado:
+            self.start()
+        futuro: Future = Future()
+        with self._lock:
+            worker = self._asignar(os.path.normpath(model_path))
+            if self._pendientes[worker] >= self.max_pending_per_worker:
+                raise InferenceQueueFullError(
+                    f"El worker {worker} está saturado, inténtelo de nuevo más tarde.", retry_after=1
+                )
+            request_id = next(self._ids)
+            self._futuros[request_id] = (futuro, worker)
+            self._pendientes[worker] += 1
+            cola = self._colas[worker]
+        cola.put((request_id, model_path, load_mode, draft_model, prompt, max_length))
+        return futuro
+
+    async def predict(self, model_path: str, prompt: str, load_mode: str = "fp32", max_length: int = 1024,
+                      draft_model: Optional[str] = None) -> str:
+        """
+        Versión asíncrona de `submit` para usar desde los endpoints de FastAPI.
+
+        Raises:
+            TimeoutError: Si el worker no responde en `request_timeout_seconds`.
+        """
+        futuro = self.submit(model_path, prompt, load_mode=load_mode, max_length=max_length, draft_model=draft_model)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(futuro), timeout=self.request_timeout_seconds)
+        except asyncio.TimeoutError:
+            # La solicitud sigue contando como pendiente hasta que el worker responda o muera
+            raise TimeoutError(
+                f"El worker de {model_path} no respondió en {self.request_timeout_seconds} segundos."
+            ) from None
+
+    def _recoger_respuestas(self) -> None:
+        while True:
+            mensaje = self._respuestas.get()
+            if mensaje is None:
+                return
+            request_id, respuesta, error = mensaje
+            with self._lock:
+                entrada = self._futuros.pop(request_id, None)
+                if entrada is None:
+                    # Ya se dio por fallida porque su worker murió
+                    continue
+                futuro, worker = entrada
+                self._pendientes[worker] -= 1
+            self._resolver(futuro, respuesta, error)
+
+    @staticmethod
+    def _resolver(futuro: Future, respuesta: Optional[str] = None, error: Optional[str] = None) -> None:
+        # El futuro puede estar cancelado si quien esperaba agotó su tiempo
+        try:
+            if error is not None:
+                futuro.set_exception(RuntimeError(error))
+            else:
+                futuro.set_result(respuesta)
+        except InvalidStateError:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "restarts": self.restarts,
+                "workers": [
+                    {
+                        "index": w,
+                        "pid": self._procesos[w].pid if self._procesos else None,
+                        "alive": self._procesos[w].is_alive() if self._procesos else False,
+                        "pending": self._pendientes[w],
+                        "models": sorted(m for m, asignado in self._asignaciones.items() if asignado == w),
+                    }
+                    for w in range(self.num_workers)
+                ],
+            }
@@ -0,0 +1,77 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List
+
+# Conteo de pasadas forward por hilo: varias generaciones pueden usar el mismo modelo a la vez
+_contexto = threading.local()
+# Evita que dos hilos registren el hook en el mismo modelo y cada pasada cuente dos veces
+_registro_lock = threading.Lock()
+
+
+def _contar_forward(modulo, args, salida) -> None:
+    conteos = getattr(_contexto, "conteos", None)
+    if conteos is not None and id(modulo) in conteos:
+        conteos[id(modulo)] += 1
+
+
+@contextmanager
+def count_forward_passes(*modelos):
+    """
+    Cuenta las pasadas forward de cada modelo hechas desde el hilo actual dentro del bloque.
+
+    Yields:
+        List[int]: Al salir del bloque contiene una cuenta por modelo, en el mismo orden.
+    """
+    with _registro_lock:
+        for modelo in modelos:
+            if not getattr(modelo, "_softia_forward_hook", False):
+                modelo.register_forward_hook(_contar_forward)
+                modelo._softia_forward_hook = True
+    conteos: Dict[int, int] = {id(modelo): 0 for modelo in modelos}
+    resultado: List[int] = []
+    _contexto.conteos = conteos
+    try:
+        yield resultado
+    finally:
+        _contexto.conteos = None
+        resultado.extend(conteos[id(modelo)] for modelo in modelos)
+
+
+class SpeculativeStats:
+    """
+    Acumula, por modelo, cuántos tokens del modelo borrador acepta el modelo objetivo.
+
+    En decodificación asistida cada pasada del modelo objetivo verifica los tokens propuestos
+    y produce los aceptados más uno propio, así que `aceptados = nuevos - pasadas_objetivo`.
+    Cada pasada del borrador propone un token.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_modelo = defaultdict(lambda: defaultdict(float))
+
+    def record(self, model_path: str, new_tokens: int, target_passes: int, draft_passes: int, seconds: float) -> None:
+        with self._lock:
+            datos = self._por_modelo[model_path]
+            datos["generations"] += 1
+            datos["new_tokens"] += new_tokens
+            datos["target_passes"] += target_passes
+            datos["draft_tokens"] += draft_passes
+            datos["accepted_tokens"] += max(new_tokens - target_passes, 0)
+            datos["seconds"] += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            resultado = {}
+            for model_path, datos in self._por_modelo.items():
+                resultado[model_path] = {
+                    "generations": int(datos["generations"]),
+                    "new_tokens": int(datos["new_tokens"]),
+                    "draft_tokens": int(datos["draft_tokens"]),
+                    "accepted_tokens": int(datos["accepted_tokens"]),
+                    "acceptance_rate": datos["accepted_tokens"] / datos["draft_tokens"] if datos["draft_tokens"] else 0.0,
+                    "tokens_per_target_pass": datos["new_tokens"] / datos["target_passes"] if datos["target_passes"] else 0.0,
+                    "tokens_per_second": datos["new_tokens"] / datos["seconds"] if datos["seconds"] else 0.0,
+                }
+            return resultado
@@ -0,0 +1,68 @@
+import asyncio
+import json
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+
+# Marca el final del iterador de fragmentos al consumirlo desde otro hilo
+_FIN = object()
+
+
+def consume_stream(streamer: Iterable[str], cancelado: threading.Event,
+                   terminado: threading.Event, error: list) -> Iterator[str]:
+    """
+    Entrega los fragmentos de un `TextIteratorStreamer` y, al terminar, propaga el error de la generación.
+
+    Si el consumidor deja de iterar antes del final, se activa `cancelado` para que `generate`
+    se detenga en el siguiente token.
+
+    Args:
+        streamer (Iterable[str]): Fragmentos a medida que los produce `generate`.
+        cancelado (threading.Event): Evento que detiene la generación.
+        terminado (threading.Event): Se activa cuando la generación termina, con o sin error.
+        error (list): Recibe la excepción de la generación, si la hubo.
+    """
+    try:
+        for fragmento in streamer:
+            if fragmento:
+                yield fragmento
+    finally:
+        cancelado.set()
+    terminado.wait()
+    if error:
+        raise error[0]
+
+
+def sse_event(evento: str, datos: dict) -> str:
+    """
+    Formatea un server-sent event con datos JSON.
+    """
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+async def sse_events(
+    fragmentos: Iterator[str],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    done: dict,
+    on_close: Callable[[], Awaitable[None]],
+) -> AsyncIterator[str]:
+    """
+    Convierte los fragmentos generados en server-sent events para /chat/stream.
+
+    Emite un evento `token` por fragmento, `done` (con los datos de `done`) al terminar y
+    `error` si la generación falla. Los fragmentos se esperan en un hilo para no bloquear el
+    bucle de eventos. Si el cliente se desconecta se deja de emitir, y `on_close` se llama
+    siempre al terminar para cancelar la generación y liberar recursos.
+    """
+    try:
+        while True:
+            fragmento = await asyncio.to_thread(next, fragmentos, _FIN)
+            if fragmento is _FIN:
+                yield sse_event("done", done)
+                break
+            if await is_disconnected():
+                break
+            yield sse_event("token", {"token": fragmento})
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+    finally:
+        await on_close()
@@ -1,29 +1,58 @@
 import os
-import logging
+from typing import List, Optional
 
-def get_latest_model_path(model_dir: str) -> str:
+LOAD_MODES = ("fp32", "bf16", "int8")
+
+def get_recent_model_paths(model_dir: str, n: int) -> List[str]:
     """
-    Obtiene la ruta del modelo ajustado más reciente basado en la fecha de modificación.
+    Obtiene las rutas de los `n` modelos ajustados más recientes, del más nuevo al más antiguo.
     
     Args:
         model_dir (str): Directorio que contiene los modelos ajustados.
+        n (int): Número de modelos a devolver.
     
     Returns:
-        str: Ruta del directorio del modelo más reciente.
+        List[str]: Rutas de los directorios; vacía si el directorio no existe.
+    """
+    if n <= 0 or not os.path.exists(model_dir):
+        return []
+    subdirectorios = [os.path.join(model_dir, d) for d in os.listdir(model_dir) if os.path.isdir(os.path.join(model_dir, d))]
+    return sorted(subdirectorios, key=os.path.getmtime, reverse=True)[:n]
+
+def get_load_mode(deployment_config: dict, model_path: str) -> str:
+    """
+    Obtiene el modo de carga configurado para un modelo en `deployment.load_mode`.
+    
+    Args:
+        deployment_config (dict): Sección `deployment` de la configuración.
+        model_path (str): Ruta del directorio del modelo.
+    
+    Returns:
+        str: "fp32", "bf16" o "int8"; el modo por defecto si el modelo no tiene uno propio.
     
     Raises:
-        FileNotFoundError: Si no se encuentran modelos en el directorio.
+        ValueError: Si el modo configurado no es válido.
+    """
+    load_mode = deployment_config.get('load_mode', {}) or {}
+    nombre = os.path.basename(os.path.normpath(model_path))
+    modo = (load_mode.get('models') or {}).get(nombre, load_mode.get('default') or 'fp32')
+    if modo not in LOAD_MODES:
+        raise ValueError(f"Modo de carga no válido para {nombre}: {modo}. Opciones: {', '.join(LOAD_MODES)}.")
+    return modo
+
+def get_draft_model(deployment_config: dict, model_path: str) -> Optional[str]:
     """
-    logger = logging.getLogger(__name__)
-    if not os.path.exists(model_dir):
-        logger.error(f"El directorio de modelos {model_dir} no existe.")
-        raise FileNotFoundError(f"El directorio de modelos {model_dir} no existe.")
+    Obtiene el modelo borrador configurado para decodificación especulativa en `deployment.speculative`.
     
-    subdirectorios = [os.path.join(model_dir, d) for d in os.listdir(model_dir) if os.path.isdir(os.path.join(model_dir, d))]
-    if not subdirectorios:
-        logger.error(f"No se encontraron modelos ajustados en {model_dir}.")
-        raise FileNotFoundError(f"No se encontraron modelos ajustados en {model_dir}.")
+    Args:
+        deployment_config (dict): Sección `deployment` de la configuración.
+        model_path (str): Ruta del directorio del modelo.
     
-    directorio_mas_reciente = max(subdirectorios, key=os.path.getmtime)
-    logger.info(f"Directorio del modelo más reciente: {directorio_mas_reciente}")
-    return directorio_mas_reciente
+    Returns:
+        Optional[str]: Ruta o identificador del modelo borrador, o None si no se usa.
+    """
+    speculative = deployment_config.get('speculative', {}) or {}
+    if not speculative.get('enabled', False):
+        return None
+    nombre = os.path.basename(os.path.normpath(model_path))
+    return (speculative.get('draft_models') or {}).get(nombre)
@@ -0,0 +1,120 @@
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .utils import get_draft_model, get_load_mode, get_recent_model_paths
+
+
+def get_preload_paths(config: dict) -> List[str]:
+    """
+    Obtiene las rutas de los modelos a precargar según `deployment.preload`.
+    
+    Combina los modelos indicados por nombre con los `latest` más recientes del
+    directorio de modelos ajustados, sin duplicados y en ese orden.
+    
+    Args:
+        config (dict): Configuración completa de la aplicación.
+    
+    Returns:
+        List[str]: Rutas de los directorios de los modelos.
+    """
+    model_dir = config['model']['finetuned_model_dir']
+    preload = config.get('deployment', {}).get('preload', {}) or {}
+    rutas = [os.path.join(model_dir, nombre) for nombre in preload.get('models', []) or []]
+    rutas += get_recent_model_paths(model_dir, int(preload.get('latest', 0) or 0))
+    
+    unicas = []
+    for ruta in rutas:
+        if os.path.normpath(ruta) not in {os.path.normpath(r) for r in unicas}:
+            unicas.append(ruta)
+    return unicas
+
+def warm_up(model_path: str, load_mode: str = "fp32", prompt: str = "Hola", max_length: int = 32,
+            draft_model: Optional[str] = None, pin: bool = True, server_factory: Optional[Callable] = None) -> dict:
+    """
+    Carga un modelo en el registro y ejecuta una generación sintética para calentar los kernels.
+    
+    Con `draft_model`, la generación de calentamiento es la asistida, así que también se
+    carga y calienta el modelo borrador. Con `pin`, el modelo (y su borrador) quedan fijados
+    en el registro para que el presupuesto de memoria no los expulse.
+    
+    Args:
+        model_path (str): Ruta del directorio del modelo.
+        load_mode (str): Modo de carga del modelo.
+        prompt (str): Texto usado en la generación de calentamiento.
+        max_length (int): Longitud máxima de la generación de calentamiento.
+        draft_model (Optional[str]): Modelo borrador para decodificación especulativa.
+        pin (bool): Si se fijan los modelos cargados en el registro.
+        server_factory (Optional[Callable]): Crea el servidor; por defecto `ModelServer`.
+    
+    Returns:
+        dict: Tiempos de carga y de calentamiento en segundos.
+    
+    Raises:
+        Exception: Si la carga o la generación fallan.
+    """
+    logger = logging.getLogger(__name__)
+    if server_factory is None:
+        # Importado aquí: la orquestación de la precarga no necesita torch
+        from .serve_model import ModelServer
+        server_factory = ModelServer
+    inicio = time.perf_counter()
+    server = server_factory(model_path, load_mode, draft_model)
+    carga = time.perf_counter() - inicio
+    if pin:
+        server.registry.pin(server.registry_path)
+        if draft_model:
+            server.registry.pin(draft_model)
+    
+    inicio = time.perf_counter()
+    server.predict_batch([prompt], max_length=max_length)
+    calentamiento = time.perf_counter() - inicio
+    
+    logger.info(f"Modelo {model_path} precargado en {carga:.2f}s y calentado en {calentamiento:.2f}s.")
+    return {"load_s": carga, "warmup_s": calentamiento, "draft_model": draft_model, "pinned": pin}
+
+async def preload(config: dict, status: Dict[str, dict], run: Callable[..., Awaitable], router=None,
+                  server_factory: Optional[Callable] = None) -> None:
+    """
+    Precarga y calienta los modelos de `deployment.preload`, anotando en `status` el resultado de cada uno.
+    
+    Sin `router`, cada modelo se carga con `warm_up` a través de `run` (p. ej. `InferencePool.run`)
+    y queda fijado en el registro salvo que `preload.pin` sea false. Con `router` (modo sharding),
+    el modelo se carga y calienta en el worker que lo atenderá, donde no se fija: sigue el LRU
+    del worker. Un fallo en un modelo se anota en `status` y no detiene la precarga del resto.
+    
+    Args:
+        config (dict): Configuración completa de la aplicación.
+        status (Dict[str, dict]): Estado de la precarga por ruta de modelo; se rellena a medida que avanza.
+        run (Callable): Corrutina `run(fn, *args, **kwargs)` que ejecuta `warm_up` fuera del bucle de eventos.
+        router: `ShardedModelRouter`, si /chat se atiende en procesos worker.
+        server_factory (Optional[Callable]): Se pasa a `warm_up`.
+    """
+    logger = logging.getLogger(__name__)
+    deployment = config.get('deployment', {}) or {}
+    preload_config = deployment.get('preload', {}) or {}
+    prompt = preload_config.get('warmup_prompt', "Hola")
+    max_length = int(preload_config.get('warmup_max_length', 32))
+    for model_path in get_preload_paths(config):
+        try:
+            load_mode = get_load_mode(deployment, model_path)
+            draft_model = get_draft_model(deployment, model_path)
+            if router is not None:
+                inicio = time.perf_counter()
+                await router.predict(model_path, prompt, load_mode=load_mode, max_length=max_length, draft_model=draft_model)
+                status[model_path] = {"load_and_warmup_s": time.perf_counter() - inicio}
+                continue
+            status[model_path] = await run(
+                warm_up,
+                model_path,
+                load_mode,
+                prompt=prompt,
+                max_length=max_length,
+                draft_model=draft_model,
+                pin=bool(preload_config.get('pin', True)),
+                server_factory=server_factory,
+            )
+        except Exception as e:
+            logger.error(f"No se pudo precargar el modelo {model_path}: {str(e)}")
+            status[model_path] = {"error": str(e)}
@@ -0,0 +1,202 @@
+import asyncio
+import itertools
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from .metrics import QUEUE_WAIT_SECONDS
+
+# Prioridades de las tareas del pool: un número menor se atiende antes
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+
+class InferenceQueueFullError(RuntimeError):
+    """
+    Se lanza cuando la cola del pool de inferencia está llena y la solicitud debe rechazarse.
+    """
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Tarea:
+    __slots__ = ("fn", "args", "kwargs", "future", "encolada")
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.encolada = time.monotonic()
+
+
+class InferencePool:
+    """
+    Pool de hilos dedicado a la inferencia, alimentado por una cola acotada con prioridades.
+
+    Saca la carga de modelos y `generate` del bucle de eventos de uvicorn. Cuando la cola
+    está llena, `submit` falla inmediatamente con `InferenceQueueFullError` en lugar de dejar
+    crecer la latencia sin límite. Las tareas interactivas se sacan de la cola antes que las
+    de lotes, aunque éstas se hayan encolado primero.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 2,
+        max_queue_size: int = 32,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
+        stats_window: int = 1000,
+    ):
+        """
+        Args:
+            num_workers (int): Número de hilos de inferencia.
+            max_queue_size (int): Máximo de tareas esperando un hilo libre.
+            initializer (Optional[Callable]): Función que ejecuta cada hilo al arrancar.
+            initargs (tuple): Argumentos de `initializer`.
+            stats_window (int): Número de tareas recientes usadas para las estadísticas de espera.
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers debe ser al menos 1.")
+        self.logger = logging.getLogger(__name__)
+        self.num_workers = num_workers
+        self.max_queue_size = max_queue_size
+        self._cola: queue.PriorityQueue = queue.PriorityQueue(maxsize=max_queue_size)
+        self._secuencia = itertools.count()
+        self._lock = threading.Lock()
+        self._en_curso = 0
+        self._completadas = 0
+        self._rechazadas = 0
+        self._esperas = deque(maxlen=stats_window)
+        self._duraciones = deque(maxlen=stats_window)
+        for i in range(num_workers):
+            threading.Thread(
+                target=self._bucle_worker,
+                args=(initializer, initargs),
+                name=f"inference-worker-{i}",
+                daemon=True,
+            ).start()
+
+    @classmethod
+    def from_config(cls, deployment_config: dict, initializer: Optional[Callable[[int], None]] = None) -> "InferencePool":
+        """
+        Crea el pool a partir de la sección `deployment.inference_pool` de la configuración.
+
+        `initializer` recibe el número de hilos intra-op que corresponde a cada worker, de modo
+        que los núcleos se repartan entre los workers en lugar de competir entre sí.
+        """
+        pool_config = deployment_config.get('inference_pool', {}) or {}
+        num_workers = int(pool_config.get('num_workers', 2))
+        threads = pool_config.get('torch_threads_per_worker') or max(1, (os.cpu_count() or 1) // num_workers)
+        return cls(
+            num_workers=num_workers,
+            max_queue_size=int(pool_config.get('max_queue_size', 32)),
+            initializer=initializer,
+            initargs=(int(threads),) if initializer else (),
+        )
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Encola `fn(*args, **kwargs)` con prioridad interactiva para ejecutarse en un worker de inferencia.
+
+        Returns:
+            Future: Se resuelve con el resultado de `fn`.
+
+        Raises:
+            InferenceQueueFullError: Si la cola está llena.
+        """
+        return self.submit_with_priority(PRIORITY_INTERACTIVE, fn, *args, **kwargs)
+
+    def submit_with_priority(self, priority: int, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Igual que `submit`, con la prioridad indicada (`PRIORITY_INTERACTIVE` o `PRIORITY_BULK`).
+        """
+        tarea = _Tarea(fn, args, kwargs)
+        try:
+            # La secuencia mantiene el orden de llegada dentro de cada prioridad
+            self._cola.put_nowait((priority, next(self._secuencia), tarea))
+        except queue.Full:
+            with self._lock:
+                self._rechazadas += 1
+            retry_after = self._estimar_retry_after()
+            self.logger.warning(f"Cola de inferencia llena ({self.max_queue_size}); reintentar en {retry_after}s.")
+            raise InferenceQueueFullError(
+                "El servidor de inferencia está saturado, inténtelo de nuevo más tarde.",
+                retry_after=retry_after,
+            )
+        return tarea.future
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """
+        Versión asíncrona de `submit` para usar desde los endpoints de FastAPI.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    async def run_with_priority(self, priority: int, fn: Callable, *args, **kwargs):
+        """
+        Versión asíncrona de `submit_with_priority`.
+        """
+        return await asyncio.wrap_future(self.submit_with_priority(priority, fn, *args, **kwargs))
+
+    def _bucle_worker(self, initializer: Optional[Callable], initargs: tuple) -> None:
+        if initializer is not None:
+            try:
+                initializer(*initargs)
+            except Exception as e:
+                self.logger.error(f"Falló la inicialización del worker de inferencia: {str(e)}")
+        while True:
+            _, _, tarea = self._cola.get()
+            if not tarea.future.set_running_or_notify_cancel():
+                continue
+            inicio = time.monotonic()
+            with self._lock:
+                self._en_curso += 1
+                self._esperas.append(inicio - tarea.encolada)
+            QUEUE_WAIT_SECONDS.observe(inicio - tarea.encolada)
+            try:
+                resultado = tarea.fn(*tarea.args, **tarea.kwargs)
+            except BaseException as e:
+                tarea.future.set_exception(e)
+            else:
+                tarea.future.set_result(resultado)
+            finally:
+                with self._lock:
+                    self._en_curso -= 1
+                    self._completadas += 1
+                    self._duraciones.append(time.monotonic() - inicio)
+
+    def _estimar_retry_after(self) -> int:
+        with self._lock:
+            duracion_media = sum(self._duraciones) / len(self._duraciones) if self._duraciones else 1.0
+        return max(1, math.ceil(duracion_media * self._cola.qsize() / self.num_workers))
+
+    def stats(self) -> dict:
+        """
+        Devuelve la profundidad de la cola, las tareas en curso y los tiempos de espera recientes.
+        """
+        with self._lock:
+            esperas = sorted(self._esperas)
+            duraciones = list(self._duraciones)
+            return {
+                "num_workers": self.num_workers,
+                "queue_depth": self._cola.qsize(),
+                "max_queue_size": self.max_queue_size,
+                "in_flight": self._en_curso,
+                "completed": self._completadas,
+                "rejected": self._rechazadas,
+                "wait_time_ms": {
+                    "avg": 1000 * sum(esperas) / len(esperas) if esperas else 0.0,
+                    "p95": 1000 * esperas[int(0.95 * (len(esperas) - 1))] if esperas else 0.0,
+                    "max": 1000 * esperas[-1] if esperas else 0.0,
+                },
+                "service_time_ms": {
+                    "avg": 1000 * sum(duraciones) / len(duraciones) if duraciones else 0.0,
+                },
+            }
@@ -1,4 +1,3 @@
-import yaml
 import logging
 from pathlib import Path
 from typing import List, Dict
@@ -6,6 +5,7 @@ from transformers import AutoModelForCausalLM, TrainingArguments, AutoTokenizer
 from .trainer import prepare_trainer
 from .utils_functions import preprocess_data, save_training_metrics
 import huggingface_hub
+from core.config import get_config
 
 def finetune_model(
     raw_data: List[Dict[str, str]], 
@@ -42,12 +42,10 @@ def finetune_model(
     
     try:
         # Load and validate configuration
-        config_file = Path(config_path)
-        if not config_file.exists():
+        if not Path(config_path).exists():
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
             
-        with open(config_file) as f:
-            config = yaml.safe_load(f)
+        config = get_config(config_path)
             
         # Validate essential configuration parameters
         required_keys = ['model', 'training', 'logging']
@@ -82,6 +80,19 @@ def finetune_model(
             trust_remote_code=config['model'].get('trust_remote_code', False),
             device_map="auto"  # Enable automatic device mapping
         )
+
+        # With LoRA only the adapter is saved, so serving keeps one base model resident for every use case
+        lora_config = config['finetuning'].get('lora', {}) or {}
+        if lora_config.get('enabled', False):
+            from peft import LoraConfig, get_peft_model
+            model = get_peft_model(model, LoraConfig(
+                task_type="CAUSAL_LM",
+                r=lora_config.get('r', 16),
+                lora_alpha=lora_config.get('alpha', 32),
+                lora_dropout=lora_config.get('dropout', 0.05),
+                target_modules=lora_config.get('target_modules', ["q_proj", "v_proj"]),
+            ))
+            model.print_trainable_parameters()
         
         # Preprocess data
         logger.info("Preprocessing data...")
@@ -112,6 +123,7 @@ def finetune_model(
             weight_decay=config['finetuning'].get('weight_decay', 0.01),
             logging_first_step=True,
             report_to=["tensorboard"],
+            save_safetensors=True,  # Lets the serving side memory-map the weights
         )
         
         # Prepare trainer
@@ -6,16 +6,25 @@ import io
 from pathlib import Path
 from fastapi import UploadFile
 from PyPDF2 import PdfReader
-from data_generation.data_generator import generate_synthetic_data
+from data_generation.data_generator import generate_synthetic_data_async
 from .finetune import finetune_model
-from finetuning.utils_functions import load_config
+from core.config import AppConfig, DEFAULT_CONFIG_PATH, config_service
 
 logger = logging.getLogger(__name__)
 
 class TrainingPipeline:
-    def __init__(self, config_path: str = 'config/config.yaml'):
-        self.config = load_config(config_path)
-        self.output_base_dir = Path(self.config['model']['finetuned_model_dir'])
+    def __init__(self, config_path: str = DEFAULT_CONFIG_PATH):
+        self.config_service = config_service(config_path)
+        # Planificador opcional (con `run_training`) que decide cuándo y con qué prioridad se entrena
+        self.scheduler = None
+
+    @property
+    def config(self) -> AppConfig:
+        return self.config_service.get()
+
+    @property
+    def output_base_dir(self) -> Path:
+        return Path(self.config.model.finetuned_model_dir)
 
     async def _extract_text_from_pdfs(self, files: List[UploadFile]) -> List[str]:
         """
@@ -91,7 +100,7 @@ class TrainingPipeline:
 
             # Generate synthetic data
             logger.info(f"Generating data for use case: {use_case}")
-            dataset = generate_synthetic_data(
+            dataset = await generate_synthetic_data_async(
                 use_case=use_case,
                 num_samples=num_samples,
                 few_shot_examples=few_shot_examples
@@ -131,6 +140,8 @@ class TrainingPipeline:
         Executes the training in a separate thread.
         """
         try:
+            if self.scheduler is not None:
+                return await self.scheduler.run_training(output_dir, finetune_model, dataset, output_dir)
             return await asyncio.to_thread(
                 finetune_model,
                 dataset,
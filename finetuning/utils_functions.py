@@ -5,11 +5,6 @@ from typing import List, Dict, Union
 import json
 from transformers import PreTrainedTokenizer
 import torch
-import yaml
-
-def load_config(path: str) -> dict:
-    with open(path, 'r') as file:
-        return yaml.safe_load(file)
 
 def preprocess_data(
     raw_data: List[Dict[str, str]], 
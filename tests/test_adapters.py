@@ -0,0 +1,161 @@
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.adapters import AdapterManager, adapter_base_model, evict_adapter, is_adapter
+
+
+class FakePeftModel:
+    """Records adapter loads and deletions like peft's PeftModel."""
+
+    def __init__(self, path, name):
+        self.adapters = {name: path}
+
+    def load_adapter(self, path, adapter_name):
+        self.adapters[adapter_name] = path
+
+    def delete_adapter(self, adapter_name):
+        assert len(self.adapters) > 1, "peft needs at least one adapter"
+        del self.adapters[adapter_name]
+
+
+def make_manager(max_adapters=2):
+    wrapped = []
+
+    def wrap(base, path, name):
+        wrapped.append(base)
+        return FakePeftModel(path, name)
+
+    return AdapterManager("base", max_adapters=max_adapters, wrap=wrap), wrapped
+
+
+def loaded_paths(manager):
+    return sorted(manager.model.adapters.values())
+
+
+def test_adapters_share_one_base_and_are_evicted_lru():
+    manager, wrapped = make_manager(max_adapters=2)
+
+    with manager.use(["a"]):
+        pass
+    with manager.use(["b"]):
+        pass
+    with manager.use(["a"]):
+        pass
+    with manager.use(["c"]):
+        pass
+
+    assert wrapped == ["base"]
+    assert loaded_paths(manager) == ["a", "c"]
+    stats = manager.stats()
+    assert stats["loads"] == 3
+    assert stats["hits"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_mixed_batch_gets_one_name_per_sequence():
+    manager, _ = make_manager(max_adapters=4)
+
+    with manager.use(["a", "b", "a"]) as names:
+        assert names[0] == names[2]
+        assert names[0] != names[1]
+
+
+def test_adapters_in_use_are_not_evicted():
+    manager, _ = make_manager(max_adapters=1)
+
+    with manager.use(["a"]):
+        with manager.use(["b"]):
+            assert loaded_paths(manager) == ["a", "b"]
+        assert loaded_paths(manager) == ["a"]
+    with manager.use(["b"]):
+        pass
+    assert loaded_paths(manager) == ["b"]
+
+
+def test_evicted_adapter_is_reloaded_on_next_use():
+    manager, _ = make_manager(max_adapters=2)
+    with manager.use(["a"]):
+        pass
+    with manager.use(["b"]):
+        pass
+
+    assert evict_adapter("a")
+    assert loaded_paths(manager) == ["b"]
+    with manager.use(["a"]):
+        pass
+    assert manager.stats()["loads"] == 3
+
+
+def test_loading_waits_for_generations_in_progress():
+    manager, _ = make_manager(max_adapters=4)
+    with manager.use(["a"]):
+        pass
+    generating, finish = threading.Event(), threading.Event()
+    events = []
+
+    def generate():
+        with manager.use(["a"]):
+            generating.set()
+            finish.wait(1)
+            events.append("generation done")
+
+    def load():
+        generating.wait(1)
+        with manager.use(["b"]):
+            events.append("b loaded")
+
+    threads = [threading.Thread(target=generate), threading.Thread(target=load)]
+    for t in threads:
+        t.start()
+    generating.wait(1)
+    time.sleep(0.05)
+    # peft would be modifying the layers under a running generate
+    assert "b" not in loaded_paths(manager)
+    finish.set()
+    for t in threads:
+        t.join(1)
+    assert events == ["generation done", "b loaded"]
+
+
+def test_generations_with_loaded_adapters_run_concurrently():
+    manager, _ = make_manager(max_adapters=4)
+    with manager.use(["a", "b"]):
+        pass
+    inside = threading.Barrier(2, timeout=1)
+
+    def generate(path):
+        with manager.use([path]):
+            inside.wait()
+
+    threads = [threading.Thread(target=generate, args=(p,)) for p in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(2)
+    assert not inside.broken
+
+
+def test_adapter_directory_detection(tmp_path):
+    assert not is_adapter(str(tmp_path))
+    (tmp_path / "adapter_config.json").write_text(json.dumps({"base_model_name_or_path": "meta-llama/base"}))
+
+    assert is_adapter(str(tmp_path))
+    assert adapter_base_model(str(tmp_path)) == "meta-llama/base"
+
+    (tmp_path / "adapter_config.json").write_text("{}")
+    with pytest.raises(ValueError):
+        adapter_base_model(str(tmp_path))
+
+
+def test_max_adapters_must_be_positive():
+    with pytest.raises(ValueError):
+        AdapterManager("base", max_adapters=0)
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+pytest.importorskip("httpx")
+
+from benchmarks.api_load import percentile
+
+
+def test_percentile_uses_the_nearest_rank():
+    values = list(range(100, 0, -1))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile(values, 7) == 7
+    assert percentile(values, 100) == 100
+
+
+def test_percentile_with_few_samples():
+    values = list(range(1, 21))
+
+    assert percentile(values, 95) == 19
+    assert percentile(values, 0) == 1
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
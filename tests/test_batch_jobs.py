@@ -0,0 +1,58 @@
+import asyncio
+import os
+import sys
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.batch_jobs import BatchJob, BatchJobStore, plan_batches
+
+
+def test_batches_group_prompts_of_similar_length():
+    lengths = [50, 3, 40, 2, 41, 4]
+    assert plan_batches(lengths, 2) == [[3, 1], [5, 2], [4, 0]]
+
+
+def test_results_are_returned_in_original_order():
+    prompts = ["ccc", "a", "bb", "dddd", "e"]
+    store = BatchJobStore(batch_size=2)
+    chunks = []
+
+    async def predict_chunk(chunk):
+        chunks.append(chunk)
+        return [p.upper() for p in chunk]
+
+    job = asyncio.run(store.run(BatchJob("demo", prompts), [len(p) for p in prompts], predict_chunk))
+
+    assert job.status == "completed"
+    assert job.results == ["CCC", "A", "BB", "DDDD", "E"]
+    assert all(len(chunk) <= 2 for chunk in chunks)
+
+
+def test_streamed_results_follow_original_order():
+    prompts = [f"p{i}" * (5 - i) for i in range(5)]
+    store = BatchJobStore(batch_size=1)
+
+    async def predict_chunk(chunk):
+        await asyncio.sleep(0.01)
+        return [f"r:{chunk[0]}" for _ in chunk]
+
+    async def scenario():
+        job = store.start(BatchJob("demo", prompts), [len(p) for p in prompts], predict_chunk)
+        return [index async for index, _, _ in job.iter_results()], job
+
+    indices, job = asyncio.run(scenario())
+    assert indices == [0, 1, 2, 3, 4]
+    assert store.get(job.job_id).summary()["completed"] == 5
+
+
+def test_failed_chunk_marks_job_failed():
+    store = BatchJobStore(batch_size=2)
+
+    async def predict_chunk(chunk):
+        raise RuntimeError("out of memory")
+
+    job = asyncio.run(store.run(BatchJob("demo", ["a", "b", "c"]), [1, 1, 1], predict_chunk))
+    assert job.status == "failed"
+    assert "out of memory" in job.error
@@ -0,0 +1,97 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.batching import MicroBatcher
+from deployment.workers import InferencePool
+
+
+class FakeServer:
+    """Stand-in for ModelServer that records the size of every batch it runs."""
+
+    def __init__(self, model_path="fake-model", fail=False):
+        self.model_path = model_path
+        self.fail = fail
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def predict_batch(self, prompts, max_length=1024):
+        time.sleep(0.01)
+        with self._lock:
+            self.batch_sizes.append(len(prompts))
+        if self.fail:
+            raise RuntimeError("generation failed")
+        return [f"{p}->{max_length}" for p in prompts]
+
+
+def test_concurrent_requests_share_one_batch():
+    batcher = MicroBatcher(max_batch_size=8, batch_window_ms=100)
+    server = FakeServer()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(lambda i=i: batcher.submit(server, f"p{i}").result(timeout=5)) for i in range(8)]
+        results = [f.result() for f in futures]
+
+    assert results == [f"p{i}->1024" for i in range(8)]
+    assert sum(server.batch_sizes) == 8
+    assert len(server.batch_sizes) < 8
+
+
+def test_batch_size_is_capped():
+    batcher = MicroBatcher(max_batch_size=3, batch_window_ms=50)
+    server = FakeServer()
+
+    futures = [batcher.submit(server, f"p{i}") for i in range(7)]
+    results = [f.result(timeout=5) for f in futures]
+
+    assert results == [f"p{i}->1024" for i in range(7)]
+    assert max(server.batch_sizes) <= 3
+
+
+def test_different_generation_params_are_not_mixed():
+    batcher = MicroBatcher(max_batch_size=8, batch_window_ms=50)
+    server = FakeServer()
+
+    short = batcher.submit(server, "a", max_length=10)
+    long = batcher.submit(server, "b", max_length=20)
+
+    assert short.result(timeout=5) == "a->10"
+    assert long.result(timeout=5) == "b->20"
+
+
+def test_errors_propagate_to_every_caller():
+    batcher = MicroBatcher(max_batch_size=4, batch_window_ms=50)
+    server = FakeServer(fail=True)
+
+    futures = [batcher.submit(server, f"p{i}") for i in range(3)]
+    for f in futures:
+        with pytest.raises(RuntimeError):
+            f.result(timeout=5)
+
+
+def test_disabled_batching_runs_one_prompt_per_call():
+    batcher = MicroBatcher.from_config({"batching": {"enabled": False}})
+    server = FakeServer()
+
+    futures = [batcher.submit(server, f"p{i}") for i in range(3)]
+    [f.result(timeout=5) for f in futures]
+
+    assert server.batch_sizes == [1, 1, 1]
+
+
+def test_batches_run_on_the_given_executor():
+    pool = InferencePool(num_workers=1, max_queue_size=4)
+    batcher = MicroBatcher(max_batch_size=4, batch_window_ms=20, executor=pool)
+    server = FakeServer()
+
+    futures = [batcher.submit(server, f"p{i}") for i in range(4)]
+    assert [f.result(timeout=5) for f in futures] == [f"p{i}->1024" for i in range(4)]
+    assert pool.stats()["completed"] >= 1
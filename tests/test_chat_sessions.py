@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.sessions import SessionStore
+
+MB = 1024 * 1024
+
+
+def test_session_is_reused_for_the_same_model():
+    store = SessionStore()
+
+    first = store.get("s1", "models/a")
+    store.update(first, [1, 2, 3], "kv", kv_bytes=10)
+
+    again = store.get("s1", "models/a")
+    assert again is first
+    assert again.input_ids == [1, 2, 3]
+    assert again.turns == 1
+
+
+def test_switching_model_starts_a_new_conversation():
+    store = SessionStore()
+    first = store.get("s1", "models/a")
+    store.update(first, [1], "kv", kv_bytes=10)
+
+    other = store.get("s1", "models/b")
+    assert other is not first
+    assert other.input_ids is None
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(ttl_seconds=0.05)
+    store.get("old", "models/a")
+    time.sleep(0.1)
+    store.get("new", "models/a")
+
+    stats = store.stats()
+    assert stats["sessions"] == 1
+    assert stats["expired"] == 1
+
+
+def test_kv_budget_frees_least_recently_used_cache():
+    store = SessionStore(kv_budget_mb=2.5)
+    for name in ("a", "b", "c"):
+        sesion = store.get(name, "models/a")
+        store.update(sesion, [1], "kv", kv_bytes=MB)
+
+    liberada = store.get("a", "models/a")
+    assert liberada.past_key_values is None
+    assert liberada.kv_bytes == 0
+    # El historial se conserva: el siguiente turno hace prefill de toda la conversación
+    assert liberada.input_ids == [1]
+    assert store.get("b", "models/a").past_key_values == "kv"
+    assert store.get("c", "models/a").past_key_values == "kv"
+    assert store.stats()["kv_evictions"] == 1
+
+    store.update(liberada, liberada.input_ids + [2], "kv2", kv_bytes=MB)
+    assert store.get("a", "models/a").input_ids == [1, 2]
+    assert store.get("a", "models/a").turns == 2
+
+
+def test_delete():
+    store = SessionStore()
+    store.get("s1", "models/a")
+    assert store.delete("s1")
+    assert not store.delete("s1")
@@ -0,0 +1,89 @@
+import os
+import sys
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from core.config import ConfigError, ConfigService, load_config
+
+BASE = """
+api:
+  api_key: "key"
+  base_url: "http://localhost"
+model:
+  base_model: "base"
+  finetuned_model_dir: "./models/"
+deployment:
+  response_cache:
+    max_entries: {max_entries}
+"""
+
+def write_config(path, max_entries=10, mtime=None):
+    path.write_text(BASE.format(max_entries=max_entries))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+def test_config_is_typed_and_dict_compatible(tmp_path):
+    path = tmp_path / "config.yaml"
+    write_config(path)
+
+    config = load_config(str(path))
+
+    assert config.model.finetuned_model_dir == "./models/"
+    assert config.api.api_key == "key"
+    assert config['model']['base_model'] == "base"
+    assert config.get('deployment', {})['response_cache']['max_entries'] == 10
+    assert config.section('deployment', 'response_cache') == {"max_entries": 10}
+    assert config.section('deployment', 'batch') == {}
+
+def test_invalid_config_is_rejected(tmp_path):
+    path = tmp_path / "config.yaml"
+    write_config(path, max_entries=0)
+
+    with pytest.raises(ConfigError, match="max_entries"):
+        load_config(str(path))
+    with pytest.raises(ConfigError):
+        load_config(str(tmp_path / "missing.yaml"))
+
+    write_config(path)
+    with open(path, "a") as f:
+        f.write("data_generation:\n  scoring:\n    max_concurrency: 0\n")
+    with pytest.raises(ConfigError, match="data_generation.scoring.max_concurrency"):
+        load_config(str(path))
+
+def test_reload_only_when_mtime_changes(tmp_path):
+    path = tmp_path / "config.yaml"
+    write_config(path, max_entries=10, mtime=1000)
+    service = ConfigService(str(path), check_interval=0)
+    received = []
+    service.subscribe(received.append)
+
+    first = service.get()
+    assert service.get() is first
+    assert received == []
+
+    write_config(path, max_entries=20, mtime=2000)
+    config = service.get()
+
+    assert config is not first
+    assert config.section('deployment', 'response_cache')['max_entries'] == 20
+    assert received == [config]
+    assert service.reloads == 1
+
+def test_invalid_reload_keeps_previous_config(tmp_path):
+    path = tmp_path / "config.yaml"
+    write_config(path, max_entries=10, mtime=1000)
+    service = ConfigService(str(path), check_interval=0)
+
+    write_config(path, max_entries=-1, mtime=2000)
+
+    config = service.get()
+    assert config.section('deployment', 'response_cache')['max_entries'] == 10
+    assert service.reloads == 0
+    # The published config is shared with readers and is not touched
+    assert config.mtime == 1000
+    # The broken file is not read again until it changes
+    assert service.reload() is False
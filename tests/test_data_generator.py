@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+pytest.importorskip("openai")
+
+from data_generation.data_generator import generate_in_shards, split_into_shards
+from data_generation.dedup import NearDuplicateFilter
+
+
+class FakeInstructClient:
+    """Stand-in for LLMClient that returns as many samples as the prompt asks for."""
+
+    def __init__(self, short_by=0, fail_first=0, delay=0.01, repeat=False, cut_tail=0, extra=0, slow_after=None):
+        self.short_by = short_by
+        self.extra = extra
+        self.slow_after = slow_after
+        self.completed = 0
+        self.streams_finished = 0
+        self.repeat = repeat
+        self.cut_tail = cut_tail
+        self.streaming = 0
+        self.fail_first = fail_first
+        self.delay = delay
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def chat(self, model, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        shard = len(self.prompts)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            slow = self.slow_after is not None and shard > self.slow_after
+            await asyncio.sleep(10 if slow else self.delay)
+            self.completed += 1
+            if shard <= self.fail_first:
+                raise RuntimeError("upstream error")
+            n = int(prompt.split("conjunto de datos con ")[1].split(" ")[0]) - self.short_by + self.extra
+            prefix = "repetida" if self.repeat else f"p{shard}"
+            samples = [{"entrada": hashlib.sha256(f"{prefix}-{i}".encode()).hexdigest(), "salida": "r"} for i in range(n)]
+            content = "```json\n" + json.dumps(samples, ensure_ascii=False) + "\n```"
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        finally:
+            self.in_flight -= 1
+
+    async def chat_stream(self, **kwargs):
+        content = (await self.chat(**kwargs)).choices[0].message.content
+        content = content[:len(content) - self.cut_tail]
+        self.streaming += 1
+        try:
+            for i in range(0, len(content), 7):
+                await asyncio.sleep(0)
+                yield content[i:i + 7]
+            self.streams_finished += 1
+        finally:
+            self.streaming -= 1
+
+
+def test_split_into_shards():
+    assert split_into_shards(45, 20) == [20, 20, 5]
+    assert split_into_shards(40, 20) == [20, 20]
+    assert split_into_shards(0, 20) == []
+
+
+def test_shards_run_concurrently_with_distinct_hints():
+    client = FakeInstructClient()
+    samples = asyncio.run(generate_in_shards(client, "m", "soporte", 100, shard_size=10, max_concurrency=3))
+
+    assert len(samples) == 100
+    assert client.max_in_flight == 3
+    hints = [p.split("Este es el lote ")[1].split("\n")[0] for p in client.prompts]
+    assert len(set(hints)) == len(client.prompts) == 10
+
+
+def test_missing_samples_are_requested_again():
+    # The first shard fails outright; its samples come from a second round with a new hint
+    client = FakeInstructClient(fail_first=1)
+    samples = asyncio.run(generate_in_shards(client, "m", "soporte", 30, shard_size=10, max_rounds=1))
+
+    assert len(samples) == 30
+    assert len(client.prompts) == 4
+    assert "Este es el lote 4" in client.prompts[-1]
+
+
+def test_result_is_capped_when_rounds_run_out():
+    client = FakeInstructClient(short_by=5)
+    samples = asyncio.run(generate_in_shards(client, "m", "soporte", 20, shard_size=10, max_rounds=0))
+
+    assert len(samples) == 10
+
+
+def test_duplicates_across_shards_are_dropped_before_counting():
+    client = FakeInstructClient(repeat=True)
+    dedup = NearDuplicateFilter()
+    samples = asyncio.run(generate_in_shards(client, "m", "soporte", 20, shard_size=10, max_rounds=1, dedup=dedup))
+
+    assert len({s["entrada"] for s in samples}) == len(samples) == 10
+    assert dedup.stats()["exact_duplicates"] == 20
+
+
+def test_streamed_samples_are_handed_over_as_soon_as_they_close():
+    client = FakeInstructClient()
+    seen = []
+
+    def on_sample(item):
+        seen.append((item["entrada"], client.streaming))
+
+    samples = asyncio.run(generate_in_shards(client, "m", "soporte", 6, shard_size=3, on_sample=on_sample))
+
+    assert [e for e, _ in seen] == [s["entrada"] for s in samples]
+    assert len(samples) == 6
+    # Every sample was delivered while a response was still streaming
+    assert all(streaming > 0 for _, streaming in seen)
+
+
+def test_truncated_stream_keeps_the_complete_samples():
+    # Cut the response in the middle of its last object
+    client = FakeInstructClient(cut_tail=30)
+    samples = asyncio.run(generate_in_shards(client, "m", "soporte", 5, shard_size=5, max_rounds=0))
+
+    assert len(samples) == 4
+
+
+def test_non_streaming_mode():
+    client = FakeInstructClient()
+    samples = asyncio.run(generate_in_shards(client, "m", "soporte", 12, shard_size=5, stream=False))
+
+    assert len(samples) == 12
+
+
+def test_pending_shards_are_cancelled_once_enough_samples_arrive():
+    # The first shard over-delivers and fills the request while the other two are still waiting
+    client = FakeInstructClient(extra=10, slow_after=1)
+    samples = asyncio.run(generate_in_shards(client, "m", "soporte", 12, shard_size=4, max_concurrency=3))
+
+    assert len(samples) == 12
+    assert client.completed == 1
+    assert client.in_flight == 0
+    # The over-delivering stream is not read to the end
+    assert client.streams_finished == 0
+    assert client.streaming == 0
+
+
+def test_extra_samples_cover_short_shards_without_streaming():
+    client = FakeInstructClient(extra=10, slow_after=1)
+    samples = asyncio.run(generate_in_shards(client, "m", "soporte", 12, shard_size=4, stream=False))
+
+    assert len(samples) == 12
+    assert client.completed == 1
@@ -0,0 +1,72 @@
+import os
+import random
+import sys
+import time
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from data_generation.dedup import NearDuplicateFilter, deduplicate, lsh_params, minhash, normalize_text, shingles
+
+
+def pair(entrada, salida="Haz clic en 'Olvidé mi contraseña' y sigue las instrucciones del correo."):
+    return {"entrada": entrada, "salida": salida}
+
+
+def test_exact_and_near_duplicates_are_dropped():
+    items = [
+        pair("¿Cómo puedo restablecer mi contraseña?"),
+        pair("¿como puedo restablecer mi contraseña"),     # exact after normalization
+        pair("¿Cómo puedo restablecer mi contraseña ya?"),  # near duplicate
+        pair("¿Cuál es la política de reembolso?", "Puedes devolver productos en 30 días."),
+    ]
+    kept, stats = deduplicate(items)
+
+    assert kept == [items[0], items[3]]
+    assert stats["exact_duplicates"] == 1
+    assert stats["near_duplicates"] == 1
+    assert stats["dropped"] == 2
+
+
+def test_minhash_estimates_jaccard_similarity():
+    a = shingles(normalize_text("el envío gratuito se aplica a pedidos de más de cincuenta euros"))
+    b = shingles(normalize_text("el envío gratuito se aplica a pedidos superiores a cincuenta euros"))
+    jaccard = len(a & b) / len(a | b)
+    sa, sb = minhash(a, 256), minhash(b, 256)
+    estimate = sum(x == y for x, y in zip(sa, sb)) / 256
+
+    assert abs(estimate - jaccard) < 0.15
+
+
+def test_lsh_params_multiply_to_num_perm():
+    bands, rows = lsh_params(0.8, 64)
+    assert bands * rows == 64
+    assert 0.6 < (1 / bands) ** (1 / rows) < 0.95
+
+
+def test_insertion_cost_does_not_grow_with_the_index():
+    rng = random.Random(0)
+    words = [f"palabra{i}" for i in range(5000)]
+    items = [pair(" ".join(rng.choices(words, k=12)), " ".join(rng.choices(words, k=20))) for i in range(6000)]
+    dedup = NearDuplicateFilter()
+
+    start = time.perf_counter()
+    dedup.filter(items[:3000])
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    dedup.filter(items[3000:])
+    second = time.perf_counter() - start
+
+    assert dedup.stats()["kept"] == 6000
+    # A linear scan would make the second half roughly three times slower than the first
+    assert second < first * 2
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        NearDuplicateFilter(threshold=0)
+    with pytest.raises(ValueError):
+        NearDuplicateFilter(num_perm=0)
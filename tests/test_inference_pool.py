@@ -0,0 +1,70 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.workers import InferencePool, InferenceQueueFullError
+
+
+def test_tasks_run_on_worker_threads():
+    pool = InferencePool(num_workers=2, max_queue_size=4)
+
+    names = [pool.submit(lambda: threading.current_thread().name).result(timeout=5) for _ in range(4)]
+
+    assert all(name.startswith("inference-worker-") for name in names)
+    assert pool.stats()["completed"] == 4
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    pool = InferencePool(num_workers=1, max_queue_size=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    running = pool.submit(blocking)
+    started.wait(5)
+    queued = pool.submit(lambda: "queued")
+
+    with pytest.raises(InferenceQueueFullError) as excinfo:
+        pool.submit(lambda: "rejected")
+    assert excinfo.value.retry_after >= 1
+
+    stats = pool.stats()
+    assert stats["queue_depth"] == 1
+    assert stats["in_flight"] == 1
+    assert stats["rejected"] == 1
+
+    release.set()
+    assert running.result(timeout=5) == "done"
+    assert queued.result(timeout=5) == "queued"
+
+
+def test_exceptions_are_returned_to_the_caller():
+    pool = InferencePool(num_workers=1, max_queue_size=2)
+
+    def broken():
+        raise ValueError("bad prompt")
+
+    with pytest.raises(ValueError):
+        pool.submit(broken).result(timeout=5)
+
+
+def test_initializer_receives_thread_share():
+    received = []
+    pool = InferencePool.from_config(
+        {"inference_pool": {"num_workers": 2, "torch_threads_per_worker": 3}},
+        initializer=received.append,
+    )
+    pool.submit(lambda: None).result(timeout=5)
+    pool.submit(lambda: None).result(timeout=5)
+
+    assert received[0] == 3
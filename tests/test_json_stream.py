@@ -0,0 +1,44 @@
+import json
+import os
+import sys
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from data_generation.json_stream import JsonObjectStreamParser, parse_json_objects
+
+SAMPLES = [
+    {"entrada": "¿Qué significa [x] en {plantilla}?", "salida": "Una \"variable\" entre llaves } y corchetes ]."},
+    {"entrada": "¿Datos anidados?", "salida": "Sí", "métricas": {"helpfulness": 1.0, "extra": [1, {"a": 2}]}},
+    {"entrada": "Barra invertida \\", "salida": "ok"},
+]
+
+
+def test_objects_are_emitted_as_soon_as_they_close():
+    text = "Aquí tienes:\n```json\n" + json.dumps(SAMPLES, ensure_ascii=False) + "\n```"
+    parser = JsonObjectStreamParser()
+    emitted = []
+    for i in range(0, len(text), 3):
+        for obj in parser.feed(text[i:i + 3]):
+            emitted.append((obj, i))
+
+    assert [obj for obj, _ in emitted] == SAMPLES
+    # The first object is available long before the end of the text
+    assert emitted[0][1] < len(text) / 2
+    assert not parser.pending
+
+
+def test_truncated_output_keeps_complete_objects():
+    text = json.dumps(SAMPLES, ensure_ascii=False)
+    parser = JsonObjectStreamParser()
+    objects = parser.feed(text[:-20])
+
+    assert objects == SAMPLES[:2]
+    assert parser.pending
+
+
+def test_invalid_objects_are_skipped():
+    objects = parse_json_objects('[{"entrada": "a", salida: b}, {"entrada": "c", "salida": "d"}]')
+
+    assert objects == [{"entrada": "c", "salida": "d"}]
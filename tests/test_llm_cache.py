@@ -0,0 +1,137 @@
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from data_generation.llm_cache import LLMCache, request_key
+
+REQUEST = {"model": "m", "messages": [{"role": "user", "content": "hola"}], "temperature": 0.7}
+
+
+def test_key_depends_on_model_messages_and_sampling_but_not_stream():
+    assert request_key(REQUEST) == request_key({**REQUEST, "stream": True})
+    assert request_key(REQUEST) == request_key({**REQUEST, "stream": True, "stream_options": {"include_usage": True}})
+    assert request_key(REQUEST) == request_key(dict(reversed(list(REQUEST.items()))))
+    assert request_key(REQUEST) != request_key({**REQUEST, "temperature": 0.0})
+    assert request_key(REQUEST) != request_key({**REQUEST, "model": "otro"})
+
+
+def test_entries_persist_and_expire(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LLMCache(path, ttl_seconds=0.2)
+    cache.put("k", {"texto": "ñ"})
+    cache.close()
+
+    cache = LLMCache(path, ttl_seconds=0.2)
+    assert cache.get("k") == {"texto": "ñ"}
+    time.sleep(0.25)
+    assert cache.get("k") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted_over_the_size_limit(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"), max_size_mb=250 / (1024 * 1024))
+    cache.put("a", "x" * 100)
+    cache.put("b", "x" * 100)
+    cache.get("a")
+    cache.put("c", "x" * 100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_size_is_tracked_across_replacements_and_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LLMCache(path)
+    cache.put("a", "x" * 100)
+    cache.put("a", "x" * 10)
+    cache.put("b", "x" * 10)
+    size = cache.stats()["size_bytes"]
+    assert size == 2 * len('"' + "x" * 10 + '"')
+    cache.close()
+
+    assert LLMCache(path).stats()["size_bytes"] == size
+
+
+def test_expired_entries_are_swept_periodically(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"), ttl_seconds=0.05, prune_interval_seconds=0.1)
+    cache.put("old", 1)
+    time.sleep(0.06)
+    cache.put("new", 2)
+    # The sweep ran with the first put, so the expired entry is still stored
+    assert cache.stats()["entries"] == 2
+
+    time.sleep(0.1)
+    cache.put("newer", 3)
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["evictions"] == 2
+    assert stats["size_bytes"] == 1
+
+
+def test_bypass_skips_reads_but_keeps_writing(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"), bypass=True)
+    cache.put("k", 1)
+
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_disabled_by_default():
+    assert LLMCache.from_config({}) is None
+
+
+class CountingOpenAI:
+    """Stand-in for AsyncOpenAI that counts calls and returns real ChatCompletion objects."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, stream=False, **kwargs):
+        from openai.types.chat import ChatCompletion
+
+        self.calls += 1
+        if stream:
+            return self.stream()
+        return ChatCompletion.model_validate({
+            "id": "x", "object": "chat.completion", "created": 0, "model": kwargs["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "respuesta"}}],
+        })
+
+    async def stream(self):
+        for piece in ["res", "puesta"]:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+
+
+def test_client_answers_repeated_requests_from_the_cache(tmp_path):
+    pytest.importorskip("openai")
+    from data_generation.llm_client import LLMClient
+
+    fake = CountingOpenAI()
+    client = LLMClient("key", "http://stand-in/v1", client_factory=lambda: fake,
+                       cache=LLMCache(str(tmp_path / "cache.sqlite")))
+
+    async def main():
+        first = await client.chat(**REQUEST)
+        second = await client.chat(**REQUEST)
+        streamed = [p async for p in client.chat_stream(**REQUEST)]
+        fresh = await client.chat(use_cache=False, **REQUEST)
+        return first, second, streamed, fresh
+
+    first, second, streamed, fresh = asyncio.run(main())
+
+    assert second.choices[0].message.content == first.choices[0].message.content == "respuesta"
+    assert streamed == ["respuesta"]
+    assert fresh.choices[0].message.content == "respuesta"
+    assert fake.calls == 2
+    assert client.stats()["cache"]["hits"] == 2
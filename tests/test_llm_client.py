@@ -0,0 +1,197 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+openai = pytest.importorskip("openai")
+
+from data_generation.llm_client import LLMClient, TokenBucket, run_sync
+
+
+def status_error(status, headers=None):
+    response = SimpleNamespace(status_code=status, headers=headers or {}, request=None)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+class FakeOpenAI:
+    """Stand-in for AsyncOpenAI whose completions fail with the given errors first."""
+
+    def __init__(self, errors=(), delay=0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def close(self):
+        self.closed = True
+
+    async def create(self, stream=False, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        if stream:
+            include_usage = (kwargs.get("stream_options") or {}).get("include_usage", False)
+            return self.stream(["Hola", ", ", "mundo"], include_usage)
+        usage = SimpleNamespace(prompt_tokens=3, completion_tokens=5)
+        return SimpleNamespace(choices=[], usage=usage)
+
+    async def stream(self, pieces, include_usage):
+        for piece in pieces:
+            delta = SimpleNamespace(content=piece)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        # Like the real API, usage only arrives when it is requested with stream_options
+        if include_usage:
+            yield SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=2, completion_tokens=3))
+
+
+def client_with(fake, **kwargs):
+    return LLMClient("key", "http://stand-in/v1", backoff_base=0.001, client_factory=lambda: fake, **kwargs)
+
+
+def test_transient_errors_are_retried_and_usage_is_recorded():
+    fake = FakeOpenAI([status_error(503), status_error(429, {"retry-after": "0"})])
+    client = client_with(fake)
+
+    asyncio.run(client.chat(model="m", messages=[]))
+
+    assert fake.calls == 3
+    assert client.stats()["retries"] == 2
+    assert client.stats()["prompt_tokens"] == 3
+    assert client.stats()["completion_tokens"] == 5
+
+
+def test_permanent_errors_and_exhausted_retries_are_raised():
+    client = client_with(FakeOpenAI([status_error(400)]))
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(client.chat(model="m", messages=[]))
+
+    fake = FakeOpenAI([status_error(500)] * 3)
+    client = client_with(fake, max_retries=2)
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(client.chat(model="m", messages=[]))
+    assert fake.calls == 3
+    assert client.stats()["failures"] == 1
+
+
+def test_stream_yields_text_and_retries_only_the_opening():
+    fake = FakeOpenAI([status_error(502)])
+    client = client_with(fake)
+
+    async def main():
+        return [piece async for piece in client.chat_stream(model="m", messages=[])]
+
+    assert "".join(asyncio.run(main())) == "Hola, mundo"
+    assert fake.calls == 2
+    assert client.stats()["completion_tokens"] == 3
+
+
+def test_underlying_client_is_reused_within_an_event_loop():
+    created = []
+
+    def factory():
+        created.append(FakeOpenAI())
+        return created[-1]
+
+    client = LLMClient("key", "http://stand-in/v1", client_factory=factory)
+
+    async def main():
+        await asyncio.gather(*(client.chat(model="m", messages=[]) for _ in range(5)))
+
+    asyncio.run(main())
+    assert len(created) == 1
+    assert created[0].calls == 5
+
+
+def test_run_sync_closes_the_client_opened_in_its_loop():
+    created = []
+
+    def factory():
+        created.append(FakeOpenAI())
+        return created[-1]
+
+    client = LLMClient("key", "http://stand-in/v1", client_factory=factory)
+
+    run_sync(client.chat(model="m", messages=[]), client)
+    run_sync(client.chat(model="m", messages=[]), client)
+
+    # Each asyncio.run gets its own AsyncOpenAI, closed before the loop ends
+    assert len(created) == 2
+    assert all(fake.closed for fake in created)
+    assert len(client._clientes) == 0
+
+
+def test_closing_waits_for_requests_in_flight():
+    fake = FakeOpenAI(delay=0.05)
+    client = client_with(fake)
+
+    async def main():
+        request = asyncio.ensure_future(client.chat(model="m", messages=[]))
+        await asyncio.sleep(0.01)
+        # What a config reload does to the shared client
+        client.close()
+        closed_while_running = fake.closed
+        await request
+        return closed_while_running
+
+    assert asyncio.run(main()) is False
+    assert fake.closed
+
+
+def test_closing_schedules_the_close_on_each_running_loop():
+    fake = FakeOpenAI()
+    client = client_with(fake)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    try:
+        asyncio.run_coroutine_threadsafe(client.chat(model="m", messages=[]), loop).result(timeout=1)
+        client.close()
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01), loop).result(timeout=1)
+        assert fake.closed
+        assert len(client._clientes) == 0
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def test_counters_are_exact_across_threads():
+    client = client_with(FakeOpenAI())
+
+    async def requests():
+        await asyncio.gather(*(client.chat(model="m", messages=[]) for _ in range(50)))
+
+    def worker():
+        asyncio.run(requests())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.stats()["requests"] == 200
+    assert client.stats()["prompt_tokens"] == 600
+
+
+def test_token_bucket_limits_the_request_rate():
+    bucket = TokenBucket(rate=50.0, capacity=2)
+
+    async def main():
+        start = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # Two requests go out as a burst; the other four wait 1/50 s each
+    assert asyncio.run(main()) >= 4 / 50 * 0.9
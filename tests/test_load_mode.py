@@ -0,0 +1,86 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.utils import get_load_mode
+
+DEPLOYMENT = {"load_mode": {"default": "bf16", "models": {"finetuned_soporte": "int8"}}}
+
+
+def test_default_mode_is_fp32_without_configuration():
+    assert get_load_mode({}, "models/finetuned_demo") == "fp32"
+    assert get_load_mode({"load_mode": None}, "models/finetuned_demo") == "fp32"
+    assert get_load_mode({"load_mode": {"default": None}}, "models/finetuned_demo") == "fp32"
+
+
+def test_configured_default_applies_to_models_without_their_own_mode():
+    assert get_load_mode(DEPLOYMENT, "models/finetuned_demo") == "bf16"
+
+
+def test_per_model_mode_is_matched_by_directory_name():
+    assert get_load_mode(DEPLOYMENT, "models/finetuned_soporte") == "int8"
+    assert get_load_mode(DEPLOYMENT, "./models/finetuned_soporte/") == "int8"
+
+
+def test_invalid_modes_are_rejected():
+    with pytest.raises(ValueError, match="fp16"):
+        get_load_mode({"load_mode": {"default": "fp16"}}, "models/finetuned_demo")
+    with pytest.raises(ValueError, match="finetuned_soporte"):
+        get_load_mode({"load_mode": {"models": {"finetuned_soporte": "int4"}}}, "models/finetuned_soporte")
+
+
+@pytest.fixture(params=[True, False], ids=["safetensors", "bin"])
+def tiny_model(request, tmp_path, monkeypatch):
+    """A tiny GPT-2 saved to disk; loaded through the mmap path or from_pretrained."""
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    import deployment.serve_model as serve_model
+
+    torch.manual_seed(0)
+    config = transformers.GPT2Config(vocab_size=64, n_positions=32, n_embd=16, n_layer=2, n_head=2)
+    path = str(tmp_path / "tiny")
+    transformers.GPT2LMHeadModel(config).save_pretrained(path, safe_serialization=request.param)
+
+    class FakeTokenizer:
+        @staticmethod
+        def from_pretrained(model_path):
+            return SimpleNamespace(pad_token=None, eos_token="</s>", padding_side="right")
+
+    monkeypatch.setattr(serve_model, "AutoTokenizer", FakeTokenizer)
+    monkeypatch.setattr(serve_model.torch.cuda, "is_available", lambda: False)
+    return torch, serve_model.ModelServer, path
+
+
+def test_bf16_loads_bfloat16_weights(tiny_model):
+    torch, ModelServer, path = tiny_model
+
+    model, _ = ModelServer._cargar(path, load_mode="bf16")
+
+    assert {p.dtype for p in model.parameters()} == {torch.bfloat16}
+
+
+def test_int8_quantizes_the_linear_layers(tiny_model):
+    torch, ModelServer, path = tiny_model
+
+    model, _ = ModelServer._cargar(path, load_mode="int8")
+
+    # GPT-2 blocks use Conv1D; its only nn.Linear is the output head
+    assert isinstance(model.lm_head, torch.ao.nn.quantized.dynamic.Linear)
+    assert not any(type(m) is torch.nn.Linear for m in model.modules())
+    with torch.no_grad():
+        logits = model(torch.tensor([[1, 2, 3]])).logits
+    assert logits.shape == (1, 3, 64)
+
+
+def test_fp32_is_the_default(tiny_model):
+    torch, ModelServer, path = tiny_model
+
+    model, _ = ModelServer._cargar(path)
+
+    assert {p.dtype for p in model.parameters()} == {torch.float32}
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.metrics import Counter, Gauge, Histogram, MetricsRegistry, gauge_from
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("stage_seconds", "Stage latency.", ["model", "stage"], buckets=(0.1, 1.0)))
+
+    histogram.observe(0.05, model="demo", stage="generate")
+    histogram.observe(0.5, model="demo", stage="generate")
+    histogram.observe(5.0, model="demo", stage="generate")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE stage_seconds histogram" in lines
+    assert 'stage_seconds_bucket{model="demo",stage="generate",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{model="demo",stage="generate",le="1.0"} 2' in lines
+    assert 'stage_seconds_bucket{model="demo",stage="generate",le="+Inf"} 3' in lines
+    assert 'stage_seconds_count{model="demo",stage="generate"} 3' in lines
+    assert 'stage_seconds_sum{model="demo",stage="generate"} 5.55' in lines
+
+
+def test_counter_and_gauge():
+    counter = Counter("tokens_total", "Tokens.", ["model"])
+    counter.inc(3, model="a")
+    counter.inc(2, model="a")
+    with pytest.raises(ValueError):
+        counter.inc(-1, model="a")
+    with pytest.raises(ValueError):
+        counter.inc(1, other="a")
+    assert counter.get(model="a") == 5
+
+    gauge = Gauge("in_flight", "In flight.")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert gauge.render()[-1] == "in_flight 1.0"
+
+
+def test_label_values_are_escaped():
+    counter = Counter("requests_total", "Requests.", ["path"])
+    counter.inc(path='a"b\\c')
+
+    assert counter.render()[-1] == 'requests_total{path="a\\"b\\\\c"} 1.0'
+
+
+def test_collectors_are_evaluated_at_render_time():
+    registry = MetricsRegistry()
+    state = {"depth": 1}
+    registry.add_collector(lambda: [gauge_from("queue_depth", "Queue depth.", state["depth"])])
+
+    assert "queue_depth 1.0" in registry.render()
+    state["depth"] = 4
+    assert "queue_depth 4.0" in registry.render()
+
+
+def test_time_context_manager_observes_duration():
+    histogram = Histogram("block_seconds", "Block.", ["stage"])
+
+    with histogram.time(stage="decode"):
+        pass
+
+    assert histogram.count(stage="decode") == 1
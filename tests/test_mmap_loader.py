@@ -0,0 +1,159 @@
+import json
+import os
+import struct
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import deployment.serve_model as serve_model
+from deployment.mmap_loader import load_model_mmap, safetensors_files
+from deployment.serve_model import ModelServer
+
+
+class FakeModel:
+    def eval(self):
+        return self
+
+    def to(self, device):
+        return self
+
+
+class FakeTokenizer:
+    @staticmethod
+    def from_pretrained(model_path):
+        return SimpleNamespace(pad_token=None, eos_token="</s>", padding_side="right")
+
+
+@pytest.fixture
+def loaders(monkeypatch):
+    """Replaces both loading paths with fakes and records which one _cargar takes."""
+    state = SimpleNamespace(calls=[], mmap_error=False)
+
+    def fake_mmap(model_path, dtype=None):
+        state.calls.append("mmap")
+        if state.mmap_error:
+            raise RuntimeError("unsupported architecture")
+        return FakeModel()
+
+    class FakeAutoModel:
+        @staticmethod
+        def from_pretrained(model_path, torch_dtype=None):
+            state.calls.append("from_pretrained")
+            return FakeModel()
+
+    monkeypatch.setattr(serve_model, "load_model_mmap", fake_mmap)
+    monkeypatch.setattr(serve_model, "AutoModelForCausalLM", FakeAutoModel)
+    monkeypatch.setattr(serve_model, "AutoTokenizer", FakeTokenizer)
+    monkeypatch.setattr(serve_model.torch.cuda, "is_available", lambda: False)
+    return state
+
+
+def make_model(tmp_path, *files):
+    model_dir = tmp_path / "model"
+    model_dir.mkdir()
+    for name in files:
+        (model_dir / name).write_bytes(b"")
+    return str(model_dir)
+
+
+def test_safetensors_are_memory_mapped_on_cpu(tmp_path, loaders):
+    ModelServer._cargar(make_model(tmp_path, "model.safetensors"))
+    assert loaders.calls == ["mmap"]
+
+
+def test_without_safetensors_from_pretrained_is_used(tmp_path, loaders):
+    ModelServer._cargar(make_model(tmp_path, "pytorch_model.bin"))
+    assert loaders.calls == ["from_pretrained"]
+
+
+def test_mmap_failures_fall_back_to_from_pretrained(tmp_path, loaders):
+    loaders.mmap_error = True
+    ModelServer._cargar(make_model(tmp_path, "model.safetensors"))
+    assert loaders.calls == ["mmap", "from_pretrained"]
+
+
+def test_gpu_loads_use_from_pretrained(tmp_path, loaders, monkeypatch):
+    monkeypatch.setattr(serve_model.torch.cuda, "is_available", lambda: True)
+    ModelServer._cargar(make_model(tmp_path, "model.safetensors"))
+    assert loaders.calls == ["from_pretrained"]
+
+
+def test_tokenizer_is_configured_once_at_load(tmp_path, loaders):
+    _, tokenizer = ModelServer._cargar(make_model(tmp_path, "pytorch_model.bin"))
+
+    assert tokenizer.padding_side == "left"
+    assert tokenizer.pad_token == "</s>"
+    assert hasattr(tokenizer._softia_lock, "acquire")
+
+
+def test_sharded_checkpoints_are_found_through_the_index(tmp_path):
+    model_dir = make_model(tmp_path, "model-00001-of-00002.safetensors", "model-00002-of-00002.safetensors")
+    index = {"weight_map": {"a": "model-00002-of-00002.safetensors", "b": "model-00001-of-00002.safetensors",
+                            "c": "model-00002-of-00002.safetensors"}}
+    with open(os.path.join(model_dir, "model.safetensors.index.json"), "w") as f:
+        json.dump(index, f)
+
+    assert [os.path.basename(p) for p in safetensors_files(model_dir)] == [
+        "model-00001-of-00002.safetensors",
+        "model-00002-of-00002.safetensors",
+    ]
+    assert safetensors_files(str(tmp_path)) == []
+
+
+@pytest.fixture
+def tiny_model(tmp_path):
+    """A two-layer GPT-2 with tied embeddings, saved as a single safetensors file."""
+    torch.manual_seed(0)
+    config = transformers.GPT2Config(vocab_size=64, n_positions=32, n_embd=16, n_layer=2, n_head=2)
+    path = str(tmp_path / "tiny")
+    transformers.GPT2LMHeadModel(config).save_pretrained(path, safe_serialization=True)
+    return path
+
+
+def data_offsets(path):
+    with open(path, "rb") as f:
+        (header_length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_length))
+    return {name: info["data_offsets"][0] for name, info in header.items() if name != "__metadata__"}
+
+
+def test_mmap_weights_match_from_pretrained(tiny_model):
+    mapped = load_model_mmap(tiny_model).state_dict()
+    reference = transformers.AutoModelForCausalLM.from_pretrained(tiny_model).state_dict()
+
+    assert mapped.keys() == reference.keys()
+    for name, tensor in reference.items():
+        assert mapped[name].dtype == tensor.dtype, name
+        assert torch.equal(mapped[name], tensor), name
+
+
+def test_mmap_weights_are_views_of_the_mapped_file(tiny_model):
+    offsets = data_offsets(os.path.join(tiny_model, "model.safetensors"))
+    model = load_model_mmap(tiny_model)
+    parameters = dict(model.named_parameters())
+
+    # Copies would live at unrelated addresses; views keep the distances of the file layout
+    bases = {parameters[name].data_ptr() - offset for name, offset in offsets.items() if name in parameters}
+    assert len(bases) == 1
+    assert len(offsets.keys() & parameters.keys()) > 1
+    # lm_head is not stored: it is tied to the mapped embedding
+    assert "lm_head.weight" not in offsets
+    assert model.lm_head.weight.data_ptr() == model.transformer.wte.weight.data_ptr()
+
+
+def test_converting_the_dtype_keeps_the_weights(tiny_model):
+    reference = transformers.AutoModelForCausalLM.from_pretrained(tiny_model).state_dict()
+    mapped = load_model_mmap(tiny_model, dtype=torch.bfloat16).state_dict()
+
+    for name, tensor in reference.items():
+        if tensor.is_floating_point():
+            assert mapped[name].dtype == torch.bfloat16, name
+            assert torch.equal(mapped[name], tensor.to(torch.bfloat16)), name
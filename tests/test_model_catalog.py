@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.catalog import ModelCatalog
+
+
+def make_model(model_dir, name, mtime, metrics=None):
+    path = model_dir / name
+    path.mkdir()
+    if metrics is not None:
+        (path / "training_metrics.json").write_text(json.dumps(metrics))
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_latest_model_is_tracked_incrementally(tmp_path):
+    make_model(tmp_path, "old", 1000)
+    make_model(tmp_path, "new", 2000)
+    catalog = ModelCatalog(str(tmp_path), poll_interval=0)
+
+    assert catalog.latest_path() == str(tmp_path / "new")
+
+    make_model(tmp_path, "newest", 3000)
+    assert catalog.latest_path() == str(tmp_path / "newest")
+
+    (tmp_path / "newest").rmdir()
+    assert catalog.latest_path() == str(tmp_path / "new")
+
+
+def test_directory_is_not_rescanned_within_poll_interval(tmp_path):
+    make_model(tmp_path, "a", 1000)
+    catalog = ModelCatalog(str(tmp_path), poll_interval=3600)
+
+    assert len(catalog) == 1
+    make_model(tmp_path, "b", 2000)
+    assert len(catalog) == 1
+    assert catalog.scans == 1
+
+    catalog.refresh(force=True)
+    assert len(catalog) == 2
+
+
+def test_empty_catalog_raises(tmp_path):
+    catalog = ModelCatalog(str(tmp_path / "missing"), poll_interval=0)
+
+    with pytest.raises(FileNotFoundError):
+        catalog.latest_path()
+    assert catalog.list() == {"models": [], "total": 0}
+
+
+def test_list_filters_sorts_and_paginates(tmp_path):
+    make_model(tmp_path, "soporte", 1000, {"train_loss": 0.5})
+    make_model(tmp_path, "ventas", 2000, {"train_loss": 0.2})
+    make_model(tmp_path, "legal", 3000, {"train_loss": 0.9})
+    make_model(tmp_path, "sin_metricas", 4000)
+    catalog = ModelCatalog(str(tmp_path), poll_interval=0)
+
+    by_loss = catalog.list(sort_by="train_loss", descending=False)
+    assert [m["name"] for m in by_loss["models"]] == ["ventas", "soporte", "legal", "sin_metricas"]
+
+    filtered = catalog.list(metric="train_loss", max_value=0.5, sort_by="name", descending=False)
+    assert [m["name"] for m in filtered["models"]] == ["soporte", "ventas"]
+    assert filtered["total"] == 2
+
+    page = catalog.list(sort_by="name", descending=False, offset=1, limit=2)
+    assert [m["name"] for m in page["models"]] == ["sin_metricas", "soporte"]
+    assert page["total"] == 4
+
+
+def test_changed_metrics_are_reloaded(tmp_path):
+    path = make_model(tmp_path, "soporte", 1000, {"train_loss": 0.5})
+    catalog = ModelCatalog(str(tmp_path), poll_interval=0)
+    assert catalog.list()["models"][0]["metrics"] == {"train_loss": 0.5}
+
+    metrics_file = path / "training_metrics.json"
+    metrics_file.write_text(json.dumps({"train_loss": 0.1}))
+    os.utime(metrics_file, (5000, 5000))
+
+    assert catalog.list()["models"][0]["metrics"] == {"train_loss": 0.1}
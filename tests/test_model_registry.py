@@ -0,0 +1,161 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.registry import ModelRegistry, model_size_bytes
+
+MB = 1024 * 1024
+
+
+class FakeTensor:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+    def numel(self):
+        return self.nbytes
+
+    def element_size(self):
+        return 1
+
+
+class FakeModel:
+    def __init__(self, size_mb):
+        self._params = [FakeTensor(int(size_mb * MB))]
+
+    def parameters(self):
+        return iter(self._params)
+
+    def buffers(self):
+        return iter([])
+
+
+class CountingLoader:
+    def __init__(self, size_mb=1, delay=0.0):
+        self.size_mb = size_mb
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, model_path):
+        with self._lock:
+            self.calls.append(model_path)
+        time.sleep(self.delay)
+        return FakeModel(self.size_mb), f"tokenizer:{model_path}"
+
+
+def test_size_is_computed_from_parameters():
+    assert model_size_bytes(FakeModel(2)) == 2 * MB
+
+
+def test_hits_and_misses_are_counted():
+    registry = ModelRegistry()
+    loader = CountingLoader()
+
+    registry.get("models/a", loader)
+    registry.get("models/a", loader)
+    registry.get("./models/a", loader)
+
+    stats = registry.stats()
+    assert loader.calls == ["models/a"]
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_least_recently_used_model_is_evicted():
+    registry = ModelRegistry(memory_budget_mb=2.5)
+    loader = CountingLoader(size_mb=1)
+
+    registry.get("a", loader)
+    registry.get("b", loader)
+    registry.get("a", loader)
+    registry.get("c", loader)
+
+    assert "a" in registry
+    assert "b" not in registry
+    assert "c" in registry
+    assert registry.stats()["evictions"] == 1
+
+
+def test_pinned_models_are_never_evicted():
+    registry = ModelRegistry(memory_budget_mb=1.5, pinned_models=["a"])
+    loader = CountingLoader(size_mb=1)
+
+    registry.get("a", loader)
+    registry.get("b", loader)
+    registry.get("c", loader)
+
+    assert "a" in registry
+    assert "b" not in registry
+    assert "c" in registry
+
+
+def test_concurrent_cold_loads_call_loader_once():
+    registry = ModelRegistry()
+    loader = CountingLoader(delay=0.1)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: registry.get("cold", loader), range(8)))
+
+    assert len(loader.calls) == 1
+    assert all(r[0] is results[0][0] for r in results)
+
+
+def test_failed_load_is_not_cached():
+    registry = ModelRegistry()
+
+    def broken(model_path):
+        raise OSError("missing weights")
+
+    with pytest.raises(OSError):
+        registry.get("broken", broken)
+
+    loader = CountingLoader()
+    registry.get("broken", loader)
+    assert loader.calls == ["broken"]
+
+
+def test_each_variant_is_loaded_separately():
+    registry = ModelRegistry()
+    loader = CountingLoader()
+
+    registry.get("models/a", loader, variant="fp32")
+    registry.get("models/a", loader, variant="int8")
+    registry.get("models/a", loader, variant="int8")
+
+    assert len(loader.calls) == 2
+    assert [m["path"] for m in registry.stats()["models"]] == ["models/a#int8", "models/a#fp32"]
+
+
+def test_pinning_and_evicting_a_path_covers_all_its_variants():
+    registry = ModelRegistry(memory_budget_mb=1.5, pinned_models=["models/a"])
+    loader = CountingLoader(size_mb=1)
+    registry.get("models/a", loader, variant="fp32")
+    registry.get("models/b", loader, variant="fp32")
+    registry.get("models/c", loader, variant="fp32")
+
+    assert "models/a" in registry
+    assert "models/b" not in registry
+
+    registry.get("models/a", loader, variant="bf16")
+    assert registry.evict("models/a")
+    assert "models/a" not in registry
+    assert registry.stats()["models"] == []
+
+
+def test_shrinking_budget_evicts_immediately():
+    registry = ModelRegistry()
+    loader = CountingLoader(size_mb=1)
+    for name in ("a", "b", "c"):
+        registry.get(name, loader)
+
+    registry.configure(memory_budget_mb=1)
+
+    assert [m["path"] for m in registry.stats()["models"]] == ["c"]
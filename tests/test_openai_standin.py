@@ -0,0 +1,52 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+pytest.importorskip("openai")
+
+from benchmarks.openai_standin import StandInConfig, StandInServer
+from data_generation.data_generator import generate_in_shards
+from data_generation.llm_client import LLMClient
+from data_generation.scorer import METRICS, score_qa_pairs
+
+
+def run_pipeline(server, num_samples, stream=True, max_retries=4):
+    client = LLMClient("key", server.base_url, backoff_base=0.01, max_retries=max_retries)
+
+    async def main():
+        samples = await generate_in_shards(client, "standin/instruct", "soporte", num_samples,
+                                           shard_size=5, max_concurrency=3, stream=stream)
+        scores = await score_qa_pairs(samples, max_concurrency=4, client=client)
+        return samples, scores
+
+    return asyncio.run(main()), client
+
+
+def test_generation_and_scoring_against_the_standin():
+    with StandInServer(StandInConfig(latency_ms=20, stream_chunk_delay_ms=0)) as server:
+        (samples, scores), client = run_pipeline(server, 12)
+        stats = server.stats()
+
+    assert len(samples) == 12
+    assert all(set(score) == set(METRICS) for score in scores)
+    assert any(score["helpfulness"] > 0 for score in scores)
+    assert stats["requests"] == {"instruct": 3, "reward": 12}
+    assert stats["max_in_flight"]["instruct"] == 3
+    # Streamed generations report their usage too
+    assert client.stats()["completion_tokens"] > 0
+
+
+def test_injected_errors_are_retried():
+    with StandInServer(StandInConfig(latency_ms=1, error_rate=0.3)) as server:
+        # Enough retries that a request failing every attempt is practically impossible
+        (samples, scores), client = run_pipeline(server, 10, stream=False, max_retries=10)
+        stats = server.stats()
+
+    assert len(samples) == 10
+    assert client.stats()["retries"] == sum(stats["errors"].values()) > 0
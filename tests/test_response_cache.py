@@ -0,0 +1,190 @@
+import asyncio
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.response_cache import ResponseCache, model_version
+
+
+class Generator:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return f"answer-{self.calls}"
+
+
+def make_model(tmp_path):
+    model_dir = tmp_path / "finetuned_demo"
+    model_dir.mkdir()
+    (model_dir / "config.json").write_text("{}")
+    (model_dir / "model.safetensors").write_bytes(b"weights")
+    return str(model_dir)
+
+
+def test_identical_prompts_hit_the_cache(tmp_path):
+    model = make_model(tmp_path)
+    cache = ResponseCache()
+    gen = Generator()
+
+    async def scenario():
+        first = await cache.get_or_compute(model, "Hola  mundo", {"max_length": 10}, gen)
+        second = await cache.get_or_compute(model, " Hola mundo ", {"max_length": 10}, gen)
+        return first, second
+
+    assert asyncio.run(scenario()) == ("answer-1", "answer-1")
+    assert gen.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_generation_params_are_part_of_the_key(tmp_path):
+    model = make_model(tmp_path)
+    cache = ResponseCache()
+    gen = Generator()
+
+    async def scenario():
+        await cache.get_or_compute(model, "hola", {"max_length": 10}, gen)
+        await cache.get_or_compute(model, "hola", {"max_length": 20}, gen)
+
+    asyncio.run(scenario())
+    assert gen.calls == 2
+
+
+def test_sampling_bypasses_the_cache(tmp_path):
+    model = make_model(tmp_path)
+    cache = ResponseCache()
+    gen = Generator()
+
+    async def scenario():
+        await cache.get_or_compute(model, "hola", {"do_sample": True}, gen)
+        await cache.get_or_compute(model, "hola", {"do_sample": True}, gen)
+
+    asyncio.run(scenario())
+    assert gen.calls == 2
+
+
+def test_concurrent_identical_requests_share_one_generation(tmp_path):
+    model = make_model(tmp_path)
+    cache = ResponseCache()
+    gen = Generator(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*[cache.get_or_compute(model, "hola", {}, gen) for _ in range(10)])
+
+    assert asyncio.run(scenario()) == ["answer-1"] * 10
+    assert gen.calls == 1
+    assert cache.stats()["coalesced"] == 9
+
+
+def test_errors_reach_every_coalesced_caller(tmp_path):
+    model = make_model(tmp_path)
+    cache = ResponseCache()
+
+    async def broken():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("generation failed")
+
+    async def scenario():
+        return await asyncio.gather(
+            *[cache.get_or_compute(model, "hola", {}, broken) for _ in range(3)], return_exceptions=True
+        )
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(scenario()))
+    assert cache.stats()["entries"] == 0
+
+
+def test_load_mode_is_part_of_the_key(tmp_path):
+    model = make_model(tmp_path)
+    cache = ResponseCache()
+    gen = Generator()
+
+    async def scenario():
+        await cache.get_or_compute(model, "hola", {}, gen, load_mode="fp32")
+        await cache.get_or_compute(model, "hola", {}, gen, load_mode="int8")
+        await cache.get_or_compute(model, "hola", {}, gen, load_mode="int8")
+
+    asyncio.run(scenario())
+    assert gen.calls == 2
+
+
+def test_a_waiter_takes_over_when_the_owner_is_cancelled(tmp_path):
+    model = make_model(tmp_path)
+    cache = ResponseCache()
+    gen = Generator(delay=0.05)
+
+    async def scenario():
+        owner = asyncio.create_task(cache.get_or_compute(model, "hola", {}, gen))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.get_or_compute(model, "hola", {}, gen)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        return await asyncio.gather(*waiters), owner
+
+    results, owner = asyncio.run(scenario())
+    assert owner.cancelled()
+    # Una sola de las solicitudes en espera vuelve a generar y las demás la comparten
+    assert results == ["answer-2"] * 3
+    assert gen.calls == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_version_checks_are_throttled(tmp_path, monkeypatch):
+    model = make_model(tmp_path)
+    cache = ResponseCache(version_check_interval=60)
+    checks = []
+    original = model_version
+
+    def counting_version(path):
+        checks.append(path)
+        return original(path)
+
+    monkeypatch.setattr("deployment.response_cache.model_version", counting_version)
+
+    async def scenario():
+        for _ in range(5):
+            await cache.get_or_compute(model, "hola", {}, Generator())
+
+    asyncio.run(scenario())
+    assert len(checks) == 1
+
+
+def test_retraining_invalidates_entries(tmp_path):
+    model = make_model(tmp_path)
+    cache = ResponseCache(version_check_interval=0)
+    invalidated = []
+    cache.on_invalidate.append(invalidated.append)
+    gen = Generator()
+
+    async def ask():
+        return await cache.get_or_compute(model, "hola", {}, gen)
+
+    assert asyncio.run(ask()) == "answer-1"
+    weights = os.path.join(model, "model.safetensors")
+    newer = model_version(model) + 10
+    os.utime(weights, (newer, newer))
+
+    assert asyncio.run(ask()) == "answer-2"
+    assert invalidated == [os.path.normpath(model)]
+
+
+def test_entries_expire_and_are_bounded(tmp_path):
+    model = make_model(tmp_path)
+    cache = ResponseCache(max_entries=2, ttl_seconds=0.05)
+    gen = Generator()
+
+    async def scenario():
+        for prompt in ("a", "b", "c"):
+            await cache.get_or_compute(model, prompt, {}, gen)
+        assert cache.stats()["entries"] == 2
+        time.sleep(0.1)
+        await cache.get_or_compute(model, "c", {}, gen)
+
+    asyncio.run(scenario())
+    assert gen.calls == 4
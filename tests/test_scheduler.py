@@ -0,0 +1,113 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.scheduler import AdmissionController, AdmissionRejectedError
+
+
+def test_interactive_requests_are_admitted_before_bulk():
+    async def main():
+        scheduler = AdmissionController(max_concurrent=1, max_per_model=1)
+        order = []
+        first = await scheduler.acquire("a", "interactive")
+
+        async def request(clase):
+            async with scheduler.admit("a", clase, shed=False):
+                order.append(clase)
+
+        bulk = asyncio.create_task(request("bulk"))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(request("interactive"))
+        await asyncio.sleep(0)
+        assert scheduler.stats()["classes"]["bulk"]["queued"] == 1
+
+        scheduler.release(first)
+        await asyncio.gather(bulk, interactive)
+        return order
+
+    assert asyncio.run(main()) == ["interactive", "bulk"]
+
+
+def test_per_model_limit_does_not_block_other_models():
+    async def main():
+        scheduler = AdmissionController(max_concurrent=4, max_per_model=1)
+        await scheduler.acquire("a", "interactive")
+        blocked = asyncio.create_task(scheduler.acquire("a", "interactive", shed=False))
+        other = await asyncio.wait_for(scheduler.acquire("b", "interactive"), timeout=1)
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        running = scheduler.stats()["running_per_model"]
+        # Freeing model b does not admit the request still waiting for model a
+        scheduler.release(other)
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        blocked.cancel()
+        await asyncio.gather(blocked, return_exceptions=True)
+        return running, scheduler.stats()
+
+    running, stats = asyncio.run(main())
+    assert running == {"a": 1, "b": 1}
+    assert stats["running_per_model"] == {"a": 1}
+    assert stats["classes"]["interactive"]["queued"] == 0
+
+
+def test_bulk_cannot_take_the_capacity_reserved_for_chat():
+    async def main():
+        scheduler = AdmissionController(max_concurrent=2, max_per_model=2, max_bulk=1)
+        await scheduler.acquire("a", "bulk")
+        waiting = asyncio.create_task(scheduler.acquire("a", "bulk", shed=False))
+        interactive = await asyncio.wait_for(scheduler.acquire("a", "interactive"), timeout=1)
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert scheduler.stats()["classes"]["bulk"]["queued"] == 0
+        return interactive
+
+    asyncio.run(main())
+
+
+def test_full_queue_returns_429_and_slo_breach_returns_503():
+    async def main():
+        scheduler = AdmissionController(max_concurrent=1, max_per_model=1, max_queued={"interactive": 1}, slo_ms={"interactive": 100})
+        ticket = await scheduler.acquire("a")
+        # Tiempo de servicio medio de 1 s: una espera estimada muy superior al objetivo
+        scheduler._servicio["interactive"] = 1.0
+        with pytest.raises(AdmissionRejectedError) as slo:
+            scheduler.check("a", "interactive")
+        assert slo.value.status_code == 503
+
+        scheduler.slo_ms["interactive"] = None
+        waiting = asyncio.create_task(scheduler.acquire("a", "interactive"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejectedError) as full:
+            await scheduler.acquire("a", "interactive")
+        assert full.value.status_code == 429
+        assert full.value.retry_after >= 1
+
+        scheduler.release(ticket)
+        await waiting
+        return scheduler.stats()
+
+    stats = asyncio.run(main())
+    assert stats["classes"]["interactive"]["rejected"] == 2
+
+
+def test_training_runs_in_its_own_thread():
+    async def main():
+        scheduler = AdmissionController(max_training=1)
+        result = await scheduler.run_training("m", lambda x: (x * 2, threading.current_thread().name), 21)
+        return result, scheduler.stats()
+
+    (value, thread_name), stats = asyncio.run(main())
+    assert value == 42
+    assert thread_name == "training"
+    assert stats["classes"]["training"]["running"] == 0
+    assert stats["classes"]["training"]["admitted"] == 1
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+pytest.importorskip("openai")
+
+from data_generation.scorer import IncrementalScorer, score_qa_pairs
+
+
+class FakeRewardClient:
+    """Stand-in for LLMClient that answers with `helpfulness` = len(entrada)."""
+
+    def __init__(self, delay=0.01, fail_on=()):
+        self.delay = delay
+        self.fail_on = set(fail_on)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def chat(self, model, messages):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Later items answer first, to check that the order is preserved
+            await asyncio.sleep(self.delay / (1 + len(messages[0]["content"])))
+            if messages[0]["content"] in self.fail_on:
+                raise RuntimeError("upstream error")
+            content = [SimpleNamespace(token="helpfulness", logprob=float(len(messages[0]["content"])))]
+            return SimpleNamespace(choices=[SimpleNamespace(logprobs=SimpleNamespace(content=content))])
+        finally:
+            self.in_flight -= 1
+
+
+def items(n):
+    return [{"entrada": "x" * (i + 1), "salida": "y"} for i in range(n)]
+
+
+def test_scores_concurrently_with_a_bound_and_keeps_order():
+    client = FakeRewardClient()
+    scores = asyncio.run(score_qa_pairs(items(20), max_concurrency=4, client=client))
+
+    assert [s["helpfulness"] for s in scores] == [float(i + 1) for i in range(20)]
+    assert client.max_in_flight == 4
+
+
+def test_a_failing_item_does_not_affect_the_others():
+    client = FakeRewardClient(fail_on={"xx"})
+    scores = asyncio.run(score_qa_pairs(items(3), max_concurrency=2, client=client))
+
+    # score_qa_pair reports upstream errors as all-zero metrics
+    assert scores[1]["helpfulness"] == 0.0
+    assert [scores[0]["helpfulness"], scores[2]["helpfulness"]] == [1.0, 3.0]
+
+
+def test_max_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        asyncio.run(score_qa_pairs(items(1), max_concurrency=0, client=FakeRewardClient()))
+
+
+def test_cancel_stops_pending_scores():
+    client = FakeRewardClient(delay=10)
+
+    async def run():
+        scorer = IncrementalScorer(max_concurrency=2, client=client)
+        for item in items(4):
+            scorer.submit(item)
+        await asyncio.sleep(0.01)
+        await scorer.cancel()
+        return scorer._tareas
+
+    tasks = asyncio.run(run())
+
+    assert all(task.cancelled() for task in tasks)
+    assert client.in_flight == 0
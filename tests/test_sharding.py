@@ -0,0 +1,163 @@
+import asyncio
+import os
+import queue
+import sys
+import threading
+import time
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.sharding import ShardedModelRouter, split_cores
+from deployment.workers import InferenceQueueFullError
+
+
+class FakeProcess:
+    """Stand-in for a worker process: a thread that answers from the router's queues."""
+
+    def __init__(self, index, requests, responses):
+        self.index = index
+        self.pid = 1000 + index
+        self.exitcode = None
+        self._requests = requests
+        self._responses = responses
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            message = self._requests.get()
+            if message is None:
+                self.exitcode = 0
+                return
+            request_id, model_path, load_mode, draft_model, prompt, max_length = message
+            if prompt == "crash":
+                self.exitcode = -9
+                return
+            if prompt == "hang":
+                continue
+            self._responses.put((request_id, f"{self.index}:{prompt}", None))
+
+    def is_alive(self):
+        return self.exitcode is None
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+
+class FakeRouter(ShardedModelRouter):
+    """Router whose workers are FakeProcess threads instead of spawned processes."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("monitor_interval_seconds", 0.02)
+        super().__init__(**kwargs)
+        self.launched = []
+
+    def _lanzar_worker(self, indice):
+        requests = queue.Queue()
+        process = FakeProcess(indice, requests, self._respuestas)
+        self.launched.append(process)
+        return requests, process
+
+
+@pytest.fixture
+def router():
+    routers = []
+
+    def make(**kwargs):
+        routers.append(FakeRouter(**kwargs))
+        return routers[-1]
+
+    yield make
+    for r in routers:
+        r.shutdown()
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_split_cores_makes_contiguous_balanced_blocks():
+    assert split_cores([0, 1, 2, 3, 4], 2) == [[0, 1, 2], [3, 4]]
+    assert split_cores([0, 1, 2, 3], 4) == [[0], [1], [2], [3]]
+
+
+def test_split_cores_shares_cores_when_there_are_more_workers():
+    assert split_cores([0, 1], 3) == [[0], [1], [0]]
+
+
+def test_consistent_hash_assignment_is_stable(router):
+    first = router(num_workers=4)
+    second = router(num_workers=4)
+    models = [f"models/m{i}" for i in range(20)]
+
+    assignments = [first.worker_for(m) for m in models]
+    assert [second.worker_for(m) for m in reversed(models)] == list(reversed(assignments))
+    assert first.worker_for("models/m0/") == assignments[0]
+    # Con 20 modelos y 4 workers el anillo no manda todo al mismo worker
+    assert len(set(assignments)) > 1
+
+
+def test_least_loaded_spreads_new_models_across_workers(router):
+    r = router(num_workers=3, policy="least_loaded")
+    assert sorted(r.worker_for(f"models/m{i}") for i in range(3)) == [0, 1, 2]
+    assert r.worker_for("models/m1") == r.worker_for("models/m1")
+
+
+def test_least_loaded_prefers_the_worker_with_less_pending_work(router):
+    r = router(num_workers=2, policy="least_loaded")
+    r._pendientes = [5, 0]
+    assert r.worker_for("models/a") == 1
+
+
+def test_invalid_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ShardedModelRouter(policy="random")
+
+
+def test_requests_are_answered_by_the_owning_worker(router):
+    r = router(num_workers=2)
+    worker = r.worker_for("models/a")
+
+    assert r.submit("models/a", "hola").result(timeout=1) == f"{worker}:hola"
+    assert r.stats()["workers"][worker]["pending"] == 0
+
+
+def test_full_worker_is_rejected(router):
+    r = router(num_workers=1, max_pending_per_worker=1)
+    r.submit("models/a", "hang")
+    with pytest.raises(InferenceQueueFullError):
+        r.submit("models/a", "hola")
+
+
+def test_dead_worker_fails_pending_requests_and_is_restarted(router):
+    r = router(num_workers=2)
+    worker = r.worker_for("models/a")
+    pending = r.submit("models/a", "hang")
+    crashed = r.submit("models/a", "crash")
+
+    for future in (pending, crashed):
+        with pytest.raises(RuntimeError, match="terminó inesperadamente"):
+            future.result(timeout=2)
+
+    wait_until(lambda: r.restarts == 1)
+    stats = r.stats()
+    assert stats["workers"][worker]["pending"] == 0
+    assert stats["workers"][worker]["alive"]
+    # El worker nuevo hereda los modelos del anterior
+    assert r.worker_for("models/a") == worker
+    assert r.submit("models/a", "hola").result(timeout=1) == f"{worker}:hola"
+
+
+def test_predict_times_out_when_the_worker_does_not_answer(router):
+    r = router(num_workers=1, request_timeout_seconds=0.05)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(r.predict("models/a", "hang"))
+    assert asyncio.run(r.predict("models/a", "hola")) == "0:hola"
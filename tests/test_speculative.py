@@ -0,0 +1,130 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.speculative import SpeculativeStats, count_forward_passes
+
+
+class FakeModule:
+    """Minimal stand-in for torch.nn.Module forward hooks."""
+
+    def __init__(self):
+        self._hooks = []
+
+    def register_forward_hook(self, hook):
+        self._hooks.append(hook)
+
+    def __call__(self):
+        for hook in self._hooks:
+            hook(self, (), None)
+
+
+def test_forward_passes_are_counted_per_model():
+    target, draft = FakeModule(), FakeModule()
+
+    with count_forward_passes(target, draft) as passes:
+        target()
+        for _ in range(5):
+            draft()
+        target()
+
+    assert passes == [2, 5]
+
+
+def test_counts_are_isolated_between_threads():
+    target = FakeModule()
+    results = {}
+
+    def generate(name, calls):
+        with count_forward_passes(target) as passes:
+            for _ in range(calls):
+                target()
+        results[name] = passes[0]
+
+    threads = [threading.Thread(target=generate, args=(f"t{i}", i + 1)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {"t0": 1, "t1": 2, "t2": 3, "t3": 4}
+
+
+def test_the_hook_is_registered_once_under_concurrent_use():
+    class SlowModule(FakeModule):
+        def register_forward_hook(self, hook):
+            # Widens the window between the check and the registration
+            time.sleep(0.01)
+            super().register_forward_hook(hook)
+
+    target = SlowModule()
+    start = threading.Barrier(4)
+    results = []
+
+    def generate():
+        start.wait()
+        with count_forward_passes(target) as passes:
+            target()
+        results.append(passes[0])
+
+    threads = [threading.Thread(target=generate) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(target._hooks) == 1
+    assert results == [1, 1, 1, 1]
+
+
+def test_calls_outside_the_block_are_ignored():
+    target = FakeModule()
+    with count_forward_passes(target) as passes:
+        target()
+    target()
+    assert passes == [1]
+
+
+def test_acceptance_rate():
+    stats = SpeculativeStats()
+    # 20 new tokens in 5 target passes -> 15 draft tokens accepted out of 25 proposed
+    stats.record("models/a", new_tokens=20, target_passes=5, draft_passes=25, seconds=2.0)
+
+    model_stats = stats.stats()["models/a"]
+    assert model_stats["accepted_tokens"] == 15
+    assert model_stats["acceptance_rate"] == 15 / 25
+    assert model_stats["tokens_per_target_pass"] == 4.0
+    assert model_stats["tokens_per_second"] == 10.0
+
+
+def test_predict_batch_uses_assisted_generation_with_a_draft_model(tmp_path, monkeypatch):
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from deployment.registry import ModelRegistry
+    from deployment.serve_model import ModelServer
+
+    models = {}
+
+    def load(model_path, load_mode="fp32"):
+        models[model_path] = torch.nn.Linear(2, 2)
+        return models[model_path], object()
+
+    monkeypatch.setattr(ModelServer, "registry", ModelRegistry())
+    monkeypatch.setattr(ModelServer, "_cargar", staticmethod(load))
+    calls = []
+    monkeypatch.setattr(ModelServer, "_predict_asistido", lambda self, prompt, max_length: calls.append(prompt) or prompt.upper())
+
+    target = str(tmp_path)
+    server = ModelServer(target, draft_model="models/draft")
+
+    assert server.draft is models["models/draft"]
+    assert server.modelo is models[target]
+    assert server.predict_batch(["a", "b"], max_length=16) == ["A", "B"]
+    assert calls == ["a", "b"]
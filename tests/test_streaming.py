@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import queue
+import sys
+import threading
+
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.streaming import consume_stream, sse_events
+
+
+class FakeStreamer:
+    """Stand-in for TextIteratorStreamer: a generation thread puts pieces, end() closes it."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def put(self, piece):
+        self._queue.put(piece)
+
+    def end(self):
+        self._queue.put(None)
+
+    def __iter__(self):
+        while True:
+            piece = self._queue.get()
+            if piece is None:
+                return
+            yield piece
+
+
+def start_generation(pieces, error=None):
+    """Runs a fake `generate` in a thread, like ModelServer.predict_stream does."""
+    streamer = FakeStreamer()
+    cancelled, finished, errors = threading.Event(), threading.Event(), []
+
+    def generate():
+        try:
+            for piece in pieces:
+                if cancelled.is_set():
+                    break
+                streamer.put(piece)
+            if error is not None:
+                raise error
+        except Exception as e:
+            errors.append(e)
+        finally:
+            streamer.end()
+            finished.set()
+
+    threading.Thread(target=generate, daemon=True).start()
+    return consume_stream(streamer, cancelled, finished, errors), cancelled
+
+
+def parse(events):
+    parsed = []
+    for event in events:
+        name, data = event.strip().split("\n")
+        parsed.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return parsed
+
+
+def collect(fragments, cancelled, disconnect_after=None):
+    closed = []
+    calls = {"n": 0}
+
+    async def is_disconnected():
+        calls["n"] += 1
+        return disconnect_after is not None and calls["n"] > disconnect_after
+
+    async def on_close():
+        # Like /chat/stream: closing the stream cancels the generation
+        cancelled.set()
+        closed.append(True)
+
+    async def run():
+        return [event async for event in sse_events(fragments, is_disconnected, {"model": "demo"}, on_close)]
+
+    return parse(asyncio.run(run())), closed
+
+
+def test_consume_stream_skips_empty_pieces_and_signals_the_end():
+    fragments, cancelled = start_generation(["Hola", "", " mundo"])
+
+    assert list(fragments) == ["Hola", " mundo"]
+    assert cancelled.is_set()
+
+
+def test_consume_stream_raises_the_generation_error():
+    fragments, _ = start_generation(["Hola"], error=RuntimeError("sin memoria"))
+
+    with pytest.raises(RuntimeError, match="sin memoria"):
+        list(fragments)
+
+
+def test_stopping_early_cancels_the_generation():
+    fragments, cancelled = start_generation(["a", "b", "c"])
+
+    assert next(fragments) == "a"
+    fragments.close()
+    assert cancelled.is_set()
+
+
+def test_sse_emits_token_events_then_done():
+    fragments, cancelled = start_generation(["Hola", " mundo"])
+
+    events, closed = collect(fragments, cancelled)
+
+    assert events == [("token", {"token": "Hola"}), ("token", {"token": " mundo"}), ("done", {"model": "demo"})]
+    assert closed == [True]
+
+
+def test_sse_reports_generation_errors():
+    fragments, cancelled = start_generation(["Hola"], error=RuntimeError("sin memoria"))
+
+    events, closed = collect(fragments, cancelled)
+
+    assert events == [("token", {"token": "Hola"}), ("error", {"detail": "sin memoria"})]
+    assert closed == [True]
+
+
+def test_disconnect_stops_the_stream_and_cancels():
+    fragments, cancelled = start_generation(["a", "b", "c", "d"])
+
+    events, closed = collect(fragments, cancelled, disconnect_after=1)
+
+    # No done event for a client that already left
+    assert events == [("token", {"token": "a"})]
+    assert closed == [True]
+    assert cancelled.is_set()
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from deployment.registry import ModelRegistry
+from deployment.warmup import get_preload_paths, preload, warm_up
+
+
+class FakeModel:
+    def parameters(self):
+        return iter([])
+
+
+class FakeServer:
+    """Stand-in for ModelServer that loads through a real registry and records warm-up prompts."""
+
+    registry = ModelRegistry()
+    warmed = []
+
+    def __init__(self, model_path, load_mode="fp32", draft_model=None):
+        if "broken" in model_path:
+            raise RuntimeError(f"cannot load {model_path}")
+        self.registry_path = model_path
+        self.registry.get(model_path, lambda _: (FakeModel(), "tokenizer"), variant=load_mode)
+        if draft_model:
+            self.registry.get(draft_model, lambda _: (FakeModel(), "tokenizer"), variant=load_mode)
+        self.model_path = model_path
+        self.draft_model = draft_model
+
+    def predict_batch(self, prompts, max_length=1024):
+        FakeServer.warmed.append((self.model_path, self.draft_model, prompts[0], max_length))
+        return ["ok"] * len(prompts)
+
+
+class FakeRouter:
+    def __init__(self):
+        self.calls = []
+
+    async def predict(self, model_path, prompt, load_mode="fp32", max_length=1024, draft_model=None):
+        self.calls.append((model_path, load_mode, draft_model))
+        return "ok"
+
+
+async def run_inline(fn, *args, **kwargs):
+    return fn(*args, **kwargs)
+
+
+def reset_fake():
+    FakeServer.registry = ModelRegistry()
+    FakeServer.warmed = []
+
+
+def make_config(tmp_path, models, **deployment):
+    model_dir = tmp_path / "models"
+    for name in models:
+        (model_dir / name).mkdir(parents=True)
+    return {
+        "model": {"finetuned_model_dir": str(model_dir)},
+        "deployment": {"preload": {"models": list(models), "warmup_prompt": "Hola", "warmup_max_length": 8}, **deployment},
+    }
+
+
+def test_warm_up_loads_generates_and_pins_the_model_and_its_draft():
+    reset_fake()
+
+    result = warm_up("models/a", "bf16", prompt="Hola", max_length=8, draft_model="models/draft", server_factory=FakeServer)
+
+    assert FakeServer.warmed == [("models/a", "models/draft", "Hola", 8)]
+    assert result["draft_model"] == "models/draft" and result["pinned"]
+    assert FakeServer.registry.pinned == {"models/a", "models/draft"}
+    # Pins from the preload survive a config reload of the registry
+    FakeServer.registry.configure(memory_budget_mb=0.000001)
+    assert "models/a" in FakeServer.registry and "models/draft" in FakeServer.registry
+
+
+def test_warm_up_without_pin_leaves_the_model_evictable():
+    reset_fake()
+
+    warm_up("models/a", server_factory=FakeServer, pin=False)
+
+    assert FakeServer.registry.pinned == set()
+
+
+def test_preload_paths_combine_names_and_latest_without_duplicates(tmp_path):
+    config = make_config(tmp_path, ["a", "b"])
+    config["deployment"]["preload"]["latest"] = 1
+    os.utime(tmp_path / "models" / "a", (2e9, 2e9))
+
+    paths = get_preload_paths(config)
+
+    assert [os.path.basename(p) for p in paths] == ["a", "b"]
+
+
+def test_preload_reports_each_model_and_survives_failures(tmp_path):
+    reset_fake()
+    config = make_config(
+        tmp_path,
+        ["a", "broken", "c"],
+        speculative={"enabled": True, "draft_models": {"c": "models/draft"}},
+        load_mode={"models": {"a": "int8"}},
+    )
+    status = {}
+
+    asyncio.run(preload(config, status, run_inline, server_factory=FakeServer))
+
+    by_name = {os.path.basename(path): result for path, result in status.items()}
+    assert set(by_name) == {"a", "broken", "c"}
+    assert "cannot load" in by_name["broken"]["error"]
+    assert "warmup_s" in by_name["a"] and "warmup_s" in by_name["c"]
+    assert by_name["c"]["draft_model"] == "models/draft"
+    assert [(os.path.basename(m), d) for m, d, _, _ in FakeServer.warmed] == [("a", None), ("c", "models/draft")]
+    assert any(m["path"].endswith("a#int8") and m["pinned"] for m in FakeServer.registry.stats()["models"])
+
+
+def test_preload_goes_through_the_router_in_sharding_mode(tmp_path):
+    config = make_config(tmp_path, ["a"], speculative={"enabled": True, "draft_models": {"a": "models/draft"}})
+    router, status = FakeRouter(), {}
+
+    asyncio.run(preload(config, status, run_inline, router=router))
+
+    assert [(os.path.basename(m), mode, d) for m, mode, d in router.calls] == [("a", "fp32", "models/draft")]
+    assert list(status.values())[0].keys() == {"load_and_warmup_s"}